@@ -1,34 +1,144 @@
 import struct
 
+import numpy as np
+
+NEAREST = "nearest"
+BILINEAR = "bilinear"
+MIP = "mip"
+
+
 class BMPTexture(object):
-    def __init__(self, filename):
+    """
+    Textura BMP 24bpp en un array (alto, ancho, 3) uint8 RGB, fila 0 arriba.
+    - mmap=True: los píxeles se leen del archivo mapeado en memoria (no se
+      copian a RAM hasta que se usan).
+    - getColor(u, v): un color [r, g, b] en [0,1] (vecino más cercano).
+    - sample(u, v, mode, level): colores (N, 3) float32 de arrays de u, v.
+    """
+
+    def __init__(self, filename, mmap=False):
         with open(filename, 'rb') as f:
-            f.seek(10)
-            pixel_data_offset = struct.unpack('<I', f.read(4))[0]
-            f.seek(18)
-            self.width  = struct.unpack('<I', f.read(4))[0]
-            self.height = struct.unpack('<I', f.read(4))[0]
-            f.seek(28)
-            bpp = struct.unpack('<H', f.read(2))[0]
-            if bpp != 24:
-                raise Exception('BMPTexture: solo BMP 24bpp soportado')
-            row_padded = (self.width * 3 + 3) & ~3
-
-            self.pixels = []
-            f.seek(pixel_data_offset)
-            for _y in range(self.height):
-                row = []
-                row_bytes = f.read(row_padded)
-                for x in range(self.width):
-                    b = row_bytes[x*3 + 0]
-                    g = row_bytes[x*3 + 1]
-                    r = row_bytes[x*3 + 2]
-                    row.append([r/255.0, g/255.0, b/255.0])
-                self.pixels.insert(0, row)
+            header = f.read(54)
+        if header[:2] != b'BM':
+            raise Exception('BMPTexture: no es un archivo BMP')
+        pixel_data_offset = struct.unpack_from('<I', header, 10)[0]
+        self.width, height = struct.unpack_from('<ii', header, 18)
+        bpp = struct.unpack_from('<H', header, 28)[0]
+        if bpp != 24:
+            raise Exception('BMPTexture: solo BMP 24bpp soportado')
+        # alto negativo = filas de arriba hacia abajo
+        self.height = abs(height)
+        row_padded = (self.width * 3 + 3) & ~3
+
+        shape = (self.height, row_padded)
+        if mmap:
+            raw = np.memmap(filename, dtype=np.uint8, mode='r', offset=pixel_data_offset, shape=shape)
+        else:
+            with open(filename, 'rb') as f:
+                f.seek(pixel_data_offset)
+                raw = np.frombuffer(f.read(shape[0] * shape[1]), dtype=np.uint8).reshape(shape)
+
+        # BGR -> RGB y, si el archivo va de abajo hacia arriba, fila 0 = arriba
+        pixels = raw[:, :self.width * 3].reshape(self.height, self.width, 3)[:, :, ::-1]
+        self.pixels = pixels[::-1] if height > 0 else pixels
+        self._mips = None
 
     def getColor(self, u, v):
         u = u % 1.0
         v = v % 1.0
         x = int(u * (self.width  - 1))
         y = int(v * (self.height - 1))
-        return self.pixels[y][x][:]
+        return (self.pixels[y, x] / 255.0).tolist()
+
+    # Muestreo en lote
+    def sample(self, u, v, mode=NEAREST, level=0.0):
+        """
+        Colores (N, 3) float32 en [0,1] para arrays de coordenadas u, v.
+        - "nearest": el mismo texel que getColor, con un solo gather.
+        - "bilinear": interpola los 4 texels vecinos (u da la vuelta, v se recorta).
+        - "mip": bilineal en el nivel `level` (escalar o array por rayo) de
+          mip_levels(); los niveles fraccionarios mezclan los dos más cercanos.
+        """
+        u = np.asarray(u, dtype=np.float64) % 1.0
+        v = np.asarray(v, dtype=np.float64) % 1.0
+
+        if mode == NEAREST:
+            x = (u * (self.width - 1)).astype(np.intp)
+            y = (v * (self.height - 1)).astype(np.intp)
+            return self.pixels[y, x].astype(np.float32) * np.float32(1.0 / 255.0)
+        if mode == BILINEAR:
+            return _bilinear(self.pixels, u, v) * np.float32(1.0 / 255.0)
+        if mode != MIP:
+            raise ValueError(f"BMPTexture: modo de muestreo desconocido {mode!r}")
+
+        mips = self.mip_levels()
+        level = np.clip(np.asarray(level, dtype=np.float64), 0.0, len(mips) - 1)
+        if level.ndim == 0:
+            lo = int(level)
+            hi = min(lo + 1, len(mips) - 1)
+            t = np.float32(level - lo)
+            color = _bilinear(mips[lo], u, v)
+            if t > 0.0:
+                color += t * (_bilinear(mips[hi], u, v) - color)
+            return color
+
+        # nivel por rayo: se agrupan los rayos por nivel entero
+        level = np.broadcast_to(level, u.shape)
+        lo = level.astype(np.intp)
+        t = (level - lo).astype(np.float32)[..., None]
+        color = np.empty(u.shape + (3,), dtype=np.float32)
+        for L in np.unique(lo):
+            sel = lo == L
+            c = _bilinear(mips[L], u[sel], v[sel])
+            if L + 1 < len(mips):
+                c += t[sel] * (_bilinear(mips[L + 1], u[sel], v[sel]) - c)
+            color[sel] = c
+        return color
+
+    def mip_levels(self):
+        """
+        Pirámide de niveles float32 en [0,1]: el nivel 0 es la textura y cada
+        nivel promedia bloques de 2x2 del anterior, hasta 1x1. Se arma la
+        primera vez que se pide.
+        """
+        if self._mips is None:
+            level = self.pixels.astype(np.float32) * np.float32(1.0 / 255.0)
+            mips = [level]
+            while level.shape[0] > 1 or level.shape[1] > 1:
+                level = _halve(_halve(level, 0), 1)
+                mips.append(level)
+            self._mips = mips
+        return self._mips
+
+
+def _halve(img, axis):
+    """Mitad de texels en un eje promediando de a 2 (con lado impar, el último de a 3)."""
+    n = img.shape[axis]
+    if n == 1:
+        return img
+    a = np.moveaxis(img, axis, 0)
+    half = 0.5 * (a[0:n - 1:2] + a[1:n:2])
+    if n % 2:
+        half[-1] = (a[n - 3] + a[n - 2] + a[n - 1]) / np.float32(3.0)
+    return np.moveaxis(half, 0, axis)
+
+
+def _bilinear(img, u, v):
+    """Bilineal de img (alto, ancho, 3) en u, v de [0,1): (N, 3) float32 en las unidades de img."""
+    h, w = img.shape[:2]
+    x = u * w - 0.5
+    y = np.clip(v * h - 0.5, 0.0, h - 1)
+    x0 = np.floor(x)
+    y0 = np.floor(y)
+    fx = (x - x0).astype(np.float32)[..., None]
+    fy = (y - y0).astype(np.float32)[..., None]
+    x0 = x0.astype(np.intp) % w
+    x1 = (x0 + 1) % w
+    y0 = y0.astype(np.intp)
+    y1 = np.minimum(y0 + 1, h - 1)
+
+    top = img[y0, x0].astype(np.float32)
+    top += fx * (img[y0, x1] - top)
+    bottom = img[y1, x0].astype(np.float32)
+    bottom += fx * (img[y1, x1] - bottom)
+    return top + fy * (bottom - top)
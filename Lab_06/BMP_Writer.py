@@ -1,5 +1,7 @@
 import struct
 
+import numpy as np
+
 def GenerateBMP(filename, width, height, frameBuffer):
     row_padded = (width * 3 + 3) & ~3
     filesize = 54 + row_padded * height
@@ -24,14 +26,8 @@ def GenerateBMP(filename, width, height, frameBuffer):
         f.write(struct.pack('<I', 0))    
         f.write(struct.pack('<I', 0))  
 
-        for y in range(height-1, -1, -1):
-            row_bytes = bytearray()
-            for x in range(width):
-                r, g, b = frameBuffer[y][x]
-                r = max(0, min(255, int(r*255)))
-                g = max(0, min(255, int(g*255)))
-                b = max(0, min(255, int(b*255)))
-                row_bytes += bytes([b, g, r])
-            while len(row_bytes) < row_padded:
-                row_bytes += b'\x00'
-            f.write(row_bytes)
+        # filas de abajo hacia arriba, BGR y con padding a múltiplo de 4 bytes
+        rgb = np.clip(np.asarray(frameBuffer, dtype=float)[:height, :width] * 255, 0, 255).astype(np.uint8)
+        rows = np.zeros((height, row_padded), dtype=np.uint8)
+        rows[:, :width * 3] = rgb[::-1, :, ::-1].reshape(height, width * 3)
+        f.write(rows.tobytes())
@@ -1,8 +1,8 @@
-import pygame
 import os
 import datetime
 
 from gl import Renderer
+from BMP_Writer import GenerateBMP
 from figures import Sphere
 from material import Material, OPAQUE, REFLECTIVE, TRANSPARENT
 from lights import DirectionalLight, AmbientLight
@@ -12,30 +12,29 @@ from lights import DirectionalLight, AmbientLight
 # -----------------------------------------------------------------
 def save_render(rend, folder="renders", prefix="Lab06"):
     """
-    Guarda la superficie actual de Pygame en .bmp (24 bpp) con timestamp.
-    - rend: tu Renderer (usa rend.screen como Surface destino).
+    Guarda el framebuffer del render en .bmp (24 bpp) con timestamp.
+    - rend: tu Renderer (se guarda rend.framebuffer, no la ventana).
     - folder: carpeta donde se guardarán las imágenes.
     - prefix: prefijo del nombre del archivo.
     """
     os.makedirs(folder, exist_ok=True)
     ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
     path = os.path.join(folder, f"{prefix}_{ts}.bmp")
-    pygame.image.save(rend.screen, path)
+    GenerateBMP(path, rend.width, rend.height, rend.framebuffer)
     print(f"[OK] Imagen guardada: {path}")
     return path
 
+ENV_MAP_PATH = "Textures/bloem_field_sunrise_24.bmp"
+# > 0: busca el fondo en un cube map precalculado de 6 x N² (sin atan2/acos por rayo)
+ENV_MAP_LUT_SIZE = 0
+
 # -----------------------------------------------------------------
-# MAIN
+# Escena (materiales, esferas y luces)
 # -----------------------------------------------------------------
-def main():
-    width = 800
-    height = 600
-    screen = pygame.display.set_mode((width, height), pygame.SCALED)
-    pygame.display.set_caption("Lab 06 - Opaque, Reflective & Refractive Materials")
-    clock = pygame.time.Clock()
-
-    rend = Renderer(screen)
-    rend.setEnvMap("Textures/bloem_field_sunrise_24.bmp")
+def build_scene(rend, env_map=ENV_MAP_PATH):
+    """Agrega a `rend` la escena del Lab 06; env_map=None deja el fondo liso."""
+    if env_map:
+        rend.setEnvMap(env_map, lut_size=ENV_MAP_LUT_SIZE)
 
     # --------------------------
     # Definición de materiales
@@ -68,6 +67,21 @@ def main():
     rend.lights.append(AmbientLight(intensity=0.2))
     rend.lights.append(DirectionalLight(direction=[-1, -1, -1], intensity=0.8))
 
+# -----------------------------------------------------------------
+# MAIN
+# -----------------------------------------------------------------
+def main():
+    import pygame
+
+    width = 800
+    height = 600
+    screen = pygame.display.set_mode((width, height), pygame.SCALED)
+    pygame.display.set_caption("Lab 06 - Opaque, Reflective & Refractive Materials")
+    clock = pygame.time.Clock()
+
+    rend = Renderer(screen)
+    build_scene(rend)
+
     # --------------------------
     # Render principal
     # --------------------------
@@ -1,4 +1,5 @@
 import math
+import numpy as np
 from MathLib import sub, dot, norm
 from intercept import Intercept
 
@@ -43,3 +44,19 @@ class Sphere(Shape):
 
         return Intercept(point=p, normal=normal, distance=t0,
                          texCoords=texCoords, rayDirection=dir, obj=self)
+
+    def hit_distance_many(self, orig, dirs):
+        """
+        Distancias (N,) de los rayos (orig, dirs[i]) a la esfera, inf si no la
+        tocan; orig es un punto o un array (N, 3). Mismas cuentas que
+        ray_intersect, así la distancia es exactamente la de su Intercept.
+        """
+        L = np.asarray(self.position, dtype=float) - orig
+        L0, L1, L2 = L[..., 0], L[..., 1], L[..., 2]
+        tca = L0*dirs[:, 0] + L1*dirs[:, 1] + L2*dirs[:, 2]
+        d2 = (L0*L0 + L1*L1 + L2*L2) - tca*tca
+        r2 = self.radius*self.radius
+        thc = np.sqrt(np.maximum(r2 - d2, 0.0))
+        t0 = tca - thc
+        t0 = np.where(t0 < 0, tca + thc, t0)
+        return np.where((d2 <= r2) & (t0 >= 0), t0, np.inf)
@@ -1,7 +1,8 @@
-import pygame
+import numpy as np
 from math import atan2, acos, pi, tan, radians
 from BMPTexture import BMPTexture
 from MathLib import norm
+from material import OPAQUE
 
 class Camera:
     def __init__(self, translation=None, fov=60.0):
@@ -9,10 +10,16 @@ class Camera:
         self.fov = float(fov)
 
 class Renderer(object):
-    def __init__(self, screen):
-        # Pygame screen
+    def __init__(self, screen=None, width=None, height=None):
+        # Pygame screen (None = sin ventana: sólo framebuffer, con width y height)
         self.screen = screen
-        self.width, self.height = screen.get_size()
+        if screen is not None:
+            self.width, self.height = screen.get_size()
+        else:
+            self.width, self.height = int(width), int(height)
+
+        # Framebuffer (alto, ancho, 3) en [0,1]; glPresent lo copia a la pantalla
+        self.framebuffer = np.zeros((self.height, self.width, 3), dtype=float)
 
         # Escena y luces
         self.scene = []
@@ -25,9 +32,12 @@ class Renderer(object):
         self.clearColor = [0.0, 0.0, 0.0]
         self.currColor  = [1.0, 1.0, 1.0]
         self.maxRecursionDepth = 3
+        # Rayos secundarios con menos peso que esto no se trazan (ver glTraceRays)
+        self.minRayWeight = 1.0 / 256.0
 
-        # Environment map
+        # Environment map (y su cube map precalculado, ver buildEnvMapLUT)
         self.envMap = None
+        self.envMapLUT = None
 
         # Pre-cálculos de proyección
         self.aspect = self.width / self.height
@@ -40,20 +50,53 @@ class Renderer(object):
         self.currColor = [r, g, b]
 
     def glClear(self):
-        self.screen.fill([int(c * 255) for c in self.clearColor])
+        self.framebuffer[:] = self.clearColor
 
     def glPoint(self, x, y, color=None):
         if 0 <= x < self.width and 0 <= y < self.height:
-            c = color if color is not None else self.currColor
-            r = max(0, min(255, int(c[0] * 255)))
-            g = max(0, min(255, int(c[1] * 255)))
-            b = max(0, min(255, int(c[2] * 255)))
-            self.screen.set_at((x, y), (r, g, b))
+            self.framebuffer[y, x] = color if color is not None else self.currColor
+
+    def glFramebufferBytes(self):
+        """Framebuffer como (alto, ancho, 3) uint8 (mismo redondeo que el viejo glPoint)."""
+        return np.clip(self.framebuffer * 255, 0, 255).astype(np.uint8)
+
+    def glPresent(self):
+        """Copia el framebuffer a la pantalla con un solo blit_array (nada si no hay pantalla)."""
+        if self.screen is None:
+            return
+        import pygame
+        pygame.surfarray.blit_array(self.screen, self.glFramebufferBytes().swapaxes(0, 1))
+        pygame.display.flip()
 
     # Environment Map
-    def setEnvMap(self, bmp_path):
-        """Carga un BMP 24bpp para usar como environment map."""
+    def setEnvMap(self, bmp_path, lut_size=0):
+        """
+        Carga un BMP 24bpp para usar como environment map.
+        lut_size > 0: además precalcula un cube map de 6 x lut_size² (ver buildEnvMapLUT).
+        """
         self.envMap = BMPTexture(bmp_path)
+        self.envMapLUT = None
+        if lut_size:
+            self.buildEnvMapLUT(lut_size)
+
+    def buildEnvMapLUT(self, size=256):
+        """
+        Cube map (6, size, size, 3) con el env map ya muestreado (bilineal) en
+        el centro de cada celda. Con él, glEnvMap y glEnvMapMany buscan el color
+        con el eje dominante y dos divisiones, sin norm, atan2 ni acos.
+        Aproxima el mapeo exacto con celdas de ~90°/size.
+        """
+        c = (np.arange(size) + 0.5) / size * 2.0 - 1.0
+        s, t = np.meshgrid(c, c)
+        faces = []
+        for face in range(6):
+            axis, sign = face // 2, -1.0 if face % 2 else 1.0
+            d = np.empty((size, size, 3))
+            d[..., axis] = sign
+            d[..., (axis + 1) % 3] = s
+            d[..., (axis + 2) % 3] = t
+            faces.append(self._envMapColors(d.reshape(-1, 3), mode="bilinear").reshape(size, size, 3))
+        self.envMapLUT = np.stack(faces)
 
     def glEnvMap(self, orig, dir):
         """
@@ -65,12 +108,61 @@ class Renderer(object):
         if not self.envMap:
             return self.clearColor[:]
 
+        lut = self.envMapLUT
+        if lut is not None:
+            ax, ay, az = abs(dir[0]), abs(dir[1]), abs(dir[2])
+            axis = 0 if ax >= ay and ax >= az else (1 if ay >= az else 2)
+            m = (ax, ay, az)[axis]
+            if m > 0.0:
+                size = lut.shape[1]
+                face = 2 * axis + (dir[axis] < 0)
+                i = min(size - 1, int((dir[(axis + 1) % 3] / m + 1.0) * 0.5 * size))
+                j = min(size - 1, int((dir[(axis + 2) % 3] / m + 1.0) * 0.5 * size))
+                return lut[face, j, i].tolist()
+
         d = norm(dir)
         u = (atan2(d[2], d[0]) / (2.0 * pi)) + 0.5
         v = acos(max(-1.0, min(1.0, -d[1]))) / pi
 
         return self.envMap.getColor(u, 1.0 - v)
 
+    def glEnvMapMany(self, dirs):
+        """
+        Versión por lotes de glEnvMap: colores (N, 3) float32 de las
+        direcciones (N, 3) de todos los rayos que escapan, en una sola llamada.
+        """
+        dirs = np.asarray(dirs, dtype=np.float64).reshape(-1, 3)
+        if not self.envMap:
+            return np.tile(np.asarray(self.clearColor, dtype=np.float32), (len(dirs), 1))
+
+        lut = self.envMapLUT
+        if lut is None:
+            return self._envMapColors(dirs)
+
+        size = lut.shape[1]
+        a = np.abs(dirs)
+        axis = np.where((a[:, 0] >= a[:, 1]) & (a[:, 0] >= a[:, 2]), 0,
+                        np.where(a[:, 1] >= a[:, 2], 1, 2))
+        rows = np.arange(len(dirs))
+        m = a[rows, axis]
+        ok = m > 0.0
+        m = np.where(ok, m, 1.0)
+        face = 2 * axis + (dirs[rows, axis] < 0)
+        i = np.minimum(size - 1, ((dirs[rows, (axis + 1) % 3] / m + 1.0) * 0.5 * size).astype(np.intp))
+        j = np.minimum(size - 1, ((dirs[rows, (axis + 2) % 3] / m + 1.0) * 0.5 * size).astype(np.intp))
+        colors = lut[face, j, i]
+        if not ok.all():
+            colors[~ok] = self._envMapColors(dirs[~ok])
+        return colors
+
+    def _envMapColors(self, dirs, mode="nearest"):
+        """Mapeo equirectangular exacto de glEnvMap para direcciones (N, 3)."""
+        length = np.sqrt(np.einsum("ij,ij->i", dirs, dirs))[:, None]
+        d = dirs / np.where(length == 0.0, 1.0, length)
+        u = np.arctan2(d[:, 2], d[:, 0]) / (2.0 * pi) + 0.5
+        v = np.arccos(np.clip(-d[:, 1], -1.0, 1.0)) / pi
+        return self.envMap.sample(u, 1.0 - v, mode)
+
     # Ray casting
     def glCastRay(self, orig, dir, ignore_obj=None, recursion=0):
         """
@@ -90,6 +182,72 @@ class Renderer(object):
 
         return closest
 
+    def glTraceRays(self, out, slots, origins, dirs, ignore, depth=0, weights=None):
+        """
+        Traza una cola de rayos por generaciones, sin recursión, y suma
+        peso * color de cada rayo en out[slot] (out: array (M, 3)).
+        - origins, dirs: (N, 3); ignore: objeto que cada rayo no debe tocar.
+        - depth: nivel de la generación inicial (como `recursion`).
+        - weights: cuánto aporta cada rayo a su slot (por defecto 1).
+        Cada hit opaco aporta su color local; los reflectivos y transparentes
+        agregan sus rayos a la siguiente generación con el peso multiplicado
+        (GetSecondaryRays). Un rayo con peso < minRayWeight no se traza.
+        Si las figuras tienen hit_distance_many, el hit más cercano de toda la
+        generación se busca por lotes y sólo la figura ganadora arma su
+        Intercept; los rayos que no tocan nada toman el fondo en un solo
+        glEnvMapMany.
+        """
+        weights = np.ones(len(slots)) if weights is None else np.asarray(weights, dtype=float)
+        batched = all(hasattr(obj, "hit_distance_many") for obj in self.scene)
+        column = {id(obj): c for c, obj in enumerate(self.scene)}
+
+        while len(slots):
+            O = np.asarray(origins, dtype=float)
+            D = np.asarray(dirs, dtype=float)
+            if batched:
+                # hit más cercano de toda la generación: distancias (N, figuras)
+                T = np.full((len(D), len(self.scene) + 1), np.inf)
+                for c, obj in enumerate(self.scene):
+                    T[:, c] = obj.hit_distance_many(O, D)
+                # la figura ignorada de cada rayo va a la columna extra (siempre inf)
+                T[np.arange(len(D)), [column.get(id(obj), -1) for obj in ignore]] = np.inf
+                T[T <= 0.0] = np.inf
+                nearest = np.argmin(T, axis=1)
+                mayHit = T[np.arange(len(D)), nearest] < np.inf
+            else:
+                mayHit = np.ones(len(D), dtype=bool)
+
+            misses = np.flatnonzero(~mayHit).tolist()
+            next_rays = ([], [], [], [], [])
+            for k in np.flatnonzero(mayHit).tolist():
+                if batched:
+                    hit = self.scene[nearest[k]].ray_intersect(O[k].tolist(), D[k].tolist())
+                else:
+                    hit = self.glCastRay(O[k].tolist(), D[k].tolist(), ignore[k], depth)
+                if hit is None or not getattr(hit.obj, "material", None):
+                    misses.append(k)
+                    continue
+                if depth > self.maxRecursionDepth:
+                    continue
+
+                material = hit.obj.material
+                if material.matType == OPAQUE:
+                    out[slots[k]] += weights[k] * np.asarray(material.GetLocalColor(hit, self))
+                    continue
+                for childDir, childWeight in material.GetSecondaryRays(hit):
+                    childWeight *= weights[k]
+                    if childWeight >= self.minRayWeight:
+                        for queue, value in zip(next_rays, (slots[k], hit.point, childDir, hit.obj, childWeight)):
+                            queue.append(value)
+
+            if misses:
+                np.add.at(out, np.asarray(slots)[misses],
+                          weights[misses, None] * self.glEnvMapMany(D[misses]))
+
+            slots, origins, dirs, ignore, weights = next_rays
+            weights = np.asarray(weights, dtype=float)
+            depth += 1
+
     # Render principal
     def _primary_ray_dir(self, px, py):
         """
@@ -102,21 +260,29 @@ class Renderer(object):
         z = -1.0
         return norm([x, y, z])
 
+    def _primary_ray_dirs(self):
+        """Direcciones (alto*ancho, 3) de todos los rayos primarios, con las cuentas de _primary_ray_dir."""
+        px = np.tile(np.arange(self.width, dtype=np.float64), self.height)
+        py = np.repeat(np.arange(self.height, dtype=np.float64), self.width)
+        x = (2.0 * (px + 0.5) / self.width  - 1.0) * self.aspect * self.tanHalfFov
+        y = (1.0 - 2.0 * (py + 0.5) / self.height) * self.tanHalfFov
+        z = -1.0
+        l = np.sqrt(x*x + y*y + z*z)
+        return np.stack([x / l, y / l, z / l], axis=-1)
+
     def glRender(self):
         """
-        Recorre cada pixel, lanza un rayo primario, sombrea con materiales
-        y pinta en pantalla. Llama a pygame.display.flip() al final.
+        Lanza un rayo primario por pixel y escribe el color en
+        self.framebuffer; al final lo muestra con glPresent(). Los rayos
+        primarios son la primera generación de glTraceRays: los que no tocan
+        ninguna figura no entran al ciclo por rayo y los reflejos y
+        refracciones se trazan por generaciones, pesados por Fresnel.
         """
-        for y in range(self.height):
-            for x in range(self.width):
-                rayDir = self._primary_ray_dir(x, y)
-                hit = self.glCastRay(self.camera.translation, rayDir)
+        dirs = self._primary_ray_dirs()
+        count = len(dirs)
+        fb = self.framebuffer.reshape(-1, 3)
+        fb[:] = 0.0
+        self.glTraceRays(fb, np.arange(count), np.tile(self.camera.translation, (count, 1)),
+                         dirs, [None] * count)
 
-                if hit is not None and hasattr(hit.obj, "material") and hit.obj.material:
-                    color = hit.obj.material.GetSurfaceColor(hit, self, recursion=0)
-                else:
-                    color = self.glEnvMap(self.camera.translation, rayDir)
-
-                self.glPoint(x, y, color)
-
-        pygame.display.flip()
+        self.glPresent()
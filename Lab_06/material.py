@@ -1,3 +1,5 @@
+import numpy as np
+
 from MathLib import reflectVector
 from refractionFunctions import refractVector, fresnel
 from lights import AmbientLight
@@ -17,69 +19,66 @@ class Material(object):
     def GetSurfaceColor(self, intercept, renderer, recursion=0):
         """
         Calcula el color en el punto de intersección según el material.
-        Usa reflexión, refracción y Fresnel donde corresponda.
+        Los rebotes (reflexión y refracción con Fresnel) se evalúan sin
+        recursión con la cola de rayos de renderer.glTraceRays.
         """
         if recursion > renderer.maxRecursionDepth:
             return [0.0, 0.0, 0.0]
 
+        if self.matType == OPAQUE:
+            return self.GetLocalColor(intercept, renderer)
+
+        rays = self.GetSecondaryRays(intercept)
+        color = np.zeros((1, 3))
+        renderer.glTraceRays(color, [0] * len(rays),
+                             [intercept.point] * len(rays), [d for d, _ in rays],
+                             [intercept.obj] * len(rays), recursion + 1, [w for _, w in rays])
+        return [min(1.0, max(0.0, c)) for c in color[0].tolist()]
+
+    def GetLocalColor(self, intercept, renderer):
+        """Color Phong (ambiente + difusa + especular) de un material opaco."""
         finalColor   = [0.0, 0.0, 0.0]
         lightColor   = [0.0, 0.0, 0.0]
         specColor    = [0.0, 0.0, 0.0]
 
-        if self.matType == OPAQUE:
-            for light in renderer.lights:
-                if isinstance(light, AmbientLight):
-                    lc = light.GetDiffuseColor(intercept, renderer)
-                    for i in range(3):
-                        lightColor[i] += lc[i]
-                else:
-                    lc = light.GetDiffuseColor(intercept, renderer)
-                    sc = light.GetSpecularColor(intercept, renderer.camera.translation, self.spec)
-                    for i in range(3):
-                        lightColor[i] += lc[i]
-                        specColor[i]  += sc[i] * self.ks
+        for light in renderer.lights:
+            if isinstance(light, AmbientLight):
+                lc = light.GetDiffuseColor(intercept, renderer)
+                for i in range(3):
+                    lightColor[i] += lc[i]
+            else:
+                lc = light.GetDiffuseColor(intercept, renderer)
+                sc = light.GetSpecularColor(intercept, renderer.camera.translation, self.spec)
+                for i in range(3):
+                    lightColor[i] += lc[i]
+                    specColor[i]  += sc[i] * self.ks
 
-            for i in range(3):
-                finalColor[i] = self.diffuse[i] * lightColor[i] + specColor[i]
+        for i in range(3):
+            finalColor[i] = self.diffuse[i] * lightColor[i] + specColor[i]
 
-        elif self.matType == REFLECTIVE:
-            reflectDir = reflectVector(intercept.normal, intercept.rayDirection)
-            hit = renderer.glCastRay(intercept.point, reflectDir, intercept.obj, recursion+1)
-            if hit:
-                reflectColor = hit.obj.material.GetSurfaceColor(hit, renderer, recursion+1)
-            else:
-                reflectColor = renderer.glEnvMap(intercept.point, reflectDir)
+        finalColor = [min(1.0, max(0.0, c)) for c in finalColor]
+        return finalColor
 
-            finalColor = reflectColor
+    def GetSecondaryRays(self, intercept):
+        """
+        Rayos que salen del punto: lista de (dirección, peso). El color del
+        punto es la suma de peso * color de cada rayo.
+        - REFLECTIVE: el reflejo con peso 1.
+        - TRANSPARENT: reflejo con peso kr (Fresnel) y refracción con 1 - kr
+          (sin refracción en reflexión interna total).
+        - OPAQUE: ninguno (ver GetLocalColor).
+        """
+        if self.matType == REFLECTIVE:
+            return [(reflectVector(intercept.normal, intercept.rayDirection), 1.0)]
 
-        elif self.matType == TRANSPARENT:
+        if self.matType == TRANSPARENT:
             I = intercept.rayDirection
             N = intercept.normal
-
-            # Cálculo del reflejo
-            reflectDir = reflectVector(N, I)
-            hit = renderer.glCastRay(intercept.point, reflectDir, intercept.obj, recursion+1)
-            if hit:
-                reflectColor = hit.obj.material.GetSurfaceColor(hit, renderer, recursion+1)
-            else:
-                reflectColor = renderer.glEnvMap(intercept.point, reflectDir)
-
-            # Cálculo de refracción
+            kr = fresnel(N, I, self.ior)
+            rays = [(reflectVector(N, I), kr)]
             refractDir = refractVector(I, N, self.ior)
             if refractDir is not None:
-                hit2 = renderer.glCastRay(intercept.point, refractDir, intercept.obj, recursion+1)
-                if hit2:
-                    refractColor = hit2.obj.material.GetSurfaceColor(hit2, renderer, recursion+1)
-                else:
-                    refractColor = renderer.glEnvMap(intercept.point, refractDir)
-            else:
-                refractColor = [0.0, 0.0, 0.0]
-
-            kr = fresnel(N, I, self.ior)
-            finalColor = [
-                reflectColor[i] * kr + refractColor[i] * (1 - kr)
-                for i in range(3)
-            ]
+                rays.append((refractDir, 1 - kr))
+            return rays
 
-        finalColor = [min(1.0, max(0.0, c)) for c in finalColor]
-        return finalColor
+        return []
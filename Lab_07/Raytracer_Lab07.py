@@ -6,17 +6,16 @@ from Textures.lights import AmbientLight, DirectionalLight, PointLight
 from Textures.figures import Plane, Disk, Triangle, Cube
 from Textures.MathLib import normalize
 
-def main():
-    width = 800
-    height = 600
-    
+def build_scene(width=800, height=600):
+    """Arma el Raytracer con la escena, cámara y luces del Lab 07 (sin renderizar)."""
     # Configuración para mejor calidad de sombras e iluminación
     rt = Raytracer(width, height, 
                    samples_per_pixel=6,     
                    enable_ao=True,          
                    ao_samples=12,           
                    ao_distance=3.0,         
-                   max_depth=4)             
+                   max_depth=4,
+                   adaptive=True)           # muestras extra sólo en bordes/contraste
 
     rt.eye = np.array([2.5, 2.8, 4.2], dtype=np.float32)
     rt.target = np.array([0, -0.2, -0.5], dtype=np.float32)
@@ -107,6 +106,10 @@ def main():
     ]
 
     rt.backgroundColor = np.array([0.08, 0.08, 0.08], dtype=np.float32)
+    return rt
+
+def main():
+    rt = build_scene(800, 600)
 
     print("Renderizando...")
     rt.render()
@@ -3,9 +3,11 @@ from .MathLib import vec3, normalize, dot, clamp01, EPS, faceforward
 from .intercept import Intercept
 from .material import MAT_DIFFUSE
 from .lights import AmbientLight, DirectionalLight, PointLight
+from .sampling import Sampler
 
 class Raytracer(object):
-    def __init__(self, width, height, samples_per_pixel=4, enable_ao=True, ao_samples=8, ao_distance=1.0, max_depth=3):
+    def __init__(self, width, height, samples_per_pixel=4, enable_ao=True, ao_samples=8, ao_distance=1.0, max_depth=3,
+                 adaptive=False, aa_threshold=0.06, aa_budget=None, sampler="stratified", seed=0):
         self.width  = int(width)
         self.height = int(height)
         self.clearColor = np.array([0.0, 0.0, 0.0], dtype=np.float32)
@@ -28,7 +30,26 @@ class Raytracer(object):
         self.ao_samples = int(max(1, ao_samples))
         self.ao_distance = float(ao_distance)
         self.max_depth = int(max_depth)
-        self._rng = np.random.default_rng()
+
+        # Jitter y AO salen de Textures/sampling.py: deterministas por semilla,
+        # pixel y muestra (la misma imagen en cada corrida)
+        self.sampler = str(sampler)
+        self.seed = int(seed)
+        self._sampler = None
+        self._ao_pixel = None
+        self._ao_table = None
+        self._sample_index = 0
+        self._ao_calls = 0
+
+        # Antialiasing adaptativo: samples_per_pixel pasa a ser el máximo por pixel
+        self.adaptive = bool(adaptive)
+        self.aa_threshold = float(aa_threshold)
+        self.aa_normal_cos = 0.95
+        self.aa_budget = aa_budget
+        self.samples_taken = 0
+
+        # Cámara precalculada (ver _update_camera)
+        self._camera_key = None
 
     def _build_camera_basis(self):
         f = normalize(self.target - self.eye)  
@@ -36,16 +57,40 @@ class Raytracer(object):
         u = np.cross(r, f)                    
         return f, r, u
 
-    def _ray_from_camera(self, x, y):
+    def _update_camera(self):
+        """
+        Base de la cámara, punto del plano de proyección de cada pixel (H,W,3),
+        direcciones de los centros y generador de muestras. Se rehace sólo si
+        cambian eye, target, up, fov, la resolución o el sampler.
+        """
+        key = (np.asarray(self.eye, dtype=np.float32).tobytes(),
+               np.asarray(self.target, dtype=np.float32).tobytes(),
+               np.asarray(self.up, dtype=np.float32).tobytes(),
+               float(self.fov), self.width, self.height, self.sampler, self.seed)
+        if key == self._camera_key:
+            return
+
         f, r, u = self._build_camera_basis()
         aspect = self.width / self.height
         angle = np.tan(np.deg2rad(self.fov * 0.5))
-        px = (2 * ((x + 0.5) / self.width)  - 1) * angle * aspect
-        py = (1 - 2 * ((y + 0.5) / self.height)) * angle
+        px = (2 * ((np.arange(self.width) + 0.5) / self.width) - 1) * angle * aspect
+        py = (1 - 2 * ((np.arange(self.height) + 0.5) / self.height)) * angle
 
-        # Direccion en espacio de la cámara
-        dir_cam = normalize(px * r + py * u + f)
-        return self.eye, dir_cam
+        self._camera_plane = px[None, :, None] * r + py[:, None, None] * u + f
+        norm = np.linalg.norm(self._camera_plane, axis=-1, keepdims=True)
+        self._ray_grid = (self._camera_plane / norm).astype(np.float32)
+        # desplazar la muestra (dx, dy) píxeles mueve el punto del plano en dx*du + dy*dv
+        self._du = r * (2.0 * angle * aspect / self.width)
+        self._dv = u * (-2.0 * angle / self.height)
+        self._sampler = Sampler(self.sampler, self.seed, self.width)
+        self._ao_pixel = None
+        self._camera_key = key
+
+    def _pixel_ray(self, x, y, dx=0.0, dy=0.0):
+        """Rayo por el pixel (x, y) desplazado (dx, dy) del centro, desde la rejilla precalculada."""
+        if dx == 0.0 and dy == 0.0:
+            return self.eye, self._ray_grid[y, x]
+        return self.eye, normalize(self._camera_plane[y, x] + dx * self._du + dy * self._dv)
 
     def add_object(self, obj):
         self.scene.append(obj)
@@ -63,33 +108,68 @@ class Raytracer(object):
                 best = hit
         return best
 
-    def _hemisphere_sample(self, N):
-        u1 = self._rng.random()
-        u2 = self._rng.random()
+    def _begin_sample(self, x, y, s):
+        """
+        Fija el pixel y la muestra de los que salen las direcciones de AO.
+        La tabla del pixel (max_depth + 1 hits x samples_per_pixel x ao_samples
+        puntos) se genera de una vez al cambiar de pixel.
+        """
+        pixel = y * self.width + x
+        if self.enable_ao and pixel != self._ao_pixel:
+            n = self.ao_samples * self.samples_per_pixel
+            hits = np.arange(1, self.max_depth + 2)[:, None]
+            self._ao_table = self._sampler.points(pixel, np.arange(n)[None, :], hits, n)
+            self._ao_pixel = pixel
+        self._sample_index = s
+        self._ao_calls = 0
+
+    def _jitter(self, x, y, samples, count=None):
+        """
+        Desplazamientos (dx, dy) en [-0.5, 0.5) del pixel (x, y) para las
+        muestras dadas, estratificadas sobre `count` (por defecto samples_per_pixel).
+        """
+        samples = np.asarray(samples)
+        pixels = np.full(samples.shape, y * self.width + x)
+        return self._sampler.points(pixels, samples, 0, count or self.samples_per_pixel) - 0.5
+
+    def _hemisphere_samples(self, N, xi):
+        """Direcciones (K,3) con distribución coseno alrededor de N; la base tangente se arma una vez."""
+        u1, u2 = xi[:, 0], xi[:, 1]
         r = np.sqrt(u1)
         theta = 2 * np.pi * u2
-        x = r * np.cos(theta)
-        y = r * np.sin(theta)
-        z = np.sqrt(max(0.0, 1.0 - u1))
+        x = (r * np.cos(theta))[:, None]
+        y = (r * np.sin(theta))[:, None]
+        z = np.sqrt(np.maximum(0.0, 1.0 - u1))[:, None]
         if abs(N[0]) > abs(N[1]):
             tangent = np.array([N[2], 0, -N[0]], dtype=np.float32)
         else:
             tangent = np.array([0, -N[2], N[1]], dtype=np.float32)
         tangent = tangent / np.linalg.norm(tangent)
         bitangent = np.cross(N, tangent)
-        sample = x * tangent + y * bitangent + z * N
-        return sample / np.linalg.norm(sample)
+        samples = x * tangent + y * bitangent + z * N
+        return samples / np.linalg.norm(samples, axis=1, keepdims=True)
+
+    def _occluded(self, O, D, max_dist):
+        """Any-hit: True en cuanto una figura corta el rayo antes de max_dist (sin buscar la más cercana)."""
+        for obj in self.scene:
+            hit = obj.ray_intersect(O, D)
+            if hit is not None and hit.distance < max_dist:
+                return True
+        return False
 
     def _ambient_occlusion(self, inter):
         if not self.enable_ao:
             return 1.0
         N = inter.normal
         P = inter.point + N * 1e-3
+        # cada hit de la muestra (primario, rebotes) usa otra fila de la tabla
+        ao = self.ao_samples
+        row = min(self._ao_calls, len(self._ao_table) - 1)
+        xi = self._ao_table[row, self._sample_index * ao:(self._sample_index + 1) * ao]
+        self._ao_calls += 1
         hits = 0
-        for _ in range(self.ao_samples):
-            dir_ao = self._hemisphere_sample(N)
-            hit = self._closest_intersection(P, dir_ao)
-            if hit is not None and hit.distance < self.ao_distance:
+        for dir_ao in self._hemisphere_samples(N, xi):
+            if self._occluded(P, dir_ao, self.ao_distance):
                 hits += 1
         occ = hits / float(self.ao_samples)
         return max(0.0, 1.0 - occ * 0.7)
@@ -104,10 +184,7 @@ class Raytracer(object):
             L = normalize(-light.direction)
             maxDist = float("inf")
         shadowOrig = point + N * 1e-3
-        t_hit = self._closest_intersection(shadowOrig, L)
-        if t_hit is None:
-            return False
-        return t_hit.distance < maxDist
+        return self._occluded(shadowOrig, L, maxDist)
 
     #  Shading
     def _shade(self, inter, rayDir):
@@ -145,7 +222,9 @@ class Raytracer(object):
         inter = self._closest_intersection(O, D)
         if inter is None:
             return self.backgroundColor
+        return self._shade_hit(inter, O, D, depth)
 
+    def _shade_hit(self, inter, O, D, depth):
         # Sombra y shading local
         inter.normal = normalize(inter.normal)
         local_color = self._shade(inter, D)
@@ -168,6 +247,11 @@ class Raytracer(object):
         self.framebuffer[:] = self.clearColor
 
     def render(self):
+        if self.adaptive:
+            return self.render_adaptive()
+
+        self._update_camera()
+        spp = self.samples_per_pixel
         total = self.height
         for y in range(self.height):
             # progreso cada 10%
@@ -177,12 +261,10 @@ class Raytracer(object):
 
             for x in range(self.width):
                 accum = np.zeros(3, dtype=np.float32)
-                for s in range(self.samples_per_pixel):
-                    rx = (self._rng.random() - 0.5)
-                    ry = (self._rng.random() - 0.5)
-                    sx = float(x) + 0.5 + rx
-                    sy = float(y) + 0.5 + ry
-                    O, D = self._ray_from_camera(sx, sy)
+                jitter = self._jitter(x, y, np.arange(spp))
+                for s in range(spp):
+                    self._begin_sample(x, y, s)
+                    O, D = self._pixel_ray(x, y, jitter[s, 0], jitter[s, 1])
                     # Usar trazado recursivo para permitir reflexiones
                     col = self._trace_ray(O, D, depth=0)
                     accum += col
@@ -190,3 +272,112 @@ class Raytracer(object):
                 gamma = 1.0 / 2.2
                 color = np.clip(np.power(color, gamma), 0.0, 1.0)
                 self.framebuffer[y, x] = color
+
+    # Antialiasing adaptativo
+    def _sample(self, x, y, sample=None, count=None, ids=None):
+        """
+        Una muestra del pixel (x, y): (color lineal, id de objeto, normal).
+        sample=None: centro del pixel; si no, la muestra `sample` (0..count-1)
+        de un conjunto estratificado de `count` muestras extra.
+        ids: {id(figura): índice en la escena} (se arma si no se pasa).
+        """
+        # el AO del centro usa la fila 0 de la tabla; la muestra extra s, la fila s + 1
+        self._begin_sample(x, y, 0 if sample is None else sample + 1)
+        if sample is not None:
+            dx, dy = self._jitter(x, y, sample, count)
+            O, D = self._pixel_ray(x, y, dx, dy)
+        else:
+            O, D = self._pixel_ray(x, y)
+
+        inter = self._closest_intersection(O, D)
+        if inter is None:
+            return self.backgroundColor, -1, None
+        inter.normal = normalize(inter.normal)
+        if ids is None:
+            ids = self._object_ids()
+        obj_id = ids.get(id(inter.obj), -1)
+        return self._shade_hit(inter, O, D, 0), obj_id, inter.normal
+
+    def _object_ids(self):
+        """{id(figura): índice en la escena}, para identificar el objeto de cada hit."""
+        return {id(obj): i for i, obj in enumerate(self.scene)}
+
+    def _edge_score(self, image, ids, normals):
+        """
+        Puntaje por pixel (0 = plano): contraste de color con sus vecinos y
+        +inf donde cambia el objeto o la normal (bordes geométricos).
+        """
+        score = np.zeros(ids.shape, dtype=np.float32)
+
+        for axis in (0, 1):
+            a = [slice(None), slice(None)]
+            b = [slice(None), slice(None)]
+            a[axis] = slice(None, -1)
+            b[axis] = slice(1, None)
+            a, b = tuple(a), tuple(b)
+
+            diff = np.abs(image[a] - image[b]).max(axis=-1)
+            diff[ids[a] != ids[b]] = np.inf
+            cos = (normals[a] * normals[b]).sum(axis=-1)
+            both_hit = (ids[a] >= 0) & (ids[b] >= 0)
+            diff[both_hit & (cos < self.aa_normal_cos)] = np.inf
+
+            # el borde marca a los dos píxeles que lo comparten
+            score[a] = np.maximum(score[a], diff)
+            score[b] = np.maximum(score[b], diff)
+        return score
+
+    def render_adaptive(self):
+        """
+        Antialiasing adaptativo:
+        1. una muestra (centrada) por pixel, guardando id de objeto y normal;
+        2. se marcan los píxeles con contraste > aa_threshold o con cambio de
+           objeto/normal respecto a sus vecinos;
+        3. sólo esos reciben muestras extra (hasta samples_per_pixel en total),
+           en orden de contraste y sin pasar de aa_budget muestras extra.
+        """
+        self._update_camera()
+        h, w = self.height, self.width
+        accum = np.zeros((h, w, 3), dtype=np.float32)
+        ids = np.full((h, w), -1, dtype=np.int32)
+        normals = np.zeros((h, w, 3), dtype=np.float32)
+        object_ids = self._object_ids()
+
+        for y in range(h):
+            if y % max(1, int(h/10)) == 0:
+                print(f"Render progress: {int(50.0 * y / h)}%")
+            for x in range(w):
+                col, obj_id, n = self._sample(x, y, ids=object_ids)
+                accum[y, x] = col
+                ids[y, x] = obj_id
+                if n is not None:
+                    normals[y, x] = n
+
+        gamma = 1.0 / 2.2
+        first = np.clip(np.power(np.clip(accum, 0.0, None), gamma), 0.0, 1.0)
+        score = self._edge_score(first, ids, normals)
+
+        extra = self.samples_per_pixel - 1
+        ys, xs = np.nonzero(score > self.aa_threshold)
+        order = np.argsort(-score[ys, xs], kind="stable")
+        if self.aa_budget is not None and extra > 0:
+            order = order[:max(0, int(self.aa_budget)) // extra]
+
+        counts = np.ones((h, w), dtype=np.int32)
+        for k, i in enumerate(order):
+            if k % max(1, len(order) // 10) == 0:
+                print(f"Render progress: {50 + int(50.0 * k / len(order))}%")
+            y, x = int(ys[i]), int(xs[i])
+            # conjunto estratificado propio de `extra` muestras: cubre todo el pixel
+            for s in range(extra):
+                accum[y, x] += self._sample(x, y, s, count=extra, ids=object_ids)[0]
+            counts[y, x] += extra
+
+        color = accum / counts[..., None]
+        self.framebuffer[:] = np.clip(np.power(np.clip(color, 0.0, None), gamma), 0.0, 1.0)
+
+        self.samples_taken = int(counts.sum())
+        print(f"Muestras: {self.samples_taken} "
+              f"({self.samples_taken / float(w * h):.2f} por pixel, "
+              f"{len(order)} píxeles refinados)")
+
@@ -0,0 +1,195 @@
+import numpy as np
+
+# Generador de muestras en lote, determinista por semilla y por pixel.
+#
+# Cada valor depende sólo de (semilla, pixel, índice de la muestra, dimensión),
+# no del orden en que se piden: el render por tiles, el progresivo y el
+# paralelo obtienen exactamente las mismas muestras.
+#
+# Tipos (Sampler.kind):
+# - "random":     ruido blanco (hash del pixel, índice y dimensión).
+# - "stratified": n-rooks; cada punto del conjunto cae en su propia franja de
+#                 cada eje, con jitter dentro de ella.
+# - "halton":     secuencia de Halton (bases 2 y 3) con una rotación aleatoria
+#                 por pixel (Cranley-Patterson).
+# - "bluenoise":  máscara de ruido azul 64x64 (void-and-cluster) desplazada
+#                 por dimensión y avanzada por índice con la secuencia R2.
+KINDS = ("random", "stratified", "halton", "bluenoise")
+
+BLUE_NOISE_SIZE = 64
+
+# Constantes de la secuencia R2 (razón plástica): avance por muestra en ruido azul
+_R2 = (0.7548776662466927, 0.5698402909980532)
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_M1 = np.uint64(0xBF58476D1CE4E5B9)
+_M2 = np.uint64(0x94D049BB133111EB)
+
+
+# Hash entero (splitmix64) sobre arrays uint64
+def _mix(x):
+    with np.errstate(over="ignore"):
+        x = (x ^ (x >> np.uint64(30))) * _M1
+        x = (x ^ (x >> np.uint64(27))) * _M2
+    return x ^ (x >> np.uint64(31))
+
+
+def hash_keys(*keys):
+    """Hash uint64 de varias claves enteras (escalares o arrays que hacen broadcasting)."""
+    h = np.zeros((), dtype=np.uint64)
+    for k in keys:
+        k = np.asarray(k).astype(np.int64).view(np.uint64)
+        with np.errstate(over="ignore"):
+            h = _mix(h ^ (k + _GOLDEN))
+    return h
+
+
+def uniform(*keys):
+    """Uniformes en [0,1) (float64) a partir de un hash de las claves."""
+    return (hash_keys(*keys) >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+
+def radical_inverse(index, base):
+    """Inverso radical de enteros (array) en la base dada: un eje de la secuencia de Halton."""
+    index = np.asarray(index, dtype=np.int64).copy()
+    result = np.zeros(index.shape, dtype=np.float64)
+    scale = 1.0 / base
+    while np.any(index > 0):
+        result += (index % base) * scale
+        index //= base
+        scale /= base
+    return result
+
+
+def n_rooks_step(count):
+    """Paso coprimo con count (~sqrt(count)): permuta las franjas del segundo eje."""
+    step = max(1, int(round(np.sqrt(count))))
+    while np.gcd(step, count) != 1:
+        step += 1
+    return step
+
+
+# Ruido azul
+_blue_noise = None
+
+
+def blue_noise(size=BLUE_NOISE_SIZE, sigma=1.9, seed=7):
+    """
+    Máscara de ruido azul (size x size) con valores en [0,1): rango de cada
+    pixel en el orden de void-and-cluster (Ulichney), con energía gaussiana
+    toroidal. Se calcula una vez y queda guardada.
+    """
+    global _blue_noise
+    if _blue_noise is not None and _blue_noise.shape == (size, size):
+        return _blue_noise
+
+    n = size * size
+    d = np.minimum(np.arange(size), size - np.arange(size))
+    kernel = np.exp(-(d[:, None] ** 2 + d[None, :] ** 2) / (2.0 * sigma * sigma))
+
+    def splat(energy, i, sign):
+        y, x = divmod(int(i), size)
+        energy += sign * np.roll(np.roll(kernel, y, axis=0), x, axis=1).ravel()
+
+    # patrón inicial: ~10% de puntos al azar, redistribuidos hasta que el
+    # cluster más apretado coincida con el hueco más grande
+    rng = np.random.default_rng(seed)
+    ones = np.zeros(n, dtype=bool)
+    ones[rng.choice(n, n // 10, replace=False)] = True
+    energy = np.zeros(n)
+    for i in np.flatnonzero(ones):
+        splat(energy, i, 1.0)
+    while True:
+        cluster = np.flatnonzero(ones)[np.argmax(energy[ones])]
+        ones[cluster] = False
+        splat(energy, cluster, -1.0)
+        void = np.flatnonzero(~ones)[np.argmin(energy[~ones])]
+        if void == cluster:
+            ones[cluster] = True
+            splat(energy, cluster, 1.0)
+            break
+        ones[void] = True
+        splat(energy, void, 1.0)
+
+    rank = np.zeros(n, dtype=np.int64)
+    initial = ones.copy()
+    initial_energy = energy.copy()
+
+    # fase 1: quitar clusters (rangos descendentes del patrón inicial)
+    count = int(ones.sum())
+    while count > 0:
+        cluster = np.flatnonzero(ones)[np.argmax(energy[ones])]
+        ones[cluster] = False
+        splat(energy, cluster, -1.0)
+        count -= 1
+        rank[cluster] = count
+
+    # fases 2 y 3: llenar huecos (rangos ascendentes)
+    ones, energy = initial, initial_energy
+    count = int(ones.sum())
+    while count < n:
+        free = np.flatnonzero(~ones)
+        void = free[np.argmin(energy[free])]
+        ones[void] = True
+        splat(energy, void, 1.0)
+        rank[void] = count
+        count += 1
+
+    _blue_noise = ((rank + 0.5) / n).reshape(size, size)
+    return _blue_noise
+
+
+class Sampler:
+    """
+    Puntos 2D en [0,1)^2 por pixel, pedidos en lote.
+
+    points(pixels, index, dim, count):
+    - pixels: índices planos y * width + x (array)
+    - index: índice del punto dentro de su conjunto (escalar o array), 0..count-1
+    - dim: dimensión (entera, escalar o array) del par: 0 = jitter de cámara, otras = AO, etc.
+    - count: tamaño del conjunto (para estratificar)
+    Retorna (N, 2) float64.
+    """
+
+    def __init__(self, kind="stratified", seed=0, width=1):
+        if kind not in KINDS:
+            raise ValueError(f"sampler desconocido: {kind!r} (opciones: {', '.join(KINDS)})")
+        self.kind = kind
+        self.seed = int(seed)
+        self.width = max(1, int(width))
+
+    def points(self, pixels, index, dim, count):
+        pixels, index, dim = np.broadcast_arrays(np.asarray(pixels, dtype=np.int64),
+                                                 np.asarray(index, dtype=np.int64),
+                                                 np.asarray(dim, dtype=np.int64))
+        count = max(1, int(count))
+        seed = self.seed
+
+        if self.kind == "random":
+            x = uniform(seed, pixels, index, dim, 0)
+            y = uniform(seed, pixels, index, dim, 1)
+
+        elif self.kind == "stratified":
+            # franja `index` en x y una permutación (rotada por pixel) en y
+            shift = hash_keys(seed, pixels, dim, 2) % np.uint64(count)
+            row = (index * n_rooks_step(count) + shift.astype(np.int64)) % count
+            x = (index % count + uniform(seed, pixels, index, dim, 0)) / count
+            y = (row + uniform(seed, pixels, index, dim, 1)) / count
+
+        elif self.kind == "halton":
+            x = (radical_inverse(index, 2) + uniform(seed, pixels, dim, 0)) % 1.0
+            y = (radical_inverse(index, 3) + uniform(seed, pixels, dim, 1)) % 1.0
+
+        else:  # bluenoise
+            noise = blue_noise()
+            size = noise.shape[0]
+            px, py = pixels % self.width, pixels // self.width
+            out = []
+            for axis in (0, 1):
+                ox, oy = ((hash_keys(seed, dim, axis, k) % np.uint64(size)).astype(np.int64)
+                          for k in (0, 1))
+                b = noise[(py + oy) % size, (px + ox) % size]
+                out.append((b + index * _R2[axis]) % 1.0)
+            x, y = out
+
+        return np.stack([x, y], axis=-1)
@@ -1,42 +1,70 @@
 import struct
 
-def save(filename, width, height, framebuffer):
+import numpy as np
+
+HEADER_SIZE = 14 + 40
+
+
+def _header(width, height, image_size):
+    """File header + BITMAPINFOHEADER (54 bytes) para un BMP de 24 bits."""
+    return b''.join((
+        b'BM',                                      # signature
+        struct.pack("<I", HEADER_SIZE + image_size),
+        struct.pack("<HH", 0, 0),
+        struct.pack("<I", HEADER_SIZE),
+        # Info header (BITMAPINFOHEADER)
+        struct.pack("<I", 40),
+        struct.pack("<i", width),
+        struct.pack("<i", height),
+        struct.pack("<H", 1),
+        struct.pack("<H", 24),
+        struct.pack("<I", 0),
+        struct.pack("<I", image_size),
+        struct.pack("<i", 0),
+        struct.pack("<i", 0),
+        struct.pack("<I", 0),
+        struct.pack("<I", 0),
+    ))
+
+
+def _to_bgr_rows(width, height, framebuffer, out):
+    """
+    Escribe en `out` (height, row_size) uint8 las filas del BMP:
+    BGR, de abajo hacia arriba, con el padding de cada fila en 0.
+    """
+    fb = np.asarray(framebuffer)[:height, :width, :3]
+    # mismo redondeo que antes: int(clamp(c) * 255) trunca
+    rgb = (np.clip(fb, 0.0, 1.0) * 255).astype(np.uint8)
+    pixels = out[:, :width * 3].reshape(height, width, 3)
+    pixels[:] = rgb[::-1, :, ::-1]                  # invertimos filas y RGB -> BGR
+    out[:, width * 3:] = 0
+
+
+def save(filename, width, height, framebuffer, memmap=False):
     """
     Guarda un framebuffer en formato BMP (24 bits).
     - filename: ruta donde se guardará el archivo .bmp
     - width, height: dimensiones de la imagen
     - framebuffer: numpy array de shape (height, width, 3), valores [0,1]
+    - memmap: escribe los píxeles directo a un archivo mapeado en memoria
+      (útil para imágenes muy grandes; evita armar el archivo en RAM)
     """
+    # cada fila del BMP ocupa un múltiplo de 4 bytes
+    row_size = (width * 3 + 3) & ~3
+    image_size = row_size * height
+    header = _header(width, height, image_size)
 
-    with open(filename, "wb") as f:
+    if memmap:
+        data = np.memmap(filename, dtype=np.uint8, mode="w+",
+                         shape=(HEADER_SIZE + image_size,))
+        data[:HEADER_SIZE] = np.frombuffer(header, dtype=np.uint8)
+        _to_bgr_rows(width, height, framebuffer,
+                     data[HEADER_SIZE:].reshape(height, row_size))
+        data.flush()
+        del data
+        return
 
-        f.write(b'BM')  # signature
-        filesize = 14 + 40 + (width * height * 3)
-        f.write(struct.pack("<I", filesize))   
-        f.write(struct.pack("<HH", 0, 0))     
-        f.write(struct.pack("<I", 54))       
-
-        # Info header (BITMAPINFOHEADER)
-        f.write(struct.pack("<I", 40))         
-        f.write(struct.pack("<i", width))      
-        f.write(struct.pack("<i", height))   
-        f.write(struct.pack("<H", 1))         
-        f.write(struct.pack("<H", 24))       
-        f.write(struct.pack("<I", 0))         
-        f.write(struct.pack("<I", width * height * 3))  
-        f.write(struct.pack("<i", 0))        
-        f.write(struct.pack("<i", 0))        
-        f.write(struct.pack("<I", 0))        
-        f.write(struct.pack("<I", 0))         
-
-        #  Data 
-        # BMP espera píxeles en orden BGR y de abajo hacia arriba
-        for y in range(height):
-            for x in range(width):
-                r, g, b = framebuffer[height - 1 - y, x]  # invertimos filas
-                r = int(max(0, min(1, r)) * 255)
-                g = int(max(0, min(1, g)) * 255)
-                b = int(max(0, min(1, b)) * 255)
-                f.write(struct.pack("B", b))
-                f.write(struct.pack("B", g))
-                f.write(struct.pack("B", r))
+    rows = np.empty((height, row_size), dtype=np.uint8)
+    _to_bgr_rows(width, height, framebuffer, rows)
+    with open(filename, "wb") as f:
+        f.write(header + rows.tobytes())
@@ -1,10 +1,9 @@
 import os
-import pygame
-from pygame.locals import *
 import numpy as np
 
 from BMP.BMP_Writer import save as save_bmp
 from Textures.gl import Raytracer
+from Textures.cache import RenderCache
 from Textures.MathLib import normalize
 from Textures.material import Material, MAT_DIFFUSE, MAT_REFLECTIVE
 from Textures.lights import AmbientLight, DirectionalLight, PointLight
@@ -15,6 +14,15 @@ FAST_PREVIEW = True
 WIDTH, HEIGHT = (800, 600) if FAST_PREVIEW else (512, 512)
 WINDOW_TITLE  = "Lab 08"
 OUTPUT_PATH   = os.path.join("renders", "Lab08_room_plus_centered.bmp")
+RENDER_MODE   = "progressive" # "wavefront" = por lotes, "scalar" = pixel por pixel (referencia), "parallel" = multiproceso,
+                              # "gbuffer" = wavefront + G-buffer (si sólo cambian las luces, se re-ilumina sin re-trazar)
+
+# Caché de renders: un render idéntico se carga de disco; con "wavefront" sólo se
+# re-renderizan los tiles que tocan las figuras que cambiaron
+USE_CACHE    = True
+CACHE_DIR    = os.path.join("renders", ".cache")
+CACHE_MAX_MB = 256
+GBUFFER_PATH = os.path.join(CACHE_DIR, "Lab08_gbuffer.npz")   # con RENDER_MODE = "gbuffer"
 
 #  Cámara 
 CAMERA_POS = np.array([0.0, 1.2, 4.0], dtype=np.float32) 
@@ -55,6 +63,10 @@ def make_checker_floor_to_wall(rt,
     top_z = max(z_back, z_front)
     step_z = (top_z - bot_z) / nz
 
+    # dos materiales compartidos por todas las casillas
+    matA = Material(color=colA, kd=0.78, ks=ks, shininess=shiny, mtype=MAT_REFLECTIVE)
+    matB = Material(color=colB, kd=0.78, ks=ks, shininess=shiny, mtype=MAT_REFLECTIVE)
+
     for ix in range(nx):
         for iz in range(nz):
             x0 = -halfx + ix * tile_x
@@ -65,8 +77,7 @@ def make_checker_floor_to_wall(rt,
             x0 -= expand_eps; x1 += expand_eps
             z0 -= expand_eps; z1 += expand_eps
 
-            color = colA if (ix + iz) % 2 == 0 else colB
-            mat = Material(color=color, kd=0.78, ks=ks, shininess=shiny, mtype=MAT_REFLECTIVE)
+            mat = matA if (ix + iz) % 2 == 0 else matB
 
             rt.scene.append(Cube(min_point=(x0, y0, z0), max_point=(x1, y1, z1), material=mat))
 
@@ -126,13 +137,9 @@ def setup_lights(rt):
         DirectionalLight(direction=normalize([-0.4, -1.0, -0.2]), intensity=0.35),
     ]
 
-def main():
-    pygame.init()
-    screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.SCALED)
-    pygame.display.set_caption(WINDOW_TITLE)
-    clock = pygame.time.Clock()
-
-    rt = Raytracer(WIDTH, HEIGHT)
+def build_scene(width, height, **options):
+    """Raytracer con el cuarto, objetos y luces del Lab 08 (sin renderizar)."""
+    rt = Raytracer(width, height, **options)
     rt.eye = CAMERA_POS
     rt.fov = FOV_DEG
     rt.backgroundColor = np.array([0.94, 0.95, 0.97], dtype=np.float32)
@@ -140,30 +147,80 @@ def main():
     build_room_and_floor(rt)
     add_objects(rt)
     setup_lights(rt)
+    return rt
+
+# Visor: pygame se importa recién aquí, así importar este módulo (build_scene,
+# benchmarks, cli.py) no carga ni inicializa pygame
+def show_framebuffer(screen, framebuffer):
+    import pygame
+    img = (np.clip(framebuffer, 0, 1) * 255).astype(np.uint8)
+    if img.shape[0] == HEIGHT and img.shape[1] == WIDTH:
+        img = np.transpose(img, (1, 0, 2))
+    surf = pygame.surfarray.make_surface(img)
+    screen.blit(surf, (0, 0))
+    pygame.display.flip()
+
+def quit_requested():
+    import pygame
+    for e in pygame.event.get():
+        if e.type == pygame.QUIT or (e.type == pygame.KEYDOWN and e.key == pygame.K_ESCAPE):
+            return True
+    return False
+
+def main():
+    import pygame
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.SCALED)
+    pygame.display.set_caption(WINDOW_TITLE)
+    clock = pygame.time.Clock()
+
+    rt = build_scene(WIDTH, HEIGHT)
+
+    cache = RenderCache(CACHE_DIR, max_bytes=CACHE_MAX_MB * 1024 * 1024) if USE_CACHE else None
 
     print("Renderizando…")
-    try:
-        rt.render()
-    except AttributeError:
-        rt.rtRender()
+    running = True
+    if cache is not None and cache.load(rt, RENDER_MODE):
+        print(" Render idéntico en caché")
+    elif RENDER_MODE == "gbuffer" and rt.load_gbuffer(GBUFFER_PATH):
+        # mismas figuras y cámara que el G-buffer guardado: sólo sombreado y sombras
+        print(" G-buffer guardado: sólo se recalcula la iluminación")
+        rt.relight()
+        if cache is not None:
+            cache.store(rt, RENDER_MODE)
+    elif RENDER_MODE == "progressive":
+        # la ventana se actualiza en cada etapa; ESC corta el render
+        for done, total in rt.render_progressive():
+            print(f"{int(100*done/total)}% ...")
+            show_framebuffer(screen, rt.framebuffer)
+            if quit_requested():
+                running = False
+                break
+        else:
+            if cache is not None:
+                cache.store(rt, RENDER_MODE)
+    else:
+        try:
+            rt.render(mode=RENDER_MODE, cache=cache)
+        except AttributeError:
+            rt.rtRender()
+        if rt.gbuffer is not None:
+            os.makedirs(os.path.dirname(GBUFFER_PATH), exist_ok=True)
+            rt.gbuffer.save(GBUFFER_PATH)
+
+    if not running:
+        pygame.quit()
+        return
 
     os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
     save_bmp(OUTPUT_PATH, WIDTH, HEIGHT, rt.framebuffer)
     print(f" Guardado en {OUTPUT_PATH}")
 
-    img = (np.clip(rt.framebuffer, 0, 1) * 255).astype(np.uint8)
-    if img.shape[0] == HEIGHT and img.shape[1] == WIDTH:
-        img = np.transpose(img, (1, 0, 2))
-    surf = pygame.surfarray.make_surface(img)
-    screen.blit(surf, (0, 0))
-    pygame.display.flip()
+    show_framebuffer(screen, rt.framebuffer)
 
     print("ESC para salir")
-    running = True
     while running:
-        for e in pygame.event.get():
-            if e.type == QUIT or (e.type == KEYDOWN and e.key == K_ESCAPE):
-                running = False
+        running = not quit_requested()
         clock.tick(60)
 
     pygame.quit()
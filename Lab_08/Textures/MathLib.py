@@ -1,3 +1,4 @@
+import math
 import numpy as np
 
 # Pequeño epsilon para evitar divisiones por cero 
@@ -33,6 +34,19 @@ def normalize(v):
         return v
     return (v / n).astype(np.float32)
 
+def dot_many(a, b):
+    """Producto punto fila por fila de arrays (N,3) (acepta broadcasting con (3,))."""
+    # por componentes: reducir un eje de tamaño 3 con np.sum es bastante más lento
+    a = np.asarray(a)
+    b = np.asarray(b)
+    return a[..., 0] * b[..., 0] + a[..., 1] * b[..., 1] + a[..., 2] * b[..., 2]
+
+def normalize_many(v):
+    """Normaliza cada fila de un array (N,3) (filas con norma ~0 se dejan igual)."""
+    v = np.asarray(v, dtype=np.float32)
+    n = np.linalg.norm(v, axis=-1, keepdims=True)
+    return np.where(n < EPS, v, v / np.maximum(n, EPS)).astype(np.float32)
+
 def clamp01(x):
     """Clampa un escalar o array al rango [0,1]."""
     return np.clip(x, 0.0, 1.0)
@@ -103,6 +117,35 @@ def refract(I, N, etai, etat):
     T = eta * I + (eta * cosi - np.sqrt(k)) * n
     return normalize(T)
 
+def reflect_many(I, N):
+    """Versión por lotes de reflect: I y N son arrays (N,3)."""
+    I = np.asarray(I, dtype=np.float32)
+    N = normalize_many(N)
+    return (I - 2.0 * dot_many(I, N)[:, None] * N).astype(np.float32)
+
+def refract_many(I, N, etai, etat):
+    """
+    Versión por lotes de refract. etai/etat pueden ser escalares o arrays (N,).
+    Las filas con Reflexión Interna Total quedan en (0,0,0).
+    """
+    I = normalize_many(I)
+    N = normalize_many(N)
+
+    cosi = np.clip(dot_many(I, N), -1.0, 1.0)
+    n1 = np.broadcast_to(np.asarray(etai, dtype=np.float32), cosi.shape)
+    n2 = np.broadcast_to(np.asarray(etat, dtype=np.float32), cosi.shape)
+    inside = cosi > 0.0
+    n = np.where(inside[:, None], -N, N)
+    n1, n2 = np.where(inside, n2, n1), np.where(inside, n1, n2)
+    cosi = np.where(inside, -cosi, cosi)
+
+    eta = n1 / n2
+    k = 1.0 - eta * eta * (1.0 - cosi * cosi)
+
+    T = eta[:, None] * I + (eta * cosi - np.sqrt(np.maximum(k, 0.0)))[:, None] * n
+    T = np.where((k < 0.0)[:, None], 0.0, T)
+    return normalize_many(T)
+
 def ortho_basis(n):
     """
     Construye (t, b, n) ortonormales dado n (unitario).
@@ -127,3 +170,124 @@ def project(v, n):
 def reject(v, n):
     """Componente de v perpendicular a n: v - project(v, n)."""
     return np.asarray(v, dtype=np.float32) - project(v, n)
+
+# Raíces de polinomios (cuártico cerrado para el toroide)
+def _cubic_max_root(A, B, C):
+    """Mayor raíz real de x^3 + A x^2 + B x + C (Cardano / forma trigonométrica)."""
+    P = B - A * A / 3.0
+    Q = 2.0 * A * A * A / 27.0 - A * B / 3.0 + C
+    D = 0.25 * Q * Q + P * P * P / 27.0
+    if D >= 0.0:
+        sq = math.sqrt(D)
+        t = math.copysign(abs(-0.5 * Q + sq) ** (1.0 / 3.0), -0.5 * Q + sq) + \
+            math.copysign(abs(-0.5 * Q - sq) ** (1.0 / 3.0), -0.5 * Q - sq)
+    else:
+        rad = math.sqrt(-P / 3.0)
+        arg = max(-1.0, min(1.0, -0.5 * Q / (rad * rad * rad)))
+        t = 2.0 * rad * math.cos(math.acos(arg) / 3.0)
+    return t - A / 3.0
+
+def solve_quartic(a, b, c, d, e, polish=2):
+    """
+    Raíces reales de a t^4 + b t^3 + c t^2 + d t + e (a != 0), ordenadas.
+    Método de Ferrari con cúbica resolvente y `polish` pasos de Newton.
+    Versión escalar en floats de Python (sin arrays): es la que usa un solo rayo.
+    """
+    b, c, d, e = b / a, c / a, d / a, e / a
+
+    # Cuártico deprimido y^4 + p y^2 + q y + r con t = y - b/4
+    b2 = b * b
+    p = c - 3.0 * b2 / 8.0
+    q = d - b * c / 2.0 + b2 * b / 8.0
+    r = e - b * d / 4.0 + b2 * c / 16.0 - 3.0 * b2 * b2 / 256.0
+
+    ys = []
+    m = max(0.0, _cubic_max_root(p, 0.25 * p * p - r, -0.125 * q * q))
+    if m < 1e-12:
+        # bicuadrático: z^2 + p z + r = 0 con z = y^2
+        disc = p * p - 4.0 * r
+        if disc >= 0.0:
+            sq = math.sqrt(disc)
+            for z in ((-p - sq) * 0.5, (-p + sq) * 0.5):
+                if z >= 0.0:
+                    sz = math.sqrt(z)
+                    ys += [-sz, sz]
+    else:
+        s = math.sqrt(2.0 * m)
+        for sign in (1.0, -1.0):
+            # y^2 + sign*s*y + (p/2 + m - sign*q/(2s)) = 0
+            k = 0.5 * p + m - sign * q / (2.0 * s)
+            disc = s * s - 4.0 * k
+            if disc >= 0.0:
+                sq = math.sqrt(disc)
+                ys += [(-sign * s - sq) * 0.5, (-sign * s + sq) * 0.5]
+
+    roots = []
+    for y in ys:
+        t = y - b / 4.0
+        for _ in range(polish):
+            f = (((t + b) * t + c) * t + d) * t + e
+            df = ((4.0 * t + 3.0 * b) * t + 2.0 * c) * t + d
+            if df == 0.0:
+                break
+            t -= f / df
+        roots.append(t)
+    roots.sort()
+    return roots
+
+def solve_quartic_many(coeffs, polish=2):
+    """
+    Versión por lotes de solve_quartic: coeffs (N,5) -> raíces (N,4) en float64,
+    con NaN en las posiciones sin raíz real.
+    """
+    coeffs = np.asarray(coeffs, dtype=np.float64)
+    a = coeffs[:, 0]
+    b, c, d, e = (coeffs[:, k] / a for k in range(1, 5))
+
+    b2 = b * b
+    p = c - 3.0 * b2 / 8.0
+    q = d - b * c / 2.0 + b2 * b / 8.0
+    r = e - b * d / 4.0 + b2 * c / 16.0 - 3.0 * b2 * b2 / 256.0
+
+    # Mayor raíz de la cúbica resolvente m^3 + p m^2 + (p^2/4 - r) m - q^2/8
+    A, B, C = p, 0.25 * p * p - r, -0.125 * q * q
+    P = B - A * A / 3.0
+    Q = 2.0 * A * A * A / 27.0 - A * B / 3.0 + C
+    D = 0.25 * Q * Q + P * P * P / 27.0
+    sq = np.sqrt(np.maximum(D, 0.0))
+    t_one = np.cbrt(-0.5 * Q + sq) + np.cbrt(-0.5 * Q - sq)
+    rad = np.sqrt(np.maximum(-P / 3.0, 0.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        arg = np.clip(-0.5 * Q / (rad * rad * rad), -1.0, 1.0)
+    t_three = 2.0 * rad * np.cos(np.arccos(np.nan_to_num(arg)) / 3.0)
+    m = np.maximum(np.where(D >= 0.0, t_one, t_three) - A / 3.0, 0.0)
+
+    ys = np.full((len(a), 4), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bi = m < 1e-12
+        # Rama bicuadrática
+        disc = p * p - 4.0 * r
+        sqd = np.sqrt(np.maximum(disc, 0.0))
+        for k, z in enumerate(((-p - sqd) * 0.5, (-p + sqd) * 0.5)):
+            ok = bi & (disc >= 0.0) & (z >= 0.0)
+            sz = np.sqrt(np.maximum(z, 0.0))
+            ys[:, 2 * k] = np.where(ok, -sz, ys[:, 2 * k])
+            ys[:, 2 * k + 1] = np.where(ok, sz, ys[:, 2 * k + 1])
+
+        # Rama general: dos cuadráticas
+        s = np.sqrt(2.0 * m)
+        for k, sign in enumerate((1.0, -1.0)):
+            kk = 0.5 * p + m - sign * q / (2.0 * s)
+            disc = s * s - 4.0 * kk
+            ok = ~bi & (disc >= 0.0)
+            sqd = np.sqrt(np.maximum(disc, 0.0))
+            ys[:, 2 * k] = np.where(ok, (-sign * s - sqd) * 0.5, ys[:, 2 * k])
+            ys[:, 2 * k + 1] = np.where(ok, (-sign * s + sqd) * 0.5, ys[:, 2 * k + 1])
+
+        t = ys - (b / 4.0)[:, None]
+        b, c, d, e = b[:, None], c[:, None], d[:, None], e[:, None]
+        for _ in range(polish):
+            f = (((t + b) * t + c) * t + d) * t + e
+            df = ((4.0 * t + 3.0 * b) * t + 2.0 * c) * t + d
+            t = np.where(df != 0.0, t - f / df, t)
+    return t
@@ -0,0 +1,393 @@
+import math
+import numpy as np
+
+# Margen para que las cajas (float64) cubran a las figuras (float32)
+BOX_PAD = 1e-4
+HUGE = 1e30
+
+
+def _area(bmin, bmax):
+    """Superficie de una caja (o de un array de cajas)."""
+    d = np.maximum(bmax - bmin, 0.0)
+    return 2.0 * (d[..., 0] * d[..., 1] + d[..., 1] * d[..., 2] + d[..., 2] * d[..., 0])
+
+
+def _slab(bmin, bmax, origins, inv):
+    """(t_near, t_far) de cada rayo contra una caja; max/min por componente."""
+    t0 = (bmin - origins) * inv
+    t1 = (bmax - origins) * inv
+    lo = np.minimum(t0, t1)
+    hi = np.maximum(t0, t1)
+    t_near = np.maximum(np.maximum(lo[:, 0], lo[:, 1]), lo[:, 2])
+    t_far = np.minimum(np.minimum(hi[:, 0], hi[:, 1]), hi[:, 2])
+    return t_near, t_far
+
+
+def _safe_inv(d):
+    """1/d por componente, usando ±HUGE donde d ~ 0 (evita inf*0 = nan)."""
+    d = np.asarray(d, dtype=np.float64)
+    return np.where(np.abs(d) > 1e-12, 1.0 / np.where(d == 0.0, 1.0, d), np.copysign(HUGE, d))
+
+
+class BVH:
+    """
+    Jerarquía de volúmenes envolventes (AABB) sobre las figuras de una escena.
+
+    - Se construye con splits SAH por bins sobre los centroides.
+    - Las figuras sin caja (aabb() == None, p. ej. Plane) quedan en una lista
+      aparte (`unbounded`) que se prueba siempre antes del árbol.
+    - Los índices que retorna son posiciones dentro de la lista `scene`.
+    """
+
+    def __init__(self, scene, leaf_size=4, bins=12):
+        self.scene = scene
+        self.leaf_size = max(1, int(leaf_size))
+        self.bins = max(2, int(bins))
+
+        self.unbounded = []
+        ids, mins, maxs = [], [], []
+        for i, obj in enumerate(scene):
+            box = obj.aabb()
+            if box is None:
+                self.unbounded.append(i)
+                continue
+            ids.append(i)
+            mins.append(np.asarray(box[0], dtype=np.float64) - BOX_PAD)
+            maxs.append(np.asarray(box[1], dtype=np.float64) + BOX_PAD)
+
+        # Nodos en arrays planos; left = -1 marca hoja
+        self.node_min = []
+        self.node_max = []
+        self.left = []
+        self.right = []
+        self.start = []
+        self.count = []
+        self.prims = []
+
+        if ids:
+            self._box_min = np.array(mins)
+            self._box_max = np.array(maxs)
+            self._ids = np.array(ids)
+            self._build(np.arange(len(ids)))
+            del self._box_min, self._box_max, self._ids
+
+        self.node_min = np.array(self.node_min, dtype=np.float64).reshape(-1, 3)
+        self.node_max = np.array(self.node_max, dtype=np.float64).reshape(-1, 3)
+        # copias en listas de Python: el recorrido escalar es más rápido sin ndarrays
+        self._nmin = [tuple(b) for b in self.node_min.tolist()]
+        self._nmax = [tuple(b) for b in self.node_max.tolist()]
+
+    def __len__(self):
+        return len(self.node_min)
+
+    # Construcción
+    def _new_node(self, bmin, bmax):
+        self.node_min.append(bmin)
+        self.node_max.append(bmax)
+        self.left.append(-1)
+        self.right.append(-1)
+        self.start.append(0)
+        self.count.append(0)
+        return len(self.left) - 1
+
+    def _make_leaf(self, node, items):
+        self.start[node] = len(self.prims)
+        self.count[node] = len(items)
+        self.prims.extend(int(self._ids[k]) for k in items)
+
+    def _build(self, items):
+        bmin = self._box_min[items].min(axis=0)
+        bmax = self._box_max[items].max(axis=0)
+        node = self._new_node(bmin, bmax)
+
+        if len(items) <= self.leaf_size:
+            self._make_leaf(node, items)
+            return node
+
+        split = self._sah_split(items, bmin, bmax)
+        if split is None:
+            self._make_leaf(node, items)
+            return node
+
+        left_items, right_items = split
+        self.left[node] = self._build(left_items)
+        self.right[node] = self._build(right_items)
+        return node
+
+    def _sah_split(self, items, bmin, bmax):
+        """Mejor partición SAH por bins; None si conviene dejar una hoja."""
+        centroids = 0.5 * (self._box_min[items] + self._box_max[items])
+        cmin = centroids.min(axis=0)
+        cmax = centroids.max(axis=0)
+        extent = cmax - cmin
+        axis = int(np.argmax(extent))
+
+        if extent[axis] < 1e-9:
+            # todos los centroides coinciden: partición por mitades
+            half = len(items) // 2
+            return items[:half], items[half:]
+
+        nb = self.bins
+        b = ((centroids[:, axis] - cmin[axis]) / extent[axis] * nb).astype(np.int64)
+        b = np.clip(b, 0, nb - 1)
+
+        counts = np.bincount(b, minlength=nb)
+        bin_min = np.full((nb, 3), np.inf)
+        bin_max = np.full((nb, 3), -np.inf)
+        np.minimum.at(bin_min, b, self._box_min[items])
+        np.maximum.at(bin_max, b, self._box_max[items])
+
+        # acumulados izquierda -> derecha y derecha -> izquierda
+        left_min = np.minimum.accumulate(bin_min, axis=0)[:-1]
+        left_max = np.maximum.accumulate(bin_max, axis=0)[:-1]
+        right_min = np.minimum.accumulate(bin_min[::-1], axis=0)[::-1][1:]
+        right_max = np.maximum.accumulate(bin_max[::-1], axis=0)[::-1][1:]
+        left_n = np.cumsum(counts)[:-1]
+        right_n = len(items) - left_n
+
+        with np.errstate(invalid="ignore"):
+            cost = (np.where(left_n > 0, _area(left_min, left_max) * left_n, 0.0) +
+                    np.where(right_n > 0, _area(right_min, right_max) * right_n, 0.0))
+        cost = np.where((left_n > 0) & (right_n > 0), cost, np.inf)
+
+        k = int(np.argmin(cost))
+        if not np.isfinite(cost[k]):
+            half = len(items) // 2
+            order = np.argsort(centroids[:, axis], kind="stable")
+            return items[order[:half]], items[order[half:]]
+
+        # costo de no partir (misma constante de intersección por figura)
+        leaf_cost = _area(bmin, bmax) * len(items)
+        if cost[k] >= leaf_cost and len(items) <= 2 * self.leaf_size:
+            return None
+
+        go_left = b <= k
+        return items[go_left], items[~go_left]
+
+    # Recorrido escalar (un rayo)
+    def closest_hit(self, orig, dir, t_min, t_max=math.inf):
+        """
+        Intercept más cercano con t_min < t < t_max (o None).
+        Recorre de adelante hacia atrás y descarta nodos más lejanos que el mejor hit.
+        """
+        best = None
+        best_t = t_max
+        best_i = -1
+
+        # en empates gana el índice menor, igual que el recorrido lineal de la escena
+        def test(i):
+            nonlocal best, best_t, best_i
+            hit = self.scene[i].ray_intersect(orig, dir)
+            if hit is None or hit.distance <= t_min:
+                return
+            if hit.distance < best_t or (hit.distance == best_t and i < best_i):
+                best, best_t, best_i = hit, hit.distance, i
+
+        for i in self.unbounded:
+            test(i)
+
+        if not self.left:
+            return best
+
+        ox, oy, oz = float(orig[0]), float(orig[1]), float(orig[2])
+        ix, iy, iz = _safe_inv(dir).tolist()
+        nmin, nmax = self._nmin, self._nmax
+        left, right = self.left, self.right
+
+        def entry(node):
+            lo, hi = nmin[node], nmax[node]
+            tx0 = (lo[0] - ox) * ix; tx1 = (hi[0] - ox) * ix
+            ty0 = (lo[1] - oy) * iy; ty1 = (hi[1] - oy) * iy
+            tz0 = (lo[2] - oz) * iz; tz1 = (hi[2] - oz) * iz
+            t0 = max(min(tx0, tx1), min(ty0, ty1), min(tz0, tz1))
+            t1 = min(max(tx0, tx1), max(ty0, ty1), max(tz0, tz1))
+            if t0 > t1 or t1 < 0.0:
+                return math.inf
+            return t0
+
+        stack = [(entry(0), 0)]
+        while stack:
+            t_enter, node = stack.pop()
+            if t_enter >= best_t:
+                continue
+
+            if left[node] < 0:
+                s = self.start[node]
+                for i in self.prims[s:s + self.count[node]]:
+                    test(i)
+                continue
+
+            a, b = left[node], right[node]
+            ta, tb = entry(a), entry(b)
+            # el hijo más cercano se apila al final para visitarlo primero
+            if ta > tb:
+                a, b, ta, tb = b, a, tb, ta
+            if tb < best_t:
+                stack.append((tb, b))
+            if ta < best_t:
+                stack.append((ta, a))
+
+        return best
+
+    def occluded(self, orig, dir, t_min, t_max=math.inf):
+        """
+        Consulta any-hit: True en cuanto alguna figura corta el rayo con
+        t_min < t < t_max. Solo usa hit_distance (sin Intercept ni normal).
+        """
+        scene = self.scene
+        for i in self.unbounded:
+            t = scene[i].hit_distance(orig, dir)
+            if t is not None and t_min < t < t_max:
+                return True
+
+        if not self.left:
+            return False
+
+        ox, oy, oz = float(orig[0]), float(orig[1]), float(orig[2])
+        ix, iy, iz = _safe_inv(dir).tolist()
+        nmin, nmax = self._nmin, self._nmax
+        left, right = self.left, self.right
+
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            lo, hi = nmin[node], nmax[node]
+            tx0 = (lo[0] - ox) * ix; tx1 = (hi[0] - ox) * ix
+            ty0 = (lo[1] - oy) * iy; ty1 = (hi[1] - oy) * iy
+            tz0 = (lo[2] - oz) * iz; tz1 = (hi[2] - oz) * iz
+            t0 = max(min(tx0, tx1), min(ty0, ty1), min(tz0, tz1))
+            t1 = min(max(tx0, tx1), max(ty0, ty1), max(tz0, tz1))
+            if t0 > t1 or t1 < 0.0 or t0 >= t_max:
+                continue
+
+            if left[node] < 0:
+                s = self.start[node]
+                for i in self.prims[s:s + self.count[node]]:
+                    t = scene[i].hit_distance(orig, dir)
+                    if t is not None and t_min < t < t_max:
+                        return True
+                continue
+
+            stack.append(right[node])
+            stack.append(left[node])
+
+        return False
+
+    # Recorrido por lotes (paquetes de rayos)
+    def closest_hit_many(self, origins, dirs, t_min, t_max=np.inf):
+        """
+        Versión por lotes: retorna (t, normal, idx) con idx = -1 donde no hay hit.
+        Cada nodo se prueba solo contra los rayos del paquete que aún podrían
+        encontrar algo más cercano que su mejor hit actual.
+        """
+        n = len(dirs)
+        origins = np.broadcast_to(origins, dirs.shape)
+        best_t = np.empty(n, dtype=np.float32)
+        best_t[:] = t_max
+        best_n = np.zeros((n, 3), dtype=np.float32)
+        best_i = np.full(n, -1, dtype=np.int32)
+
+        def test(i, rays):
+            cur_t = best_t[rays]
+            t, nrm, mask = self.scene[i].ray_intersect_many(origins[rays], dirs[rays],
+                                                            np.nextafter(cur_t, np.float32(np.inf)))
+            mask &= (t > t_min) & ((t < cur_t) | (best_i[rays] > i))
+            if mask.any():
+                sel = rays[mask]
+                best_t[sel] = t[mask]
+                best_n[sel] = nrm[mask]
+                best_i[sel] = i
+
+        all_rays = np.arange(n)
+        for i in self.unbounded:
+            test(i, all_rays)
+
+        if not self.left or n == 0:
+            return best_t, best_n, best_i
+
+        inv = _safe_inv(dirs)
+        o64 = origins.astype(np.float64)
+
+        def entry(node, rays):
+            t_near, t_far = _slab(self.node_min[node], self.node_max[node], o64[rays], inv[rays])
+            keep = (t_near <= t_far) & (t_far >= 0.0) & (t_near < best_t[rays])
+            return rays[keep], t_near[keep]
+
+        rays, t_near = entry(0, all_rays)
+        stack = [(0, rays, t_near)] if len(rays) else []
+        while stack:
+            node, rays, t_near = stack.pop()
+            # el mejor hit de algunos rayos pudo mejorar desde que se apiló el nodo
+            keep = t_near < best_t[rays]
+            if not keep.any():
+                continue
+            rays = rays[keep]
+
+            if self.left[node] < 0:
+                s = self.start[node]
+                for i in self.prims[s:s + self.count[node]]:
+                    test(i, rays)
+                continue
+
+            a, b = self.left[node], self.right[node]
+            ra, ta = entry(a, rays)
+            rb, tb = entry(b, rays)
+            # orden de adelante hacia atrás según la distancia media del paquete
+            first_a = (ta.mean() if len(ta) else np.inf) <= (tb.mean() if len(tb) else np.inf)
+            pending = [(a, ra, ta), (b, rb, tb)] if first_a else [(b, rb, tb), (a, ra, ta)]
+            for child, child_rays, child_t in reversed(pending):
+                if len(child_rays):
+                    stack.append((child, child_rays, child_t))
+
+        return best_t, best_n, best_i
+
+    def occluded_many(self, origins, dirs, t_min, t_max=np.inf):
+        """
+        Versión por lotes de occluded: array bool (N,).
+        Los rayos se retiran del paquete en cuanto encuentran cualquier hit.
+        """
+        n = len(dirs)
+        origins = np.broadcast_to(origins, dirs.shape)
+        limit = np.empty(n, dtype=np.float32)
+        limit[:] = t_max
+        hit = np.zeros(n, dtype=bool)
+
+        def test(i, rays):
+            rays = rays[~hit[rays]]
+            if len(rays) == 0:
+                return
+            t = self.scene[i].hit_distance_many(origins[rays], dirs[rays])
+            hit[rays[(t > t_min) & (t < limit[rays])]] = True
+
+        all_rays = np.arange(n)
+        for i in self.unbounded:
+            test(i, all_rays)
+
+        if not self.left or n == 0:
+            return hit
+
+        inv = _safe_inv(dirs)
+        o64 = origins.astype(np.float64)
+
+        stack = [(0, all_rays[~hit])]
+        while stack:
+            node, rays = stack.pop()
+            rays = rays[~hit[rays]]
+            if len(rays) == 0:
+                continue
+
+            t_near, t_far = _slab(self.node_min[node], self.node_max[node], o64[rays], inv[rays])
+            rays = rays[(t_near <= t_far) & (t_far >= 0.0) & (t_near < limit[rays])]
+            if len(rays) == 0:
+                continue
+
+            if self.left[node] < 0:
+                s = self.start[node]
+                for i in self.prims[s:s + self.count[node]]:
+                    test(i, rays)
+                continue
+
+            stack.append((self.right[node], rays))
+            stack.append((self.left[node], rays))
+
+        return hit
@@ -0,0 +1,367 @@
+import glob
+import hashlib
+import os
+
+import numpy as np
+
+from Textures.bvh import _safe_inv, _slab
+from Textures.parallel import make_tiles
+
+# Cambiar al modificar el render: invalida todo lo guardado con versiones anteriores
+CACHE_VERSION = 1
+
+DEFAULT_DIR = os.path.join("renders", ".cache")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Opciones del Raytracer que cambian la imagen
+RENDER_OPTIONS = ("width", "height", "eye", "target", "up", "fov", "backgroundColor",
+                  "samples_per_pixel", "enable_ao", "ao_samples", "ao_distance", "max_depth",
+                  "sampler", "seed")
+
+# Holgura de las cajas al decidir qué tiles toca un cambio (como BOX_PAD de la BVH)
+BOX_PAD = 1e-3
+
+
+# Hash de contenido
+def _feed(h, value):
+    """Agrega `value` al hash: números, strings, arrays, listas, dicts y objetos (por sus atributos)."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        h.update(f"{type(value).__name__}:{value!r};".encode())
+    elif isinstance(value, np.generic):
+        _feed(h, value.item())
+    elif isinstance(value, np.ndarray):
+        h.update(f"nd:{value.dtype.str}:{value.shape};".encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (list, tuple)):
+        h.update(f"seq:{len(value)}[".encode())
+        for item in value:
+            _feed(h, item)
+        h.update(b"]")
+    elif isinstance(value, dict):
+        h.update(f"dict:{len(value)}{{".encode())
+        for key in sorted(value, key=str):
+            _feed(h, str(key))
+            _feed(h, value[key])
+        h.update(b"}")
+    else:
+        cls = type(value)
+        h.update(f"obj:{cls.__module__}.{cls.__qualname__}(".encode())
+        _feed(h, {k: v for k, v in vars(value).items() if not k.startswith("_")})
+        h.update(b")")
+
+
+def fingerprint(*values):
+    """Hash (hex) del contenido de los valores; no depende de ids ni del orden de atributos."""
+    h = hashlib.blake2b(digest_size=16)
+    for value in values:
+        _feed(h, value)
+    return h.hexdigest()
+
+
+def frame_keys(rt, mode):
+    """
+    (base, objs, digests):
+    - base: luces, cámara, resolución, opciones y modo (todo menos las figuras).
+    - digests: hash de cada figura (forma + material).
+    - objs: hash de la lista de figuras.
+    """
+    options = {name: getattr(rt, name) for name in RENDER_OPTIONS}
+    base = fingerprint(CACHE_VERSION, mode, options, list(rt.lights))
+    digests = [fingerprint(obj) for obj in rt.scene]
+    return base, fingerprint(digests), digests
+
+
+# Huella de los rayos de un tile
+class TileFootprint:
+    """
+    Celdas de una rejilla (grid^3) sobre `bounds` que tocó algún segmento de
+    rayo del tile (rayos primarios, sombras, reflexiones, AO), y si algún
+    segmento salió de la rejilla.
+
+    Es conservadora: cada segmento se muestrea con pasos de a lo sumo una
+    celda por eje y al final las celdas se dilatan una celda.
+    """
+
+    def __init__(self, bounds, grid):
+        self.lo = np.asarray(bounds[0], dtype=np.float64)
+        self.hi = np.asarray(bounds[1], dtype=np.float64)
+        self.grid = int(grid)
+        self.cell = (self.hi - self.lo) / self.grid
+        self.cells = np.zeros(self.grid ** 3, dtype=bool)
+        self.outside = False
+
+    def add(self, origins, dirs, t_end):
+        """Registra los segmentos origins + dirs * [0, t_end] (t_end puede ser inf)."""
+        dirs = np.asarray(dirs)
+        origins = np.broadcast_to(np.asarray(origins), dirs.shape)
+        t_end = np.broadcast_to(np.asarray(t_end), dirs.shape[:1])
+        if len(dirs) == 0:
+            return
+
+        # recorte del segmento a la caja de la rejilla
+        t_in, t_out = _slab(self.lo, self.hi, origins, _safe_inv(dirs))
+        ta = np.maximum(t_in, 0.0)
+        tb = np.minimum(t_out, t_end)
+        if not self.outside and np.any((t_in > 0.0) | (t_out < t_end)):
+            self.outside = True
+        keep = ta <= tb
+        if not keep.any():
+            return
+        o, d, ta, tb = origins[keep], dirs[keep], ta[keep], tb[keep]
+
+        # extremos en coordenadas de celda; muestras separadas a lo sumo una celda por eje
+        q0 = (o + d * ta[:, None] - self.lo) / self.cell
+        dq = (o + d * tb[:, None] - self.lo) / self.cell - q0
+        span = np.abs(dq)
+        steps = np.ceil(np.maximum(np.maximum(span[:, 0], span[:, 1]), span[:, 2])).astype(np.int64) + 1
+        first = np.repeat(np.cumsum(steps) - steps, steps)
+        frac = (np.arange(len(first)) - first) * np.repeat(1.0 / np.maximum(steps - 1, 1), steps)
+
+        # por componente: indexar filas (N,3) con un array es mucho más lento
+        flat = 0
+        for axis in range(3):
+            q = np.repeat(q0[:, axis], steps) + np.repeat(dq[:, axis], steps) * frac
+            flat = flat * self.grid + np.clip(q.astype(np.int64), 0, self.grid - 1)
+        self.cells[flat] = True
+
+    def finish(self):
+        """Dilata las celdas marcadas una celda en cada eje (cubre el espacio entre muestras)."""
+        g = self.cells.reshape(self.grid, self.grid, self.grid)
+        for axis in range(3):
+            out = g.copy()
+            lo = [slice(None)] * 3
+            hi = [slice(None)] * 3
+            lo[axis] = slice(0, -1)
+            hi[axis] = slice(1, None)
+            out[tuple(lo)] |= g[tuple(hi)]
+            out[tuple(hi)] |= g[tuple(lo)]
+            g = out
+        self.cells = g.ravel()
+        return self
+
+
+def touches(cells, outside, bounds, grid, box):
+    """
+    Tiles (bool por tile) cuya huella toca la caja `box` = (min, max).
+    `cells`: (T, grid^3) bool; `outside`: (T,) bool.
+    """
+    lo, hi = np.asarray(bounds[0]), np.asarray(bounds[1])
+    bmin = np.asarray(box[0], dtype=np.float64) - BOX_PAD
+    bmax = np.asarray(box[1], dtype=np.float64) + BOX_PAD
+    # la parte de la caja fuera de la rejilla sólo la alcanzan segmentos que salieron
+    hit = outside.copy() if np.any(bmin < lo) or np.any(bmax > hi) else np.zeros(len(cells), bool)
+
+    if np.all(bmax >= lo) and np.all(bmin <= hi):
+        cell = (hi - lo) / grid
+        i0 = np.clip(np.floor((bmin - lo) / cell), 0, grid - 1).astype(int)
+        i1 = np.clip(np.floor((bmax - lo) / cell), 0, grid - 1).astype(int)
+        cube = cells.reshape(len(cells), grid, grid, grid)
+        region = cube[:, i0[0]:i1[0] + 1, i0[1]:i1[1] + 1, i0[2]:i1[2] + 1]
+        hit |= region.reshape(len(cells), -1).any(axis=1)
+    return hit
+
+
+def scene_bounds(rt):
+    """Caja de la rejilla: figuras acotadas, cámara y luces puntuales, con un margen."""
+    points = [np.asarray(rt.eye, dtype=np.float64)]
+    for obj in rt.scene:
+        box = obj.aabb()
+        if box is not None:
+            points += [np.asarray(box[0], dtype=np.float64), np.asarray(box[1], dtype=np.float64)]
+    for L in rt.lights:
+        if getattr(L, "position", None) is not None:
+            points.append(np.asarray(L.position, dtype=np.float64))
+    points = np.array(points)
+    lo, hi = points.min(axis=0), points.max(axis=0)
+    pad = 0.05 * np.maximum(hi - lo, 1.0)
+    return np.array([lo - pad, hi + pad])
+
+
+def _object_boxes(scene):
+    """(n, 2, 3) con la caja de cada figura; NaN para las no acotadas (Plane)."""
+    boxes = np.full((len(scene), 2, 3), np.nan)
+    for i, obj in enumerate(scene):
+        box = obj.aabb()
+        if box is not None:
+            boxes[i] = box
+    return boxes
+
+
+# Caché en disco
+class RenderCache:
+    """
+    Caché de renders por contenido.
+
+    La clave es un hash de las figuras (forma y material), luces, cámara,
+    resolución y opciones del render. Cada entrada es un `.npz` comprimido
+    con el framebuffer en float; al pasar de `max_bytes` se borran las
+    entradas usadas hace más tiempo (LRU por fecha de modificación).
+
+    Con mode="wavefront" el frame se renderiza por tiles y se guarda, por
+    tile, qué celdas del espacio tocaron sus rayos (TileFootprint). Si luego
+    sólo cambian algunas figuras (mismas luces, cámara y opciones), se
+    reusa la última entrada y se re-renderizan únicamente los tiles cuyos
+    rayos tocaban la caja vieja o la nueva de una figura cambiada.
+    """
+
+    def __init__(self, directory=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES, tile_size=64, grid=16):
+        self.directory = directory
+        self.max_bytes = int(max_bytes)
+        self.tile_size = int(tile_size)
+        self.grid = int(grid)
+        self.last_status = None
+
+    def _path(self, base, objs):
+        return os.path.join(self.directory, f"{base}-{objs}.npz")
+
+    def load(self, rt, mode="wavefront"):
+        """Copia al framebuffer un render idéntico guardado; False si no hay."""
+        base, objs, _ = frame_keys(rt, mode)
+        path = self._path(base, objs)
+        if not os.path.exists(path):
+            return False
+        with np.load(path) as data:
+            rt.framebuffer[:] = data["framebuffer"]
+        os.utime(path)              # LRU: fecha de último uso
+        self.last_status = "hit"
+        return True
+
+    def store(self, rt, mode="wavefront", footprints=None):
+        """Guarda rt.framebuffer (y las huellas por tile, si las hay)."""
+        base, objs, digests = frame_keys(rt, mode)
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(base, objs)
+        arrays = {"framebuffer": rt.framebuffer}
+        if footprints is not None:
+            tiles, bounds, cells, outside = footprints
+            arrays.update(
+                tiles=np.asarray(tiles, dtype=np.int32),
+                bounds=bounds,
+                grid=np.int32(self.grid),
+                cells=np.packbits(cells, axis=1),
+                outside=outside,
+                digests=np.array(digests, dtype="U32"),
+                boxes=_object_boxes(rt.scene),
+            )
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(tmp, **arrays)
+        os.replace(tmp, path)
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep=None):
+        """Borra las entradas menos usadas hasta quedar bajo max_bytes."""
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, "*.npz")):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            os.remove(path)
+            total -= size
+
+    def clear(self):
+        for path in glob.glob(os.path.join(self.directory, "*.npz")):
+            os.remove(path)
+
+    def _previous(self, rt, base):
+        """Última entrada con las mismas luces, cámara y opciones, con huellas por tile."""
+        candidates = sorted(glob.glob(os.path.join(self.directory, f"{base}-*.npz")),
+                            key=os.path.getmtime, reverse=True)
+        for path in candidates:
+            with np.load(path) as data:
+                if "cells" not in data.files or int(data["grid"]) != self.grid:
+                    continue
+                if data["framebuffer"].shape != rt.framebuffer.shape:
+                    continue
+                return {name: data[name] for name in data.files}
+        return None
+
+    def _dirty_tiles(self, rt, prev, digests):
+        """Tiles del render anterior que tocan alguna figura agregada, quitada o cambiada."""
+        n_tiles = len(prev["tiles"])
+        grid = self.grid
+        cells = np.unpackbits(prev["cells"], axis=1, count=grid ** 3).astype(bool)
+        outside = prev["outside"]
+        bounds = prev["bounds"]
+
+        old = list(prev["digests"])
+        new_boxes = _object_boxes(rt.scene)
+        # multiconjuntos: una figura repetida cuenta tantas veces como aparece
+        remaining = {}
+        for i, d in enumerate(old):
+            remaining.setdefault(d, []).append(i)
+        changed = []
+        for i, d in enumerate(digests):
+            if remaining.get(d):
+                remaining[d].pop()
+            else:
+                changed.append(new_boxes[i])
+        for ids in remaining.values():
+            changed += [prev["boxes"][i] for i in ids]
+
+        dirty = np.zeros(n_tiles, dtype=bool)
+        for box in changed:
+            if np.isnan(box).any():        # figura no acotada: puede tocar cualquier rayo
+                return np.ones(n_tiles, dtype=bool)
+            dirty |= touches(cells, outside, bounds, grid, box)
+        return dirty
+
+    def render(self, rt, mode="wavefront"):
+        """
+        Renderiza rt usando la caché; retorna "hit", "tiles k/n" o "miss".
+        Sólo mode="wavefront" reusa tiles; los demás modos guardan el frame completo.
+        """
+        if self.load(rt, mode):
+            return self.last_status
+
+        if mode != "wavefront":
+            rt.render(mode=mode)
+            self.store(rt, mode)
+            self.last_status = "miss"
+            return self.last_status
+
+        rt._update_camera()
+        base, _, digests = frame_keys(rt, mode)
+        tiles = make_tiles(rt.width, rt.height, self.tile_size)
+        prev = self._previous(rt, base)
+
+        if prev is not None and len(prev["tiles"]) == len(tiles):
+            bounds = prev["bounds"]
+            cells = np.unpackbits(prev["cells"], axis=1, count=self.grid ** 3).astype(bool)
+            outside = prev["outside"].copy()
+            rt.framebuffer[:] = prev["framebuffer"]
+            dirty = self._dirty_tiles(rt, prev, digests)
+        else:
+            bounds = scene_bounds(rt)
+            cells = np.zeros((len(tiles), self.grid ** 3), dtype=bool)
+            outside = np.zeros(len(tiles), dtype=bool)
+            dirty = np.ones(len(tiles), dtype=bool)
+
+        todo = np.flatnonzero(dirty)
+        step = max(1, len(todo) // 20)
+        try:
+            for n, i in enumerate(todo):
+                if n % step == 0:
+                    print(f"{int(100*n/len(todo))}% ...")
+                footprint = TileFootprint(bounds, self.grid)
+                rt._ray_log = footprint
+                rt.render_tile(*tiles[i])
+                footprint.finish()
+                cells[i] = footprint.cells
+                outside[i] = footprint.outside
+        finally:
+            rt._ray_log = None
+        print("100% ... listo!")
+
+        self.store(rt, mode, footprints=(tiles, bounds, cells, outside))
+        self.last_status = "miss" if len(todo) == len(tiles) else f"tiles {len(todo)}/{len(tiles)}"
+        return self.last_status
@@ -0,0 +1,285 @@
+import numpy as np
+
+from Textures.figures import (
+    Sphere, Plane, Disk, Triangle, Cube, Cylinder, Ellipsoid, Torus,
+    sphere_distance_many, sphere_normals_many, plane_distance_many, disk_distance_many,
+    triangle_distance_many, box_distance_many, _cube_normals, cylinder_nearest_many,
+    cylinder_normals_many, ellipsoid_distance_many, ellipsoid_normals_many,
+    torus_distance_many, torus_normals_many,
+)
+from Textures.material import MaterialTable
+
+# Máximo de pares (rayo, figura) por bloque al evaluar un subconjunto grande
+PAIR_BUDGET = 1 << 20
+
+
+class SceneList(list):
+    """
+    Lista de figuras que cuenta sus modificaciones (`version`), para que el
+    Raytracer sepa cuándo rehacer la escena compilada y la BVH.
+    """
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.version = 0
+
+    def _changed(self):
+        self.version += 1
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._changed()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._changed()
+
+    def __iadd__(self, other):
+        result = super().__iadd__(other)
+        self._changed()
+        return result
+
+    def __imul__(self, n):
+        result = super().__imul__(n)
+        self._changed()
+        return result
+
+    def __reduce_ex__(self, protocol):
+        return SceneList, (list(self),)
+
+
+def _mutator(name):
+    method = getattr(list, name)
+
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self._changed()
+        return result
+
+    wrapper.__name__ = name
+    return wrapper
+
+
+for _name in ("append", "extend", "insert", "pop", "remove", "clear", "sort", "reverse"):
+    setattr(SceneList, _name, _mutator(_name))
+
+
+# Tipos empacados: nombre, parámetros por figura, kernel de distancia y de normal.
+# Los kernels reciben O, D (P,3) y los parámetros ya repetidos por par (rayo, figura).
+def _hit(O, D, t):
+    return O + D * t[:, None]
+
+
+KINDS = [
+    (Sphere, "sphere",
+     lambda o: dict(center=o.position, radius=o.radius),
+     lambda O, D, p: sphere_distance_many(O, D, p["center"], p["radius"]),
+     lambda O, D, t, p: sphere_normals_many(_hit(O, D, t), p["center"])),
+    (Plane, "plane",
+     lambda o: dict(point=o.position, normal=o.normal),
+     lambda O, D, p: plane_distance_many(O, D, p["point"], p["normal"]),
+     lambda O, D, t, p: p["normal"]),
+    (Disk, "disk",
+     lambda o: dict(point=o.position, normal=o.normal, radius=o.radius),
+     lambda O, D, p: disk_distance_many(O, D, p["point"], p["normal"], p["radius"]),
+     lambda O, D, t, p: p["normal"]),
+    (Triangle, "triangle",
+     lambda o: dict(A=o.A, B=o.B, C=o.C, normal=o.normal),
+     lambda O, D, p: triangle_distance_many(O, D, p["A"], p["B"], p["C"], p["normal"]),
+     lambda O, D, t, p: p["normal"]),
+    (Cube, "box",
+     lambda o: dict(bmin=o.min, bmax=o.max),
+     lambda O, D, p: box_distance_many(O, D, p["bmin"], p["bmax"]),
+     lambda O, D, t, p: _cube_normals(_hit(O, D, t), p["bmin"], p["bmax"])),
+    (Cylinder, "cylinder",
+     lambda o: dict(center=o.position, radius=o.radius, height=o.height),
+     lambda O, D, p: cylinder_nearest_many(O, D, p["center"], p["radius"], p["height"])[0],
+     lambda O, D, t, p: cylinder_normals_many(
+         _hit(O - p["center"], D, t),
+         cylinder_nearest_many(O, D, p["center"], p["radius"], p["height"])[1])),
+    (Ellipsoid, "ellipsoid",
+     lambda o: dict(center=o.position, radii=o.radii()),
+     lambda O, D, p: ellipsoid_distance_many(O, D, p["center"], p["radii"]),
+     lambda O, D, t, p: ellipsoid_normals_many(_hit(O - p["center"], D, t), p["radii"])),
+    (Torus, "torus",
+     lambda o: dict(center=o.position, R=o.R, r=o.r),
+     lambda O, D, p: torus_distance_many(O, D, p["center"], p["R"], p["r"]),
+     lambda O, D, t, p: torus_normals_many(_hit(O - p["center"], D, t), p["R"], p["r"])),
+]
+
+# Kernels que sólo operan sobre el último eje: aceptan rayos y figuras en ejes distintos
+BROADCAST_KINDS = {"sphere", "plane", "disk", "triangle", "box", "ellipsoid"}
+
+# Radios del toro en float64, igual que los floats de Python de Torus
+_FLOAT64_PARAMS = {("torus", "R"), ("torus", "r")}
+
+
+class _Group:
+    """Todas las figuras de un mismo tipo, con sus parámetros en arrays contiguos."""
+
+    def __init__(self, code, name, distance, normals):
+        self.code = code
+        self.name = name
+        self.broadcast = name in BROADCAST_KINDS
+        self.distance = distance
+        self.normals = normals
+        self.ids = []
+        self.params = {}
+
+
+class CompiledScene:
+    """
+    Escena "compilada" en estructura de arrays: las figuras de cada tipo
+    (esferas, cajas, cilindros, toros, ...) quedan empacadas en arrays
+    contiguos (centros, radios, mins/maxs, ...) y se intersectan con un
+    solo kernel vectorizado por tipo en lugar de un objeto a la vez.
+
+    - `materials`: MaterialTable con los materiales distintos (por valor).
+    - `material_index[i]`: índice en `materials` del material de scene[i].
+    - Las figuras de tipos sin kernel (subclases propias) usan sus métodos.
+    - Los índices que retorna son posiciones dentro de `scene`.
+    """
+
+    def __init__(self, scene):
+        self.scene = scene
+        n = len(scene)
+        self.kind = np.full(n, -1, dtype=np.int32)
+        self.slot = np.zeros(n, dtype=np.int32)
+
+        self.materials = MaterialTable()
+        self.material_index = self.materials.index([obj.material for obj in scene])
+
+        groups = {}
+        for i, obj in enumerate(scene):
+            # tipo exacto: una subclase puede cambiar la intersección
+            for code, (cls, name, pack, distance, normals) in enumerate(KINDS):
+                if type(obj) is cls:
+                    break
+            else:
+                continue
+
+            group = groups.get(code)
+            if group is None:
+                group = groups[code] = _Group(code, name, distance, normals)
+            self.kind[i] = code
+            self.slot[i] = len(group.ids)
+            group.ids.append(i)
+            for key, value in pack(obj).items():
+                group.params.setdefault(key, []).append(value)
+
+        for group in groups.values():
+            for key, values in group.params.items():
+                dtype = np.float64 if (group.name, key) in _FLOAT64_PARAMS else np.float32
+                group.params[key] = np.array(values, dtype=dtype)
+            group.ids = np.array(group.ids, dtype=np.int64)
+        self.groups = [groups[code] for code in sorted(groups)]
+        # figuras sin kernel empacado: (índice de escena, figura)
+        self.objects = [(int(i), scene[i]) for i in np.flatnonzero(self.kind < 0)]
+
+    def __len__(self):
+        return len(self.scene)
+
+    def counts(self):
+        """Cuántas figuras hay empacadas por tipo."""
+        return {g.name: len(g.ids) for g in self.groups}
+
+    # Kernels
+    def _part_distances(self, group, params, origins, dirs):
+        """(m, c): rayos contra las c figuras de un mismo tipo."""
+        m = len(dirs)
+        if group.broadcast:
+            # kernel por ejes (..., 3): rayos (m,1,3) contra figuras (1,c,3), sin copias
+            pairs = {key: v[None] for key, v in params.items()}
+            return group.distance(origins[:, None], dirs[:, None], pairs)
+
+        c = len(next(iter(params.values())))
+        O = np.repeat(origins, c, axis=0)
+        D = np.repeat(dirs, c, axis=0)
+        pairs = {key: np.tile(v, (m,) + (1,) * (v.ndim - 1)) for key, v in params.items()}
+        return group.distance(O, D, pairs).reshape(m, c)
+
+    def distances(self, origins, dirs):
+        """Matriz (N, K) de t de cada rayo contra cada figura de la escena (inf sin hit)."""
+        T = np.full((len(dirs), len(self.scene)), np.inf, dtype=np.float32)
+        for group in self.groups:
+            T[:, group.ids] = self._part_distances(group, group.params, origins, dirs)
+        for i, obj in self.objects:
+            T[:, i] = obj.hit_distance_many(origins, dirs)
+        return T
+
+    def normals(self, origins, dirs, t, idx):
+        """Normales (N,3) de rayos que ya chocaron con scene[idx] a distancia t."""
+        out = np.zeros((len(dirs), 3), dtype=np.float32)
+        kinds = self.kind[idx]
+        for group in self.groups:
+            sel = np.flatnonzero(kinds == group.code)
+            if len(sel):
+                slots = self.slot[idx[sel]]
+                params = {k: v[slots] for k, v in group.params.items()}
+                out[sel] = group.normals(origins[sel], dirs[sel], t[sel], params)
+
+        for i in np.unique(idx[kinds < 0]):
+            sel = np.flatnonzero(idx == i)
+            out[sel] = self.scene[i].ray_intersect_many(origins[sel], dirs[sel])[1]
+        return out
+
+    def _blocks(self, origins, dirs):
+        """Recorre los rayos por bloques para no pasar de PAIR_BUDGET pares."""
+        step = max(1, PAIR_BUDGET // max(1, len(self.scene)))
+        for s in range(0, len(dirs), step):
+            yield s, self.distances(origins[s:s + step], dirs[s:s + step])
+
+    def closest_hit_many(self, origins, dirs, t_min, t_max=np.inf):
+        """
+        Hit más cercano con t_min < t < t_max. Retorna (t, normal, idx); en
+        empates gana el índice menor, igual que el recorrido lineal de la escena.
+        """
+        dirs = np.asarray(dirs, dtype=np.float32)
+        origins = np.ascontiguousarray(np.broadcast_to(np.asarray(origins, dtype=np.float32), dirs.shape))
+        n = len(dirs)
+        limit = np.broadcast_to(np.asarray(t_max, dtype=np.float32), (n,))
+
+        best_t = np.full(n, np.inf, dtype=np.float32)
+        best_i = np.full(n, -1, dtype=np.int32)
+        if len(self.scene) and n:
+            for s, T in self._blocks(origins, dirs):
+                T[(T <= t_min) | (T >= limit[s:s + len(T), None])] = np.inf
+                k = np.argmin(T, axis=1)     # primera columna = índice menor
+                t = T[np.arange(len(T)), k]
+                hit = np.isfinite(t)
+                best_t[s:s + len(T)] = t
+                best_i[s:s + len(T)] = np.where(hit, k, -1)
+
+        best_n = np.zeros((n, 3), dtype=np.float32)
+        hit = best_i >= 0
+        if hit.any():
+            best_n[hit] = self.normals(origins[hit], dirs[hit], best_t[hit], best_i[hit])
+        # sin hit: t = t_max, igual que el recorrido lineal
+        best_t = np.where(hit, best_t, limit).astype(np.float32)
+        return best_t, best_n, best_i
+
+    def occluded_many(self, origins, dirs, t_min, t_max=np.inf):
+        """True por rayo si alguna figura lo corta con t_min < t < t_max."""
+        dirs = np.asarray(dirs, dtype=np.float32)
+        origins = np.ascontiguousarray(np.broadcast_to(np.asarray(origins, dtype=np.float32), dirs.shape))
+        n = len(dirs)
+        limit = np.broadcast_to(np.asarray(t_max, dtype=np.float32), (n,))
+
+        hit = np.zeros(n, dtype=bool)
+        if n == 0:
+            return hit
+
+        # tipo por tipo; los rayos ya bloqueados no se vuelven a probar
+        for group in self.groups:
+            rays = np.flatnonzero(~hit)
+            step = max(1, PAIR_BUDGET // len(group.ids))
+            for s in range(0, len(rays), step):
+                r = rays[s:s + step]
+                T = self._part_distances(group, group.params, origins[r], dirs[r])
+                hit[r] = ((T > t_min) & (T < limit[r, None])).any(axis=1)
+
+        for i, obj in self.objects:
+            rays = np.flatnonzero(~hit)
+            t = obj.hit_distance_many(origins[rays], dirs[rays])
+            hit[rays] = (t > t_min) & (t < limit[rays])
+        return hit
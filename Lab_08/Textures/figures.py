@@ -1,5 +1,6 @@
+import math
 import numpy as np
-from Textures.MathLib import normalize
+from Textures.MathLib import normalize, dot_many, normalize_many, solve_quartic, solve_quartic_many
 from Textures.intercept import Intercept
 from Textures.material import Material
 
@@ -15,6 +16,57 @@ class Shape:
     def ray_intersect(self, orig, dir):
         raise NotImplementedError
 
+    def hit_distance(self, orig, dir):
+        """
+        Solo el parámetro t del hit más cercano (o None), sin crear el
+        Intercept ni calcular la normal. Es lo único que necesitan las
+        consultas de oclusión (sombras, AO).
+        """
+        hit = self.ray_intersect(orig, dir)
+        return None if hit is None else hit.distance
+
+    def aabb(self):
+        """Caja envolvente (min, max) en mundo, o None si la figura no es acotada."""
+        return None
+
+    def ray_intersect_many(self, origins, dirs, t_max=np.inf):
+        """
+        Intersección por lotes de N rayos.
+        - origins: (N,3) o (3,) si todos salen del mismo punto
+        - dirs: (N,3) direcciones unitarias
+        - t_max: escalar o (N,) — solo cuentan los hits con t < t_max
+        Retorna (t, normal, mask) como arrays (N,), (N,3), (N,) bool.
+
+        Implementación genérica: recorre los rayos con ray_intersect.
+        Las figuras que lo necesiten la reemplazan por una versión vectorizada.
+        """
+        dirs = np.asarray(dirs, dtype=np.float32)
+        origins = np.broadcast_to(np.asarray(origins, dtype=np.float32), dirs.shape)
+        n = len(dirs)
+        t = np.full(n, np.inf, dtype=np.float32)
+        normals = np.zeros((n, 3), dtype=np.float32)
+        for i in range(n):
+            hit = self.ray_intersect(origins[i], dirs[i])
+            if hit is not None:
+                t[i] = hit.distance
+                normals[i] = hit.normal
+        return _finish_many(t, normals, np.isfinite(t), t_max)
+
+    def hit_distance_many(self, origins, dirs):
+        """Versión por lotes de hit_distance: t por rayo, inf donde no hay hit."""
+        return self.ray_intersect_many(origins, dirs)[0]
+
+
+def _finish_many(t, normals, valid, t_max):
+    """Aplica t_max y deja t = inf en los rayos que no chocan."""
+    mask = valid & (t < t_max)
+    t = np.where(mask, t, np.inf).astype(np.float32)
+    return t, normals, mask
+
+def _hit_points(origins, dirs, t, valid):
+    """Puntos de impacto (N,3); los rayos sin hit quedan en su origen."""
+    return origins + dirs * np.where(valid, t, 0.0)[..., None]
+
 
 #   Esfera
 class Sphere(Shape):
@@ -23,7 +75,11 @@ class Sphere(Shape):
         self.radius = float(radius)
         self.type = "Sphere"
 
-    def ray_intersect(self, orig, dir):
+    def aabb(self):
+        r = np.float32(self.radius)
+        return self.position - r, self.position + r
+
+    def hit_distance(self, orig, dir):
         L = self.position - orig
         tca = np.dot(L, dir)
         d2 = np.dot(L, L) - tca * tca
@@ -37,11 +93,46 @@ class Sphere(Shape):
         t = t0 if t0 > EPS else t1
         if t < EPS:
             return None
+        return t
+
+    def ray_intersect(self, orig, dir):
+        t = self.hit_distance(orig, dir)
+        if t is None:
+            return None
 
         hit = orig + dir * t
         normal = normalize(hit - self.position)
         return Intercept(point=hit, normal=normal, distance=t, obj=self)
 
+    def hit_distance_many(self, origins, dirs):
+        return sphere_distance_many(origins, dirs, self.position, self.radius)
+
+    def ray_intersect_many(self, origins, dirs, t_max=np.inf):
+        t = self.hit_distance_many(origins, dirs)
+        valid = np.isfinite(t)
+        normals = sphere_normals_many(_hit_points(origins, dirs, t, valid), self.position)
+        return _finish_many(t, normals, valid, t_max)
+
+
+# Kernels por lotes: los parámetros de la figura pueden ser escalares/(3,)
+# o arrays por rayo (N,)/(N,3); así los usa también la escena compilada.
+def sphere_distance_many(origins, dirs, center, radius):
+    L = center - origins
+    tca = dot_many(L, dirs)
+    d2 = dot_many(L, L) - tca * tca
+    r2 = radius * radius
+    valid = d2 <= r2
+    thc = np.sqrt(np.maximum(r2 - d2, 0.0))
+    t0 = tca - thc
+    t1 = tca + thc
+
+    t = np.where(t0 > EPS, t0, t1)
+    valid &= t >= EPS
+    return np.where(valid, t, np.inf).astype(np.float32)
+
+def sphere_normals_many(hit, center):
+    return normalize_many(hit - center)
+
 
 #   Plano infinito
 class Plane(Shape):
@@ -50,16 +141,39 @@ class Plane(Shape):
         self.normal = normalize(np.array(normal, dtype=np.float32))
         self.type = "Plane"
 
-    def ray_intersect(self, orig, dir):
+    def hit_distance(self, orig, dir):
         denom = np.dot(dir, self.normal)
         if abs(denom) < 1e-6:
             return None  # rayo paralelo
         t = np.dot(self.position - orig, self.normal) / denom
         if t < EPS:
             return None
+        return t
+
+    def ray_intersect(self, orig, dir):
+        t = self.hit_distance(orig, dir)
+        if t is None:
+            return None
         hit = orig + dir * t
         return Intercept(point=hit, normal=self.normal, distance=t, obj=self)
 
+    def hit_distance_many(self, origins, dirs):
+        return plane_distance_many(origins, dirs, self.position, self.normal)
+
+    def ray_intersect_many(self, origins, dirs, t_max=np.inf):
+        t = self.hit_distance_many(origins, dirs)
+        normals = np.broadcast_to(self.normal, dirs.shape)
+        return _finish_many(t, normals, np.isfinite(t), t_max)
+
+
+def plane_distance_many(origins, dirs, point, normal):
+    denom = dot_many(dirs, normal)
+    valid = np.abs(denom) >= 1e-6
+    safe = np.where(valid, denom, 1.0)
+    t = dot_many(point - origins, normal) / safe
+    valid &= t >= EPS
+    return np.where(valid, t, np.inf).astype(np.float32)
+
 
 #   Disco
 class Disk(Plane):
@@ -68,15 +182,32 @@ class Disk(Plane):
         self.radius = float(radius)
         self.type = "Disk"
 
-    def ray_intersect(self, orig, dir):
-        plane_hit = super().ray_intersect(orig, dir)
-        if plane_hit is None:
+    def aabb(self):
+        # extensión del disco en cada eje: r * sqrt(1 - n_i^2)
+        ext = self.radius * np.sqrt(np.maximum(0.0, 1.0 - self.normal * self.normal))
+        return self.position - ext, self.position + ext
+
+    # ray_intersect / ray_intersect_many se heredan de Plane y usan estas distancias
+    def hit_distance(self, orig, dir):
+        t = super().hit_distance(orig, dir)
+        if t is None:
             return None
-        v = plane_hit.point - self.position
+        v = orig + dir * t - self.position
         if np.dot(v, v) <= self.radius * self.radius + 1e-8:
-            return plane_hit
+            return t
         return None
 
+    def hit_distance_many(self, origins, dirs):
+        return disk_distance_many(origins, dirs, self.position, self.normal, self.radius)
+
+
+def disk_distance_many(origins, dirs, point, normal, radius):
+    t = plane_distance_many(origins, dirs, point, normal)
+    valid = np.isfinite(t)
+    v = _hit_points(origins, dirs, t, valid) - point
+    valid &= dot_many(v, v) <= radius * radius + 1e-8
+    return np.where(valid, t, np.inf).astype(np.float32)
+
 
 #   Triángulo
 class Triangle(Shape):
@@ -88,7 +219,11 @@ class Triangle(Shape):
         self.normal = normalize(np.cross(self.B - self.A, self.C - self.A))
         self.type = "Triangle"
 
-    def ray_intersect(self, orig, dir):
+    def aabb(self):
+        pts = np.stack([self.A, self.B, self.C])
+        return pts.min(axis=0), pts.max(axis=0)
+
+    def hit_distance(self, orig, dir):
         # Intersección con el plano del triángulo
         denom = np.dot(dir, self.normal)
         if abs(denom) < 1e-6:
@@ -115,10 +250,50 @@ class Triangle(Shape):
         v = (dot00 * dot12 - dot01 * dot02) * invDen
 
         if (u >= -1e-6) and (v >= -1e-6) and (u + v <= 1.0 + 1e-6):
-            return Intercept(point=P, normal=self.normal, distance=t, obj=self)
+            return t
 
         return None
 
+    def ray_intersect(self, orig, dir):
+        t = self.hit_distance(orig, dir)
+        if t is None:
+            return None
+        P = orig + dir * t
+        return Intercept(point=P, normal=self.normal, distance=t, obj=self)
+
+    def hit_distance_many(self, origins, dirs):
+        return triangle_distance_many(origins, dirs, self.A, self.B, self.C, self.normal)
+
+    def ray_intersect_many(self, origins, dirs, t_max=np.inf):
+        t = self.hit_distance_many(origins, dirs)
+        normals = np.broadcast_to(self.normal, dirs.shape)
+        return _finish_many(t, normals, np.isfinite(t), t_max)
+
+def triangle_distance_many(origins, dirs, A, B, C, normal):
+    denom = dot_many(dirs, normal)
+    valid = np.abs(denom) >= 1e-6
+    t = dot_many(A - origins, normal) / np.where(valid, denom, 1.0)
+    valid &= t >= EPS
+
+    P = _hit_points(origins, dirs, t, valid)
+
+    v0 = C - A
+    v1 = B - A
+    v2 = P - A
+
+    dot00 = dot_many(v0, v0)
+    dot01 = dot_many(v0, v1)
+    dot11 = dot_many(v1, v1)
+    dot02 = dot_many(v2, v0)
+    dot12 = dot_many(v2, v1)
+
+    invDen = 1.0 / (dot00 * dot11 - dot01 * dot01 + 1e-20)
+    u = (dot11 * dot02 - dot01 * dot12) * invDen
+    v = (dot00 * dot12 - dot01 * dot02) * invDen
+
+    valid &= (u >= -1e-6) & (v >= -1e-6) & (u + v <= 1.0 + 1e-6)
+    return np.where(valid, t, np.inf).astype(np.float32)
+
 class Cube(Shape):
     def __init__(self, min_point, max_point, material):
         super().__init__(min_point, material)
@@ -126,7 +301,10 @@ class Cube(Shape):
         self.max = np.array(max_point, dtype=np.float32)
         self.type = "Cube"
 
-    def ray_intersect(self, orig, dir):
+    def aabb(self):
+        return np.minimum(self.min, self.max), np.maximum(self.min, self.max)
+
+    def hit_distance(self, orig, dir):
         inv = 1.0 / (dir + 1e-12)
         tmin = (self.min - orig) * inv
         tmax = (self.max - orig) * inv
@@ -143,6 +321,12 @@ class Cube(Shape):
         t = t_near if t_near > EPS else t_far
         if t < EPS:
             return None
+        return t
+
+    def ray_intersect(self, orig, dir):
+        t = self.hit_distance(orig, dir)
+        if t is None:
+            return None
 
         hit = orig + dir * t
 
@@ -158,6 +342,51 @@ class Cube(Shape):
 
         return Intercept(point=hit, normal=normal, distance=t, obj=self)
 
+    def hit_distance_many(self, origins, dirs):
+        return box_distance_many(origins, dirs, self.min, self.max)
+
+    def ray_intersect_many(self, origins, dirs, t_max=np.inf):
+        t = self.hit_distance_many(origins, dirs)
+        valid = np.isfinite(t)
+        normals = _cube_normals(_hit_points(origins, dirs, t, valid), self.min, self.max)
+        return _finish_many(t, normals, valid, t_max)
+
+
+def box_distance_many(origins, dirs, bmin, bmax):
+    """Prueba de slabs contra cajas alineadas a los ejes."""
+    inv = 1.0 / (dirs + 1e-12)
+    tmin = (bmin - origins) * inv
+    tmax = (bmax - origins) * inv
+
+    lo = np.minimum(tmin, tmax)
+    hi = np.maximum(tmin, tmax)
+    # max/min por componente: más rápido que reducir un eje de tamaño 3
+    t_near = np.maximum(np.maximum(lo[..., 0], lo[..., 1]), lo[..., 2])
+    t_far = np.minimum(np.minimum(hi[..., 0], hi[..., 1]), hi[..., 2])
+
+    valid = (t_near <= t_far) & (t_far >= 0)
+    t = np.where(t_near > EPS, t_near, t_far)
+    valid &= t >= EPS
+    return np.where(valid, t, np.inf).astype(np.float32)
+
+
+# Normales de cara con el mismo orden de prioridad que Cube.ray_intersect
+_CUBE_FACE_NORMALS = np.array([
+    [-1, 0, 0], [1, 0, 0],
+    [0, -1, 0], [0, 1, 0],
+    [0, 0, -1], [0, 0, 1],
+    [0, 0, 0],
+], dtype=np.float32)
+
+def _cube_normals(hit, bmin, bmax, eps=1e-4):
+    faces = np.stack([
+        np.abs(hit[:, 0] - bmin[..., 0]) < eps, np.abs(hit[:, 0] - bmax[..., 0]) < eps,
+        np.abs(hit[:, 1] - bmin[..., 1]) < eps, np.abs(hit[:, 1] - bmax[..., 1]) < eps,
+        np.abs(hit[:, 2] - bmin[..., 2]) < eps, np.abs(hit[:, 2] - bmax[..., 2]) < eps,
+        np.ones(len(hit), dtype=bool),
+    ], axis=1)
+    return _CUBE_FACE_NORMALS[np.argmax(faces, axis=1)]
+
 
 #   Cilindro (eje Y) con tapas
 class Cylinder(Shape):
@@ -167,7 +396,15 @@ class Cylinder(Shape):
         self.height = float(height)
         self.type = "Cylinder"
 
-    def ray_intersect(self, orig, dir):
+    def aabb(self):
+        ext = np.array([self.radius, self.height * 0.5, self.radius], dtype=np.float32)
+        return self.position - ext, self.position + ext
+
+    def _nearest(self, orig, dir):
+        """
+        Hit más cercano en coordenadas locales: (t, parte) o None.
+        parte = 0 cuerpo, +1 tapa superior, -1 tapa inferior.
+        """
         cx, cy, cz = self.position
         ox, oy, oz = orig
         dx, dy, dz = dir
@@ -179,7 +416,8 @@ class Cylinder(Shape):
         c = ox*ox + oz*oz - self.radius*self.radius
 
         t_side = None
-        n_side = None
+        y_min = -self.height * 0.5
+        y_max =  self.height * 0.5
 
         if abs(a) > 1e-12:
             disc = b*b - 4*a*c
@@ -192,19 +430,12 @@ class Cylinder(Shape):
                 for t_candidate in (t0, t1):
                     if t_candidate > EPS:
                         y_hit = oy + dy * t_candidate
-                        y_min = -self.height * 0.5
-                        y_max =  self.height * 0.5
                         if y_min - 1e-6 <= y_hit <= y_max + 1e-6:
                             t_side = t_candidate
-                            hit_local = np.array([ox + dx*t_side, y_hit, oz + dz*t_side], dtype=np.float32)
-                            n_local = np.array([hit_local[0], 0.0, hit_local[2]], dtype=np.float32)
-                            n_side = normalize(n_local)
                             break
 
         t_cap = None
-        n_cap = None
-        y_min = -self.height * 0.5
-        y_max =  self.height * 0.5
+        cap = 0
 
         if abs(dy) > 1e-12:
             t_top = (y_max - oy) / dy
@@ -213,7 +444,7 @@ class Cylinder(Shape):
                 zh = oz + dz * t_top
                 if (xh*xh + zh*zh) <= self.radius*self.radius + 1e-8:
                     t_cap = t_top
-                    n_cap = np.array([0.0, 1.0, 0.0], dtype=np.float32)
+                    cap = 1
 
             t_bottom = (y_min - oy) / dy
             if t_bottom > EPS:
@@ -222,28 +453,101 @@ class Cylinder(Shape):
                 if (xh*xh + zh*zh) <= self.radius*self.radius + 1e-8:
                     if t_cap is None or t_bottom < t_cap:
                         t_cap = t_bottom
-                        n_cap = np.array([0.0, -1.0, 0.0], dtype=np.float32)
-
-        t = None
-        n_local = None
-        if t_side is not None and t_cap is not None:
-            if t_side < t_cap:
-                t, n_local = t_side, n_side
-            else:
-                t, n_local = t_cap, n_cap
-        elif t_side is not None:
-            t, n_local = t_side, n_side
-        elif t_cap is not None:
-            t, n_local = t_cap, n_cap
-        else:
+                        cap = -1
+
+        if t_side is not None and (t_cap is None or t_side < t_cap):
+            return t_side, 0
+        if t_cap is not None:
+            return t_cap, cap
+        return None
+
+    def hit_distance(self, orig, dir):
+        nearest = self._nearest(orig, dir)
+        return None if nearest is None else nearest[0]
+
+    def ray_intersect(self, orig, dir):
+        nearest = self._nearest(orig, dir)
+        if nearest is None:
             return None
+        t, part = nearest
 
-        hit_local = np.array([ox + dx*t, oy + dy*t, oz + dz*t], dtype=np.float32)
-        hit_world = hit_local + np.array([cx, cy, cz], dtype=np.float32)
+        hit_local = np.array((orig - self.position) + dir * t, dtype=np.float32)
+        if part == 0:
+            n_local = np.array([hit_local[0], 0.0, hit_local[2]], dtype=np.float32)
+        else:
+            n_local = np.array([0.0, float(part), 0.0], dtype=np.float32)
+
+        hit_world = hit_local + self.position
         normal_world = normalize(n_local)
 
         return Intercept(point=hit_world, normal=normal_world, distance=t, obj=self)
 
+    def _nearest_many(self, origins, dirs):
+        """Versión por lotes de _nearest: arrays (t, parte), t = inf sin hit."""
+        return cylinder_nearest_many(origins, dirs, self.position, self.radius, self.height)
+
+    def hit_distance_many(self, origins, dirs):
+        return self._nearest_many(origins, dirs)[0]
+
+    def ray_intersect_many(self, origins, dirs, t_max=np.inf):
+        t, part = self._nearest_many(origins, dirs)
+        valid = np.isfinite(t)
+        hit_local = _hit_points(origins - self.position, dirs, t, valid)
+        return _finish_many(t, cylinder_normals_many(hit_local, part), valid, t_max)
+
+
+def cylinder_nearest_many(origins, dirs, center, radius, height):
+    """(t, parte) por rayo como Cylinder._nearest; parte 0 = cuerpo, ±1 = tapas."""
+    O = origins - center
+    O = np.broadcast_to(O, dirs.shape)
+    ox, oy, oz = O[:, 0], O[:, 1], O[:, 2]
+    dx, dy, dz = dirs[:, 0], dirs[:, 1], dirs[:, 2]
+    y_min = -height * 0.5
+    y_max =  height * 0.5
+    r2 = radius * radius
+
+    # Cuerpo: primer t válido (t0 y luego t1) dentro de la altura
+    a = dx*dx + dz*dz
+    b = 2.0 * (ox*dx + oz*dz)
+    c = ox*ox + oz*oz - r2
+    disc = b*b - 4*a*c
+    side_ok = (np.abs(a) > 1e-12) & (disc >= 0.0)
+    rdisc = np.sqrt(np.maximum(disc, 0.0))
+    two_a = np.where(side_ok, 2*a, 1.0)
+    t0 = (-b - rdisc) / two_a
+    t1 = (-b + rdisc) / two_a
+    t0, t1 = np.minimum(t0, t1), np.maximum(t0, t1)
+
+    t_side = np.full(len(dirs), np.inf, dtype=np.float32)
+    for t_candidate in (t1, t0):
+        y_hit = oy + dy * t_candidate
+        ok = side_ok & (t_candidate > EPS) & (y_min - 1e-6 <= y_hit) & (y_hit <= y_max + 1e-6)
+        t_side = np.where(ok, t_candidate, t_side)
+
+    # Tapas
+    cap_ok = np.abs(dy) > 1e-12
+    safe_dy = np.where(cap_ok, dy, 1.0)
+    t_cap = np.full(len(dirs), np.inf, dtype=np.float32)
+    cap = np.zeros(len(dirs), dtype=np.int8)
+    for y_plane, side in ((y_max, 1), (y_min, -1)):
+        t_plane = (y_plane - oy) / safe_dy
+        xh = ox + dx * t_plane
+        zh = oz + dz * t_plane
+        ok = cap_ok & (t_plane > EPS) & (xh*xh + zh*zh <= r2 + 1e-8) & (t_plane < t_cap)
+        t_cap = np.where(ok, t_plane, t_cap)
+        cap = np.where(ok, side, cap)
+
+    use_side = t_side < t_cap
+    t = np.where(use_side, t_side, t_cap).astype(np.float32)
+    part = np.where(use_side, 0, cap)
+    return t, part
+
+def cylinder_normals_many(hit_local, part):
+    n_side = normalize_many(hit_local * np.array([1.0, 0.0, 1.0], dtype=np.float32))
+    n_cap = np.zeros_like(n_side)
+    n_cap[:, 1] = part
+    return np.where((part == 0)[:, None], n_side, n_cap)
+
 
 #   Elipsoide
 class Ellipsoid(Shape):
@@ -255,7 +559,11 @@ class Ellipsoid(Shape):
         self.rx, self.ry, self.rz = map(float, radii)
         self.type = "Ellipsoid"
 
-    def ray_intersect(self, orig, dir):
+    def aabb(self):
+        ext = np.array([self.rx, self.ry, self.rz], dtype=np.float32)
+        return self.position - ext, self.position + ext
+
+    def hit_distance(self, orig, dir):
         o = (orig - self.position) / np.array([self.rx, self.ry, self.rz], dtype=np.float32)
         d = dir / np.array([self.rx, self.ry, self.rz], dtype=np.float32)
 
@@ -274,7 +582,15 @@ class Ellipsoid(Shape):
         t = t0 if t0 > EPS else t1
         if t < EPS:
             return None
+        return t
+
+    def ray_intersect(self, orig, dir):
+        t = self.hit_distance(orig, dir)
+        if t is None:
+            return None
 
+        o = (orig - self.position) / np.array([self.rx, self.ry, self.rz], dtype=np.float32)
+        d = dir / np.array([self.rx, self.ry, self.rz], dtype=np.float32)
         p_unit = o + d * t
         hit = self.position + p_unit * np.array([self.rx, self.ry, self.rz], dtype=np.float32)
 
@@ -286,6 +602,41 @@ class Ellipsoid(Shape):
 
         return Intercept(point=hit, normal=normal, distance=t, obj=self)
 
+    def radii(self):
+        return np.array([self.rx, self.ry, self.rz], dtype=np.float32)
+
+    def hit_distance_many(self, origins, dirs):
+        return ellipsoid_distance_many(origins, dirs, self.position, self.radii())
+
+    def ray_intersect_many(self, origins, dirs, t_max=np.inf):
+        t = self.hit_distance_many(origins, dirs)
+        valid = np.isfinite(t)
+        p_local = _hit_points(origins - self.position, dirs, t, valid)
+        return _finish_many(t, ellipsoid_normals_many(p_local, self.radii()), valid, t_max)
+
+
+def ellipsoid_distance_many(origins, dirs, center, radii):
+    o = (origins - center) / radii
+    d = dirs / radii
+
+    a = dot_many(d, d)
+    b = 2.0 * dot_many(o, d)
+    c = dot_many(o, o) - 1.0
+
+    disc = b*b - 4*a*c
+    valid = disc >= 0
+    rdisc = np.sqrt(np.maximum(disc, 0.0))
+    t0 = (-b - rdisc) / (2*a)
+    t1 = (-b + rdisc) / (2*a)
+
+    t = np.where(t0 > EPS, t0, t1)
+    valid &= t >= EPS
+    return np.where(valid, t, np.inf).astype(np.float32)
+
+def ellipsoid_normals_many(p_local, radii):
+    # Normal: gradiente de la cuádrica, igual que en ray_intersect
+    return normalize_many(p_local / (radii * radii))
+
 
 #   Toroide (dona) — cuártico
 class Torus(Shape):
@@ -295,36 +646,50 @@ class Torus(Shape):
         self.r = float(r)  # radio menor
         self.type = "Torus"
 
-    def ray_intersect(self, orig, dir):
-        # Rayo en coords locales del toro
-        O = orig - self.position
-        D = dir
+    def aabb(self):
+        # eje de revolución: Z (ver el término 4R^2 (r^2 - z^2) del cuártico)
+        ext = np.array([self.R + self.r, self.R + self.r, self.r], dtype=np.float32)
+        return self.position - ext, self.position + ext
+
+    def _coeffs(self, ox, oy, oz, dx, dy, dz):
+        """Coeficientes del cuártico en t (sirve igual con floats o con arrays)."""
+        return _torus_coeffs(self.R, self.r, ox, oy, oz, dx, dy, dz)
+
+    def hit_distance(self, orig, dir):
+        # Rayo en coords locales del toro (en float64 de Python)
+        ox, oy, oz = (float(c) for c in orig - self.position)
+        dx, dy, dz = (float(c) for c in dir)
+
+        # Descarte rápido con la esfera envolvente de radio R + r
+        rb = self.R + self.r
+        dd = dx*dx + dy*dy + dz*dz
+        half_b = ox*dx + oy*dy + oz*dz
+        disc = half_b*half_b - dd * (ox*ox + oy*oy + oz*oz - rb*rb)
+        if disc < 0.0:
+            return None
+        sq = math.sqrt(disc)
+        if (-half_b + sq) / dd <= EPS:
+            return None
 
-        ox, oy, oz = O
-        dx, dy, dz = D
-        R, r = self.R, self.r
+        # Se resuelve desde la entrada a la esfera: coeficientes más pequeños
+        # y raíces más estables que desde un origen lejano
+        shift = max(0.0, (-half_b - sq) / dd)
+        ox += dx * shift; oy += dy * shift; oz += dz * shift
 
-        # Coeficientes del cuártico en t
-        sum_d_sq = dx*dx + dy*dy + dz*dz
-        e = ox*ox + oy*oy + oz*oz - R*R - r*r
-        f = ox*dx + oy*dy + oz*dz
-        four_R2 = 4.0 * R * R
-
-        coeffs = [
-            sum_d_sq*sum_d_sq,
-            4.0*sum_d_sq*f,
-            2.0*sum_d_sq*e + 4.0*f*f + four_R2*dz*dz,
-            4.0*f*e + 2.0*four_R2*oz*dz,
-            e*e - four_R2*(r*r - oz*oz)
-        ]
-
-        roots = np.roots(coeffs)
-        roots = [t.real for t in roots if abs(t.imag) < 1e-6 and t > EPS]
-        if not roots:
-            return None
+        roots = solve_quartic(*self._coeffs(ox, oy, oz, dx, dy, dz))
+        for t in roots:
+            if t + shift > EPS:
+                return t + shift
+        return None
 
-        t = min(roots)
+    def ray_intersect(self, orig, dir):
+        t = self.hit_distance(orig, dir)
+        if t is None:
+            return None
 
+        O = orig - self.position
+        D = dir
+        R, r = self.R, self.r
         hit_local = O + t * D
 
         # Gradiente de F(x,y,z) del toroide para la normal
@@ -344,3 +709,61 @@ class Torus(Shape):
             texCoords=None,
             rayDirection=dir
         )
+
+    def hit_distance_many(self, origins, dirs):
+        return torus_distance_many(origins, dirs, self.position, self.R, self.r)
+
+    def ray_intersect_many(self, origins, dirs, t_max=np.inf):
+        t = self.hit_distance_many(origins, dirs)
+        valid = np.isfinite(t)
+        p_local = _hit_points(np.broadcast_to(origins - self.position, dirs.shape), dirs, t, valid)
+        return _finish_many(t, torus_normals_many(p_local, self.R, self.r), valid, t_max)
+
+
+def _torus_coeffs(R, r, ox, oy, oz, dx, dy, dz):
+    """Coeficientes del cuártico del toro (eje Z) en t; floats o arrays."""
+    sum_d_sq = dx*dx + dy*dy + dz*dz
+    e = ox*ox + oy*oy + oz*oz - R*R - r*r
+    f = ox*dx + oy*dy + oz*dz
+    four_R2 = 4.0 * R * R
+    return (
+        sum_d_sq*sum_d_sq,
+        4.0*sum_d_sq*f,
+        2.0*sum_d_sq*e + 4.0*f*f + four_R2*dz*dz,
+        4.0*f*e + 2.0*four_R2*oz*dz,
+        e*e - four_R2*(r*r - oz*oz),
+    )
+
+def torus_distance_many(origins, dirs, center, R, r):
+    O = np.broadcast_to(origins - center, dirs.shape).astype(np.float64)
+    D = dirs.astype(np.float64)
+    t = np.full(len(dirs), np.inf, dtype=np.float32)
+
+    # Descarte con la esfera envolvente: solo esos rayos resuelven el cuártico
+    rb = R + r
+    dd = np.sum(D * D, axis=1)
+    half_b = np.sum(O * D, axis=1)
+    disc = half_b*half_b - dd * (np.sum(O * O, axis=1) - rb*rb)
+    sq = np.sqrt(np.maximum(disc, 0.0))
+    cand = (disc >= 0.0) & ((-half_b + sq) / dd > EPS)
+    if not cand.any():
+        return t
+
+    shift = np.maximum(0.0, (-half_b[cand] - sq[cand]) / dd[cand])
+    Oc = O[cand] + D[cand] * shift[:, None]
+    Dc = D[cand]
+    Rc = R[cand] if np.ndim(R) else R
+    rc = r[cand] if np.ndim(r) else r
+    coeffs = np.stack(_torus_coeffs(Rc, rc, Oc[:, 0], Oc[:, 1], Oc[:, 2],
+                                    Dc[:, 0], Dc[:, 1], Dc[:, 2]), axis=1)
+
+    roots = solve_quartic_many(coeffs) + shift[:, None]
+    roots = np.where(roots > EPS, roots, np.inf)  # NaN > EPS es False
+    t[cand] = roots.min(axis=1)
+    return t
+
+def torus_normals_many(p_local, R, r):
+    # Gradiente de F(x,y,z) del toroide
+    x, y, z = p_local.T
+    g = x*x + y*y + z*z - r*r - R*R
+    return normalize_many(np.stack([4.0*x*g, 4.0*y*g, 4.0*z*(g + 2.0*R*R)], axis=1))
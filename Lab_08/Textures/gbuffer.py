@@ -0,0 +1,100 @@
+import os
+
+import numpy as np
+
+from Textures.cache import RENDER_OPTIONS, fingerprint
+
+
+def geometry_key(rt):
+    """Hash de figuras, materiales, cámara, resolución y opciones: todo menos las luces."""
+    options = {name: getattr(rt, name) for name in RENDER_OPTIONS}
+    return fingerprint("gbuffer", options, list(rt.scene))
+
+
+class GBuffer:
+    """
+    G-buffer de un frame: por bloque de filas y por muestra, el árbol de hits
+    que arma Raytracer._trace_rays (punto, normal, vector de vista, material,
+    figura y AO de cada hit, más los rebotes reflejados / refractados).
+
+    Con las mismas figuras y cámara (`key`), Raytracer.relight() re-sombrea
+    el frame con otras luces sin volver a trazar la visibilidad.
+    """
+
+    def __init__(self, key, width, height, blocks):
+        self.key = key
+        self.width = width
+        self.height = height
+        self.blocks = blocks      # [(y0, y1, [árbol por muestra])]
+
+    def primary(self):
+        """
+        Pase primario por pixel (primera muestra): dict con point, normal y
+        view (H,W,3; NaN sin hit) y material y object (H,W; -1 sin hit).
+        """
+        h, w = self.height, self.width
+        out = {
+            "point": np.full((h * w, 3), np.nan, dtype=np.float32),
+            "normal": np.full((h * w, 3), np.nan, dtype=np.float32),
+            "view": np.full((h * w, 3), np.nan, dtype=np.float32),
+            "material": np.full(h * w, -1, dtype=np.int32),
+            "object": np.full(h * w, -1, dtype=np.int32),
+        }
+        for y0, y1, samples in self.blocks:
+            node = samples[0]
+            pixels = y0 * w + node["hit"]
+            for name in out:
+                if len(pixels):
+                    out[name][pixels] = node[name]
+        return {name: value.reshape((h, w) + value.shape[1:]) for name, value in out.items()}
+
+    def save(self, path):
+        """
+        Guarda el G-buffer en un `.npz` sin pickle: cada array del árbol va
+        con su ruta como nombre ("blocks/0/2/0/point", ...). Las sombras por
+        luz no se guardan; se vuelven a trazar en el primer relight().
+        """
+        arrays = {}
+        _flatten({"key": self.key, "width": self.width, "height": self.height,
+                  "blocks": self.blocks}, "", arrays)
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def load(path):
+        """Arma un GBuffer desde un `.npz` de save() (con allow_pickle=False)."""
+        root = {}
+        with np.load(path, allow_pickle=False) as data:
+            for name in data.files:
+                *parents, leaf = name.split("/")
+                node = root
+                for part in parents:
+                    node = node.setdefault(part, {})
+                value = data[name]
+                node[leaf] = value.item() if value.ndim == 0 else value
+        root = _lists(root)
+        return GBuffer(root["key"], root["width"], root["height"], root["blocks"])
+
+
+def _flatten(value, prefix, out):
+    """Arrays del árbol en `out` por ruta; listas y tuplas van con índices como nombre."""
+    if isinstance(value, dict):
+        for name, item in value.items():
+            if name != "shadows":
+                _flatten(item, f"{prefix}{name}/", out)
+    elif isinstance(value, (list, tuple)):
+        for i, item in enumerate(value):
+            _flatten(item, f"{prefix}{i}/", out)
+    else:
+        out[prefix[:-1]] = np.asarray(value)
+
+
+def _lists(node):
+    """Inversa de _flatten: los dicts con claves 0..n-1 vuelven a ser listas."""
+    if not isinstance(node, dict):
+        return node
+    node = {name: _lists(item) for name, item in node.items()}
+    if node and all(name.isdigit() for name in node):
+        return [node[str(i)] for i in range(len(node))]
+    return node
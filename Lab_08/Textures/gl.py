@@ -1,11 +1,18 @@
 import math
+import zipfile
 import numpy as np
 
 from Textures.MathLib import normalize, reflect as reflect_vec, refract as refract_vec
+from Textures.MathLib import dot_many, normalize_many, reflect_many, refract_many
+from Textures.bvh import BVH
+from Textures.compiled import CompiledScene, SceneList
+from Textures.gbuffer import GBuffer, geometry_key
+from Textures.sampling import Sampler
 from Textures.material import (
     MAT_DIFFUSE,
     MAT_REFLECTIVE,
     MAT_REFRACTIVE,   
+    MaterialTable,
 )
 
 EPS = 1e-4
@@ -19,6 +26,13 @@ def clamp01(x):
 def to_np3(x):
     return np.array(x, dtype=np.float32)
 
+def _bayer(n):
+    """Matriz de Bayer n x n (n potencia de 2): orden de refinamiento progresivo."""
+    m = np.zeros((1, 1), dtype=np.int32)
+    while m.shape[0] < n:
+        m = np.block([[4 * m, 4 * m + 2], [4 * m + 3, 4 * m + 1]])
+    return m
+
 # Raytracer  
 class Raytracer:
     def __init__(
@@ -30,6 +44,11 @@ class Raytracer:
         ao_samples=8,
         ao_distance=2.0,
         max_depth=2,
+        use_bvh=True,
+        use_compiled=True,
+        sampler="stratified",
+        seed=0,
+        ao_cache=False,
     ):
         self.width = int(width)
         self.height = int(height)
@@ -57,6 +76,39 @@ class Raytracer:
         self.ao_distance = float(ao_distance)
         self.max_depth = int(max_depth)
 
+        # Muestras de jitter y AO (ver Textures/sampling.py): deterministas por
+        # semilla y pixel, así tiles, pasadas y procesos dan la misma imagen
+        self.sampler = str(sampler)
+        self.seed = int(seed)
+
+        # Caché de AO por pixel (ver _ambient_occlusion_many): con la escena y
+        # la cámara fijas, los renders siguientes sólo re-sombrean
+        self.ao_cache = bool(ao_cache)
+        self._ao_store = {}
+        self._ao_store_key = None
+
+        # Aceleración (BVH y escena compilada); se reconstruyen cuando cambia la escena
+        self.use_bvh = bool(use_bvh)
+        self.use_compiled = bool(use_compiled)
+        self._bvh = None
+        self._bvh_key = None
+        self._compiled = None
+        self._compiled_key = None
+        self._materials = None
+        self._materials_key = None
+
+        # Registro de segmentos de rayo (ver Textures/cache.py); None = desactivado
+        self._ray_log = None
+
+        # G-buffer del último render_gbuffer() (ver relight)
+        self.gbuffer = None
+
+        # Rejilla de rayos primarios (ver _update_camera)
+        self._camera_key = None
+        self._camera_plane = None
+        self._ray_grid = None
+        self._sampler = None
+
         # precálculo del frustum
         self._update_camera()
 
@@ -73,42 +125,345 @@ class Raytracer:
         self.half_w = aspect * scale
         self.half_h = scale
 
+        # Direcciones de los rayos primarios de todos los píxeles (H,W,3) y
+        # generador de muestras: se rehacen sólo si cambian eye, target, up,
+        # fov, la resolución o el sampler; los tiles sólo toman su rebanada
+        key = (to_np3(self.eye).tobytes(), to_np3(self.target).tobytes(),
+               to_np3(self.up).tobytes(), float(self.fov), self.width, self.height,
+               self.sampler, self.seed)
+        if key != self._camera_key:
+            inv_w = 1.0 / (self.width - 1)
+            inv_h = 1.0 / (self.height - 1)
+            u = ((np.arange(self.width, dtype=np.float32) + 0.5) * inv_w) * 2.0 - 1.0
+            v = (1.0 - (np.arange(self.height, dtype=np.float32) + 0.5) * inv_h) * 2.0 - 1.0
+            u, v = np.meshgrid(u, v)
+            self._camera_plane = (self.forward +
+                                  (u * self.half_w)[..., None] * self.right +
+                                  (v * self.half_h)[..., None] * self.true_up)
+            self._ray_grid = normalize_many(self._camera_plane)
+            # desplazar la muestra (dx, dy) píxeles mueve el punto del plano en dx*du + dy*dv
+            self._du = self.right * np.float32(2.0 * inv_w * self.half_w)
+            self._dv = self.true_up * np.float32(-2.0 * inv_h * self.half_h)
+            self._sampler = Sampler(self.sampler, self.seed, self.width)
+            self._camera_key = key
+
     def update_camera(self):
         self._update_camera()
 
-    def render(self):
-        self._update_camera()
+    def render(self, mode="scalar", cache=None):
+        """
+        Renderiza la escena en self.framebuffer.
+        - mode="scalar": pixel por pixel (referencia).
+        - mode="wavefront": lotes de rayos con NumPy (ver render_wavefront).
+        - mode="parallel": tiles repartidos entre procesos (ver render_parallel).
+        - mode="progressive": de baja a alta resolución (ver render_progressive).
+        - mode="gbuffer": como "wavefront", guardando el G-buffer (ver render_gbuffer).
+        - cache: RenderCache (Textures/cache.py) para reusar renders anteriores.
+        """
+        if cache is not None:
+            return cache.render(self, mode)
+        if mode == "wavefront":
+            return self.render_wavefront()
+        if mode == "parallel":
+            return self.render_parallel()
+        if mode == "gbuffer":
+            return self.render_gbuffer()
+        if mode == "progressive":
+            for done, total in self.render_progressive():
+                print(f"{int(100*done/total)}% ...")
+            return
+        if mode != "scalar":
+            raise ValueError(f"modo de render desconocido: {mode!r}")
 
-        spp = self.samples_per_pixel
-        inv_w = 1.0 / (self.width - 1)
-        inv_h = 1.0 / (self.height - 1)
+        self._update_camera()
 
         for y in range(self.height):
             if self.height >= 20 and y % (self.height // 20 or 1) == 0:
                 print(f"{int(100*y/self.height)}% ...")
+            self.render_tile(0, y, self.width, y + 1, mode="scalar")
 
-            for x in range(self.width):
-                col = np.zeros(3, dtype=np.float32)
+        print("100% ... listo!")
 
-                for s in range(spp):
-                    jx = (np.random.rand() - 0.5) if spp > 1 else 0.0
-                    jy = (np.random.rand() - 0.5) if spp > 1 else 0.0
+    # Render por frentes de onda (wavefront)
+    def render_wavefront(self, tile_rows=32):
+        """
+        Igual que render(), pero procesa bloques de `tile_rows` filas como
+        lotes de rayos (N,3): hit más cercano, sombras y sombreado se hacen
+        sobre todo el lote con NumPy en lugar de pixel por pixel.
+        """
+        self._update_camera()
+        tile_rows = max(1, int(tile_rows))
+
+        for y0 in range(0, self.height, tile_rows):
+            print(f"{int(100*y0/self.height)}% ...")
+            self.render_tile(0, y0, self.width, min(self.height, y0 + tile_rows))
+
+        print("100% ... listo!")
+
+    # Render en varios procesos
+    def render_parallel(self, workers=None, tile_size=32, tile_mode="wavefront"):
+        """
+        Reparte tiles de `tile_size` x `tile_size` entre `workers` procesos
+        (por defecto, todos los núcleos). Ver Textures/parallel.py.
+        """
+        from Textures.parallel import render_parallel
+        render_parallel(self, workers=workers, tile_size=tile_size, tile_mode=tile_mode)
+
+    # Tiles
+    def render_tile(self, x0, y0, x1, y1, mode="wavefront"):
+        """
+        Renderiza el rectángulo [x0,x1) x [y0,y1) en self.framebuffer.
+        Asume que la cámara ya está actualizada (_update_camera).
+        """
+        if mode == "scalar":
+            self._render_tile_scalar(x0, y0, x1, y1)
+        else:
+            self._render_tile_wavefront(x0, y0, x1, y1)
+
+    def _render_tile_scalar(self, x0, y0, x1, y1):
+        spp = self.samples_per_pixel
 
-                    u = ((x + 0.5 + jx) * inv_w) * 2.0 - 1.0
-                    v = (1.0 - (y + 0.5 + jy) * inv_h) * 2.0 - 1.0
+        for y in range(y0, y1):
+            for x in range(x0, x1):
+                col = np.zeros(3, dtype=np.float32)
+                pixel = y * self.width + x
+                # jitter de todas las muestras del pixel de una vez
+                if spp > 1:
+                    jitter = self._sampler.points(np.full(spp, pixel), np.arange(spp), 0, spp) - 0.5
 
-                    dir_cam = normalize(self.forward +
-                                        self.right * (u * self.half_w) +
-                                        self.true_up * (v * self.half_h))
+                for s in range(spp):
+                    if spp > 1:
+                        jx, jy = jitter[s]
+                        dir_cam = normalize(self._camera_plane[y, x] + jx * self._du + jy * self._dv)
+                    else:
+                        dir_cam = self._ray_grid[y, x]
 
-                    col += self.cast_ray(self.eye, dir_cam, depth=0)
+                    col += self.cast_ray(self.eye, dir_cam, depth=0, pixel=pixel, sample=s)
 
                 self.framebuffer[y, x] = np.clip(col / spp, 0.0, 1.0)
 
+    def _render_tile_wavefront(self, x0, y0, x1, y1):
+        spp = self.samples_per_pixel
+
+        px, py = np.meshgrid(np.arange(x0, x1), np.arange(y0, y1))
+        px = px.ravel()
+        py = py.ravel()
+        col = np.zeros((len(px), 3), dtype=np.float32)
+
+        for s in range(spp):
+            col += self._trace_pixels(px, py, sample=s if spp > 1 else None)
+
+        self.framebuffer[y0:y1, x0:x1] = np.clip(col / spp, 0.0, 1.0).reshape(y1 - y0, x1 - x0, 3)
+
+    def _camera_dirs(self, px, py, sample=None):
+        """
+        Direcciones (N,3) de los rayos primarios por los píxeles enteros (px, py).
+        sample=None: centro del pixel (de la rejilla precalculada); si no, la
+        muestra `sample` con el jitter del sampler.
+        """
+        if sample is None:
+            return self._ray_grid[py, px]
+        jitter = self._sampler.points(py * self.width + px, sample, 0, self.samples_per_pixel) - 0.5
+        jx, jy = jitter[:, 0], jitter[:, 1]
+        return normalize_many(self._camera_plane[py, px] +
+                              jx[:, None].astype(np.float32) * self._du +
+                              jy[:, None].astype(np.float32) * self._dv)
+
+    def _trace_pixels(self, px, py, sample=None):
+        """Una muestra por pixel (px, py) con rayos en lote; retorna colores (N,3)."""
+        return self.cast_rays(self.eye, self._camera_dirs(px, py, sample), depth=0,
+                              pixels=py * self.width + px, sample=sample or 0)
+
+    # G-buffer y re-iluminación
+    def render_gbuffer(self, tile_rows=32):
+        """
+        Igual que render_wavefront, pero guarda en self.gbuffer el árbol de
+        hits de cada bloque (pase primario y rebotes). Si después sólo
+        cambian las luces, relight() rehace la imagen sin volver a trazar
+        rayos primarios, reflejados ni de AO: sólo sombreado y sombras.
+        """
+        self._update_camera()
+        tile_rows = max(1, int(tile_rows))
+        spp = self.samples_per_pixel
+        mats = self._get_materials()
+        blocks = []
+
+        for y0 in range(0, self.height, tile_rows):
+            print(f"{int(100*y0/self.height)}% ...")
+            y1 = min(self.height, y0 + tile_rows)
+            px, py = np.meshgrid(np.arange(self.width), np.arange(y0, y1))
+            px = px.ravel()
+            py = py.ravel()
+            samples = [self._trace_rays(self.eye, self._camera_dirs(px, py, s if spp > 1 else None),
+                                        0, mats, pixels=py * self.width + px, sample=s)
+                       for s in range(spp)]
+            blocks.append((y0, y1, samples))
+
+        self.gbuffer = GBuffer(geometry_key(self), self.width, self.height, blocks)
+        self.relight()
         print("100% ... listo!")
+        return self.gbuffer
+
+    def relight(self, gbuffer=None):
+        """
+        Rehace self.framebuffer desde el G-buffer con las luces actuales.
+        Las sombras de luces que sólo cambiaron de intensidad o color se reusan.
+        """
+        gbuffer = gbuffer or self.gbuffer
+        if gbuffer is None:
+            raise ValueError("no hay G-buffer: llamar antes a render_gbuffer()")
+        if gbuffer.key != geometry_key(self):
+            raise ValueError("el G-buffer es de otra escena, cámara u opciones de render")
+
+        mats = self._get_materials()
+        for y0, y1, samples in gbuffer.blocks:
+            col = np.zeros((samples[0]["count"], 3), dtype=np.float32)
+            for node in samples:
+                col += self._shade_rays(node, mats)
+            self.framebuffer[y0:y1] = np.clip(col / len(samples), 0.0, 1.0).reshape(y1 - y0, self.width, 3)
+        self.gbuffer = gbuffer
+
+    def load_gbuffer(self, path):
+        """Carga un G-buffer guardado (GBuffer.save) si es de esta misma escena y cámara."""
+        try:
+            gbuffer = GBuffer.load(path)
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            return False
+        if gbuffer.key != geometry_key(self):
+            return False
+        self.gbuffer = gbuffer
+        return True
+
+    # Render progresivo (vista previa)
+    def render_progressive(self, order="levels", batch_rows=32):
+        """
+        Generador: renderiza por etapas y deja en self.framebuffer una vista
+        previa cada vez mejor; hace `yield (hechos, total)` tras cada etapa
+        para que el visor la muestre.
+
+        - order="levels": 1/8, 1/4, 1/2 y resolución completa; cada etapa
+          sólo traza los píxeles que le faltan a la anterior.
+        - order="interleaved": mismo orden de píxeles (matriz de Bayer 8x8),
+          pero actualiza la vista cada 4 desplazamientos del bloque 8x8.
+        - Con samples_per_pixel > 1 sigue acumulando una muestra más por
+          pixel en cada pasada hasta llegar a samples_per_pixel.
+        """
+        if order not in ("levels", "interleaved"):
+            raise ValueError(f"orden progresivo desconocido: {order!r}")
+
+        self._update_camera()
+        spp = self.samples_per_pixel
+        h, w = self.height, self.width
+
+        rank = _bayer(8)[np.arange(h)[:, None] % 8, np.arange(w)[None, :] % 8]
+        if order == "levels":
+            stages = [0, 1, 4, 16, 64]
+        else:
+            stages = list(range(0, 65, 4))
+        stages = [(lo, hi) for lo, hi in zip(stages, stages[1:])]
+
+        total = len(stages) + (spp - 1)
+        accum = np.zeros((h, w, 3), dtype=np.float32)
+        batch = max(1, int(batch_rows)) * w
+
+        def trace(ys, xs, sample):
+            for i in range(0, len(ys), batch):
+                yb, xb = ys[i:i + batch], xs[i:i + batch]
+                accum[yb, xb] += self._trace_pixels(xb, yb, sample)
+
+        # primera muestra, de grueso a fino
+        for done, (lo, hi) in enumerate(stages, 1):
+            ys, xs = np.nonzero((rank >= lo) & (rank < hi))
+            trace(ys, xs, 0 if spp > 1 else None)
+
+            # la rejilla completa más fina define los bloques de la vista previa
+            step = 8 if hi < 4 else 4 if hi < 16 else 2 if hi < 64 else 1
+            if step > 1:
+                coarse = np.clip(accum[::step, ::step], 0.0, 1.0)
+                preview = np.repeat(np.repeat(coarse, step, 0), step, 1)[:h, :w]
+                mask = rank < hi
+                preview[mask] = np.clip(accum[mask], 0.0, 1.0)
+                self.framebuffer[:] = preview
+            else:
+                self.framebuffer[:] = np.clip(accum, 0.0, 1.0)
+            yield done, total
+
+        # muestras extra: promedio acumulado
+        ys, xs = np.nonzero(np.ones((h, w), dtype=bool))
+        for s in range(2, spp + 1):
+            trace(ys, xs, s - 1)
+            self.framebuffer[:] = np.clip(accum / s, 0.0, 1.0)
+            yield len(stages) + s - 1, total
+
+    # Pickle (procesos de render): framebuffer y BVH no viajan, se rehacen en destino
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["framebuffer"] = None
+        state["_bvh"] = None
+        state["_bvh_key"] = None
+        state["_compiled"] = None
+        state["_compiled_key"] = None
+        state["_materials"] = None
+        state["_materials_key"] = None
+        state["gbuffer"] = None
+        # la rejilla de rayos se rehace en el proceso destino (_update_camera)
+        state["_camera_key"] = None
+        state["_camera_plane"] = None
+        state["_ray_grid"] = None
+        state["_sampler"] = None
+        state["_ao_store"] = {}
+        state["_ao_store_key"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.framebuffer is None:
+            self.framebuffer = np.zeros((self.height, self.width, 3), dtype=np.float32)
+
+    # Escena: cualquier lista asignada se envuelve en SceneList, que cuenta
+    # sus cambios (append, +=, scene[i] = ...) para invalidar los cachés
+    @property
+    def scene(self):
+        return self._scene
+
+    @scene.setter
+    def scene(self, objects):
+        self._scene = objects if isinstance(objects, SceneList) else SceneList(objects)
+
+    def _scene_key(self):
+        return (id(self._scene), self._scene.version)
+
+    def invalidate_scene(self):
+        """Fuerza a recompilar la escena (p. ej. tras mover una figura ya agregada)."""
+        self._scene._changed()
+
+    # Aceleración
+    def _get_compiled(self):
+        """Escena compilada en arrays por tipo (None si está desactivada)."""
+        if not self.use_compiled:
+            return None
+        key = self._scene_key()
+        if self._compiled is None or self._compiled_key != key:
+            self._compiled = CompiledScene(self.scene)
+            self._compiled_key = key
+        return self._compiled
+
+    def _get_bvh(self):
+        """BVH de la escena actual (None si está desactivada)."""
+        if not self.use_bvh:
+            return None
+        key = self._scene_key()
+        if self._bvh is None or self._bvh_key != key:
+            self._bvh = BVH(self.scene)
+            self._bvh_key = key
+        return self._bvh
 
     # Intersección más cercana
     def _closest_hit(self, orig, dir, skip_obj=None):
+        bvh = self._get_bvh() if skip_obj is None else None
+        if bvh is not None:
+            return bvh.closest_hit(orig, dir, EPS)
+
         closest_t = float("inf")
         closest_hit = None
 
@@ -125,36 +480,118 @@ class Raytracer:
         return closest_hit
 
 
-    def _ambient_occlusion(self, p, n):
+    def _closest_hit_many(self, origins, dirs, t_max=np.inf):
+        """
+        Hit más cercano para un lote de rayos.
+        Retorna (t, normal, obj_idx) con obj_idx = -1 donde no hay hit.
+        """
+        bvh = self._get_bvh()
+        if bvh is not None:
+            return bvh.closest_hit_many(origins, dirs, EPS, t_max)
+        compiled = self._get_compiled()
+        if compiled is not None:
+            return compiled.closest_hit_many(origins, dirs, EPS, t_max)
+
+        n = len(dirs)
+        best_t = np.empty(n, dtype=np.float32)
+        best_t[:] = t_max
+        best_n = np.zeros((n, 3), dtype=np.float32)
+        best_i = np.full(n, -1, dtype=np.int32)
+
+        for i, obj in enumerate(self.scene):
+            t, nrm, mask = obj.ray_intersect_many(origins, dirs, best_t)
+            mask &= t > EPS
+            if not mask.any():
+                continue
+            best_t[mask] = t[mask]
+            best_n[mask] = nrm[mask]
+            best_i[mask] = i
+
+        return best_t, best_n, best_i
+
+    # Consultas de oclusión (any-hit)
+    def occluded(self, orig, dir, t_max=math.inf):
+        """
+        True si alguna figura bloquea el rayo con EPS < t < t_max.
+        A diferencia de _closest_hit no busca el hit más cercano ni crea Intercept.
+        """
+        bvh = self._get_bvh()
+        if bvh is not None:
+            return bvh.occluded(orig, dir, EPS, t_max)
+
+        for obj in self.scene:
+            t = obj.hit_distance(orig, dir)
+            if t is not None and EPS < t < t_max:
+                return True
+        return False
+
+    def occluded_many(self, origins, dirs, t_max=np.inf):
+        """Versión por lotes de occluded: array bool (N,)."""
+        dirs = np.asarray(dirs, dtype=np.float32)
+        origins = np.broadcast_to(np.asarray(origins, dtype=np.float32), dirs.shape)
+        if self._ray_log is not None:
+            self._ray_log.add(origins, dirs, t_max)
+        bvh = self._get_bvh()
+        if bvh is not None:
+            return bvh.occluded_many(origins, dirs, EPS, t_max)
+        compiled = self._get_compiled()
+        if compiled is not None:
+            return compiled.occluded_many(origins, dirs, EPS, t_max)
+
+        limit = np.empty(len(dirs), dtype=np.float32)
+        limit[:] = t_max
+        hit = np.zeros(len(dirs), dtype=bool)
+        for obj in self.scene:
+            rays = np.flatnonzero(~hit)
+            if len(rays) == 0:
+                break
+            t = obj.hit_distance_many(origins[rays], dirs[rays])
+            hit[rays[(t > EPS) & (t < limit[rays])]] = True
+        return hit
+
+    def _ao_points(self, pixels, sample, path):
+        """
+        Muestras de AO (N, ao_samples, 2) de cada pixel. El conjunto estratificado
+        son las ao_samples x samples_per_pixel muestras del pixel; `path`
+        distingue el rebote (0 = hit primario, ver _trace_rays) para no repetir puntos.
+        """
+        ao = self.ao_samples
+        k = np.arange(ao)[None, :]
+        return self._sampler.points(np.asarray(pixels)[:, None], sample * ao + k, 1 + path,
+                                    ao * self.samples_per_pixel)
+
+    def _ao_directions(self, n, xi):
+        """
+        Direcciones (N, K, 3) con distribución coseno sobre el hemisferio de
+        cada normal n (N,3), a partir de las muestras xi (N, K, 2). La base
+        tangente se arma una vez por punto.
+        """
+        up = np.where((np.abs(n[:, 1]) > 0.9)[:, None],
+                      np.array([1, 0, 0], dtype=np.float32),
+                      np.array([0, 1, 0], dtype=np.float32))
+        t = normalize_many(np.cross(up, n))[:, None]
+        b = normalize_many(np.cross(n, t[:, 0]))[:, None]
+
+        xi1, xi2 = xi[..., 0], xi[..., 1]
+        r = np.sqrt(xi1)
+        theta = 2.0 * math.pi * xi2
+        x = (r * np.cos(theta))[..., None]
+        y = (r * np.sin(theta))[..., None]
+        z = np.sqrt(np.maximum(0.0, 1.0 - xi1))[..., None]
+        return normalize_many(t * x + b * y + n[:, None] * z)
+
+    def _ambient_occlusion(self, p, n, pixel=0, sample=0, path=0):
         if not self.enable_ao or self.ao_samples <= 0:
             return 1.0
 
-        occluded = 0
-        for _ in range(self.ao_samples):
-            xi1 = np.random.rand()
-            xi2 = np.random.rand()
-            r = math.sqrt(xi1)
-            theta = 2.0 * math.pi * xi2
-            x = r * math.cos(theta)
-            y = r * math.sin(theta)
-            z = math.sqrt(max(0.0, 1.0 - xi1))
-
-            up = np.array([0, 1, 0], dtype=np.float32)
-            if abs(np.dot(up, n)) > 0.9:
-                up = np.array([1, 0, 0], dtype=np.float32)
-            t = normalize(np.cross(up, n))
-            b = normalize(np.cross(n, t))
-
-            dir_hemi = normalize(t * x + b * y + n * z)
-
-            hit = self._closest_hit(p + n * EPS * 2.0, dir_hemi)
-            if hit is not None and hit.distance < self.ao_distance:
-                occluded += 1
-
+        # todas las direcciones del punto de una vez y una consulta any-hit por lotes
+        n = np.asarray(n, dtype=np.float32)
+        dirs = self._ao_directions(n[None], self._ao_points([pixel], sample, path))[0]
+        occluded = int(self.occluded_many(p + n * EPS * 2.0, dirs, self.ao_distance).sum())
         return 1.0 - (occluded / self.ao_samples)
 
     # Sombreado
-    def cast_ray(self, orig, dir, depth=0):
+    def cast_ray(self, orig, dir, depth=0, pixel=0, sample=0, path=0):
         hit = self._closest_hit(orig, dir)
         if hit is None:
             return self.backgroundColor.copy()
@@ -162,38 +599,37 @@ class Raytracer:
         p = hit.point
         n = normalize(hit.normal)
         m = hit.obj.material
-        ao = self._ambient_occlusion(p, n)
+        ao = self._ambient_occlusion(p, n, pixel, sample, path)
 
         # Iluminación directa
         color = np.zeros(3, dtype=np.float32)
 
         for L in self.lights:
             if L.type == "Ambient":
-                color += ao * L.color * L.intensity * m.kd * np.array(m.color, dtype=np.float32)
+                color += ao * L.color * L.intensity * m.kd * m.color
                 continue
 
             # vector luz y atenuación
             if L.type == "Directional":
                 ldir = normalize(-to_np3(L.direction))
-                distance_to_light = float("inf")
+                t_light = math.inf
                 attenuation = 1.0
             else:  # Point
                 Lpos = to_np3(L.position)
                 vecL = Lpos - p
                 distance_to_light = length(vecL)
+                t_light = distance_to_light - EPS
                 ldir = normalize(vecL)
                 # atenuación simple cuadrática
                 attenuation = 1.0 / (1.0 + 0.09 * distance_to_light + 0.032 * distance_to_light * distance_to_light)
 
-            # Sombras (shadow ray)
-            shadow_hit = self._closest_hit(p + n * EPS * 3.0, ldir, skip_obj=None)
-            if shadow_hit is not None:
-                if L.type == "Directional" or shadow_hit.distance < distance_to_light - EPS:
-                    continue  # en sombra
+            # Sombras (shadow ray): basta con saber si algo tapa la luz
+            if self.occluded(p + n * EPS * 3.0, ldir, t_light):
+                continue  # en sombra
 
             # Diffuse
             ndotl = clamp01(np.dot(n, ldir))
-            diffuse = m.kd * ndotl * np.array(m.color, dtype=np.float32)
+            diffuse = m.kd * ndotl * m.color
 
             # Specular
             view_dir = normalize(orig - p)
@@ -211,7 +647,7 @@ class Raytracer:
         if depth < self.max_depth:
             if m.mtype == MAT_REFLECTIVE:
                 rdir = normalize(reflect_vec(dir, n))
-                rcol = self.cast_ray(p + n * EPS * 4.0, rdir, depth + 1)
+                rcol = self.cast_ray(p + n * EPS * 4.0, rdir, depth + 1, pixel, sample, path * 4 + 1)
                 color = (1.0 - m.ks) * color + m.ks * rcol
 
             elif 'MAT_REFRACTIVE' in globals() and m.mtype == MAT_REFRACTIVE:
@@ -222,17 +658,229 @@ class Raytracer:
                 k = 1.0 - eta * eta * (1.0 - cosi * cosi)
                 if k < 0:
                     rdir = normalize(reflect_vec(dir, n))
-                    color = self.cast_ray(p + n * EPS * 4.0, rdir, depth + 1)
+                    color = self.cast_ray(p + n * EPS * 4.0, rdir, depth + 1, pixel, sample, path * 4 + 2)
                 else:
                     tdir = normalize(refract_vec(dir, n, etai, etat))
                     rdir = normalize(reflect_vec(dir, n))
-                    rcol = self.cast_ray(p + n * EPS * 4.0, rdir, depth + 1)
-                    tcol = self.cast_ray(p - n * EPS * 4.0, tdir, depth + 1)
+                    rcol = self.cast_ray(p + n * EPS * 4.0, rdir, depth + 1, pixel, sample, path * 4 + 2)
+                    tcol = self.cast_ray(p - n * EPS * 4.0, tdir, depth + 1, pixel, sample, path * 4 + 3)
                     fresnel = self._fresnel(cosi, etai, etat)
                     color = rcol * fresnel + tcol * (1.0 - fresnel) * m.kd
 
         return np.clip(color, 0.0, 1.0)
 
+    # Sombreado por lotes (mismo modelo que cast_ray)
+    def _get_materials(self):
+        """(MaterialTable, material_index por figura) de la escena actual."""
+        compiled = self._get_compiled()
+        if compiled is not None:
+            return compiled.materials, compiled.material_index
+        key = self._scene_key()
+        if self._materials is None or self._materials_key != key:
+            table = MaterialTable()
+            self._materials = (table, table.index([obj.material for obj in self.scene]))
+            self._materials_key = key
+        return self._materials
+
+    def _ambient_occlusion_many(self, p, n, pixels, sample=0, path=0):
+        if not self.enable_ao or self.ao_samples <= 0:
+            return np.ones(len(p), dtype=np.float32)
+        if not self.ao_cache:
+            return self._trace_ao(p, n, pixels, sample, path)
+
+        # AO de (pixel, muestra, rebote) ya calculado: sólo depende de la
+        # geometría, la cámara y el sampler, no de luces ni colores
+        store = self._get_ao_store(sample, path)
+        own = pixels >= 0
+        ao = np.full(len(p), np.nan, dtype=np.float32)
+        ao[own] = store[pixels[own]]
+        todo = np.flatnonzero(np.isnan(ao))
+        if len(todo):
+            ao[todo] = self._trace_ao(p[todo], n[todo], pixels[todo], sample, path)
+            keep = todo[own[todo]]
+            store[pixels[keep]] = ao[keep]
+        return ao
+
+    def _trace_ao(self, p, n, pixels, sample, path):
+        """AO por lotes: las N x ao_samples direcciones en una sola consulta any-hit."""
+        ao = self.ao_samples
+        dirs = self._ao_directions(n, self._ao_points(pixels, sample, path)).reshape(-1, 3)
+        orig = p + n * EPS * 2.0
+        origins = np.stack([np.repeat(orig[:, i], ao) for i in range(3)], axis=1)
+        occluded = self.occluded_many(origins, dirs, self.ao_distance).reshape(-1, ao)
+        return 1.0 - occluded.sum(axis=1, dtype=np.float32) / ao
+
+    def _get_ao_store(self, sample, path):
+        """Array (H*W) de AO ya calculado (NaN = falta) para una muestra y un rebote."""
+        key = (self._scene_key(), self._camera_key, self.samples_per_pixel,
+               self.ao_samples, self.ao_distance)
+        if key != self._ao_store_key:
+            self._ao_store = {}
+            self._ao_store_key = key
+        store = self._ao_store.get((sample, path))
+        if store is None:
+            store = np.full(self.width * self.height, np.nan, dtype=np.float32)
+            self._ao_store[(sample, path)] = store
+        return store
+
+    def cast_rays(self, origins, dirs, depth=0, mats=None, pixels=None, sample=0):
+        """
+        Versión por lotes de cast_ray: retorna colores (N,3).
+        pixels: índice y * width + x de cada rayo para el sampler (por defecto,
+        rayos sueltos con ids negativos, que no entran a la caché de AO).
+        """
+        if mats is None:
+            mats = self._get_materials()
+        return self._shade_rays(self._trace_rays(origins, dirs, depth, mats, pixels, sample), mats)
+
+    # Geometría de un lote: todo lo que no depende de las luces
+    def _trace_rays(self, origins, dirs, depth, mats, pixels=None, sample=0, path=0):
+        """
+        Árbol de hits de un lote de rayos (dict de arrays): qué rayos pegan y,
+        por hit, punto, normal, vector de vista, material, figura y AO, más los
+        sub-lotes reflejados / refractados. _shade_rays lo convierte en colores.
+        Cada rayo lleva su pixel y cada rebote su `path` (como en cast_ray)
+        para pedir al sampler las mismas muestras de AO que el render escalar.
+        """
+        dirs = np.asarray(dirs, dtype=np.float32)
+        origins = np.broadcast_to(np.asarray(origins, dtype=np.float32), dirs.shape)
+        if pixels is None:
+            pixels = -1 - np.arange(len(dirs))
+
+        t, normals, idx = self._closest_hit_many(origins, dirs)
+        if self._ray_log is not None:
+            self._ray_log.add(origins, dirs, t)
+        hit = np.flatnonzero(idx >= 0)
+        node = {"count": len(dirs), "hit": hit}
+        if len(hit) == 0:
+            return node
+
+        orig, dir = origins[hit], dirs[hit]
+        p = orig + dir * t[hit][:, None]
+        n = normalize_many(normals[hit])
+        # cada hit lleva el índice de su material en la tabla
+        mat_ids = mats[1][idx[hit]]
+        pixels = pixels[hit]
+        node.update(point=p, normal=n, view=normalize_many(orig - p), material=mat_ids,
+                    object=idx[hit], ao=self._ambient_occlusion_many(p, n, pixels, sample, path))
+
+        # Reflexión / refracción
+        if depth < self.max_depth:
+            table = mats[0]
+            mtype = table.mtype[mat_ids]
+            refl = np.flatnonzero(mtype == MAT_REFLECTIVE)
+            if len(refl):
+                rdir = normalize_many(reflect_many(dir[refl], n[refl]))
+                node["reflect"] = (refl, self._trace_rays(p[refl] + n[refl] * EPS * 4.0,
+                                                          rdir, depth + 1, mats, pixels[refl],
+                                                          sample, path * 4 + 1))
+
+            refr = np.flatnonzero(mtype == MAT_REFRACTIVE)
+            if len(refr):
+                node["refract"] = (refr, self._trace_refract(p[refr], n[refr], dir[refr],
+                                                             table.ior[mat_ids[refr]], depth, mats,
+                                                             pixels[refr], sample, path))
+        return node
+
+    def _trace_refract(self, p, n, dir, ior, depth, mats, pixels, sample, path):
+        cosi = np.clip(-dot_many(n, dir), 0.0, 1.0)
+        etai = np.where(cosi > 0, 1.0, ior)
+        etat = np.where(cosi > 0, ior, 1.0)
+        eta = etai / etat
+        k = 1.0 - eta * eta * (1.0 - cosi * cosi)
+
+        rdir = normalize_many(reflect_many(dir, n))
+        sub = {"reflected": self._trace_rays(p + n * EPS * 4.0, rdir, depth + 1, mats,
+                                             pixels, sample, path * 4 + 2),
+               "ok": np.flatnonzero(k >= 0)}
+
+        ok = sub["ok"]
+        if len(ok):
+            tdir = normalize_many(refract_many(dir[ok], n[ok], etai[ok], etat[ok]))
+            sub["transmitted"] = self._trace_rays(p[ok] - n[ok] * EPS * 4.0, tdir, depth + 1, mats,
+                                                  pixels[ok], sample, path * 4 + 3)
+            sub["fresnel"] = self._fresnel(cosi[ok], etai[ok], etat[ok])[:, None]
+        return sub
+
+    # Sombreado de un árbol de hits con las luces actuales
+    def _shade_rays(self, node, mats):
+        color = np.empty((node["count"], 3), dtype=np.float32)
+        color[:] = self.backgroundColor
+        if len(node["hit"]):
+            color[node["hit"]] = self._shade_hits(node, mats)
+        return color
+
+    def _shade_hits(self, node, mats):
+        table = mats[0]
+        mat_ids = node["material"]
+        kd = table.kd[mat_ids][:, None]
+        ks = table.ks[mat_ids][:, None]
+        color = self._direct_many(node, table.color[mat_ids], kd, ks,
+                                  np.maximum(table.shininess[mat_ids], 1.0))
+
+        if "reflect" in node:
+            refl, child = node["reflect"]
+            rcol = self._shade_rays(child, mats)
+            color[refl] = (1.0 - ks[refl]) * color[refl] + ks[refl] * rcol
+
+        if "refract" in node:
+            refr, sub = node["refract"]
+            rcol = self._shade_rays(sub["reflected"], mats)
+            ok = sub["ok"]
+            if len(ok):
+                tcol = self._shade_rays(sub["transmitted"], mats)
+                fresnel = sub["fresnel"]
+                rcol[ok] = rcol[ok] * fresnel + tcol * (1.0 - fresnel) * kd[refr][ok]
+            color[refr] = rcol
+
+        return np.clip(color, 0.0, 1.0)
+
+    def _direct_many(self, node, mcolor, kd, ks, shininess):
+        """
+        Iluminación directa de los hits de `node`. Los rayos de sombra de cada
+        luz se guardan en el nodo por posición / dirección de la luz, así que
+        cambiar sólo su intensidad o color no vuelve a trazar sombras.
+        """
+        p, n, view_dir = node["point"], node["normal"], node["view"]
+        ao = node["ao"][:, None]
+        shadows = node.setdefault("shadows", {})
+        color = np.zeros((len(p), 3), dtype=np.float32)
+
+        for L in self.lights:
+            if L.type == "Ambient":
+                color += ao * L.color * L.intensity * kd * mcolor
+                continue
+
+            if L.type == "Directional":
+                ldir = np.broadcast_to(normalize(-to_np3(L.direction)), p.shape)
+                t_light = np.inf
+                attenuation = 1.0
+                key = (L.type, to_np3(L.direction).tobytes())
+            else:  # Point
+                vecL = to_np3(L.position) - p
+                distance_to_light = np.linalg.norm(vecL, axis=1)
+                ldir = normalize_many(vecL)
+                t_light = distance_to_light - EPS
+                attenuation = (1.0 / (1.0 + 0.09 * distance_to_light +
+                                      0.032 * distance_to_light * distance_to_light))[:, None]
+                key = (L.type, to_np3(L.position).tobytes())
+
+            # Sombras: cualquier hit antes de la luz
+            lit = shadows.get(key)
+            if lit is None:
+                lit = shadows[key] = ~self.occluded_many(p + n * EPS * 3.0, ldir, t_light)[:, None]
+
+            ndotl = np.clip(dot_many(n, ldir), 0.0, 1.0)[:, None]
+            diffuse = kd * ndotl * mcolor
+
+            half_vec = normalize_many(ldir + view_dir)
+            spec = np.clip(dot_many(n, half_vec), 0.0, 1.0) ** shininess
+            specular = ks * spec[:, None]
+
+            color += np.where(lit, (diffuse + specular) * L.color * L.intensity * attenuation, 0.0)
+
+        return color
+
     def _fresnel(self, cosi, etai, etat):
         r0 = ((etai - etat) / (etai + etat)) ** 2
         return r0 + (1.0 - r0) * ((1.0 - cosi) ** 5)
@@ -57,12 +57,72 @@ class Material:
         self.kr = max(0.0, min(1.0, self.kr))
         self.kt = max(0.0, min(1.0, self.kt))
 
+    def key(self):
+        """Tupla con todos los parámetros: dos materiales con la misma key son iguales."""
+        return (tuple(self.color.tolist()), self.kd, self.ks, self.shininess,
+                self.mtype, self.ior, self.kr, self.kt)
+
     def __repr__(self):
         return (f"Material(color={tuple(self.color)}, kd={self.kd}, ks={self.ks}, "
                 f"shininess={self.shininess}, mtype={self.mtype}, "
                 f"ior={self.ior}, kr={self.kr}, kt={self.kt})")
 
 
+class MaterialTable:
+    """
+    Registro de materiales sin repetidos, con sus parámetros empacados en arrays
+    (color (M,3), kd, ks, shininess, mtype, ior, kr, kt) para sombrear un lote
+    de hits juntando los parámetros por índice: `table.kd[ids]`.
+
+    - add(m): índice del material (los iguales por valor comparten índice).
+    - index(materials): índices de una lista de materiales (int32).
+    """
+    FIELDS = ("color", "kd", "ks", "shininess", "mtype", "ior", "kr", "kt")
+
+    def __init__(self, materials=()):
+        self.materials = []
+        self._ids = {}
+        self._arrays = None
+        for m in materials:
+            self.add(m)
+
+    def __len__(self):
+        return len(self.materials)
+
+    def add(self, material):
+        key = material.key()
+        idx = self._ids.get(key)
+        if idx is None:
+            idx = self._ids[key] = len(self.materials)
+            self.materials.append(material)
+            self._arrays = None
+        return idx
+
+    def index(self, materials):
+        return np.array([self.add(m) for m in materials], dtype=np.int32)
+
+    def arrays(self):
+        """Parámetros empacados {campo: array}; se rehacen sólo si se agregó un material."""
+        if self._arrays is None:
+            mats = self.materials
+            self._arrays = {
+                "color": np.array([m.color for m in mats], dtype=np.float32).reshape(-1, 3),
+                "kd": np.array([m.kd for m in mats], dtype=np.float32),
+                "ks": np.array([m.ks for m in mats], dtype=np.float32),
+                "shininess": np.array([m.shininess for m in mats], dtype=np.float32),
+                "mtype": np.array([m.mtype for m in mats], dtype=np.int32),
+                "ior": np.array([m.ior for m in mats], dtype=np.float32),
+                "kr": np.array([m.kr for m in mats], dtype=np.float32),
+                "kt": np.array([m.kt for m in mats], dtype=np.float32),
+            }
+        return self._arrays
+
+    def __getattr__(self, name):
+        if name in MaterialTable.FIELDS:
+            return self.arrays()[name]
+        raise AttributeError(name)
+
+
 def matte(color=(0.8, 0.8, 0.8), kd=0.9):
     """Difuso mate sencillo."""
     return Material(color=color, kd=kd, ks=0.05, shininess=16, mtype=MAT_DIFFUSE)
@@ -0,0 +1,85 @@
+import os
+
+import numpy as np
+
+# concurrent.futures y multiprocessing se importan dentro de las funciones:
+# make_tiles (que usa cache.py) no debe cargarlos en un render de un solo proceso
+
+# Estado de cada proceso trabajador (se llena una sola vez en _init_worker)
+_worker_rt = None
+_worker_shm = None
+
+
+def make_tiles(width, height, tile_size):
+    """Lista de tiles (x0, y0, x1, y1) que cubren la imagen."""
+    tile_size = max(1, int(tile_size))
+    return [
+        (x0, y0, min(width, x0 + tile_size), min(height, y0 + tile_size))
+        for y0 in range(0, height, tile_size)
+        for x0 in range(0, width, tile_size)
+    ]
+
+
+def _init_worker(rt, shm_name, tile_mode):
+    """
+    Inicializador del pool: recibe la escena (el Raytracer) una sola vez por
+    proceso y conecta su framebuffer a la memoria compartida.
+    """
+    from multiprocessing import shared_memory
+
+    global _worker_rt, _worker_shm
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    rt.framebuffer = np.ndarray((rt.height, rt.width, 3), dtype=np.float32,
+                                buffer=_worker_shm.buf)
+    rt._tile_mode = tile_mode
+    rt._update_camera()
+    _worker_rt = rt
+
+
+def _render_tile(tile):
+    """Renderiza un tile directo en la memoria compartida; no retorna píxeles."""
+    x0, y0, x1, y1 = tile
+    _worker_rt.render_tile(x0, y0, x1, y1, mode=_worker_rt._tile_mode)
+    return tile
+
+
+def render_parallel(rt, workers=None, tile_size=32, tile_mode="wavefront"):
+    """
+    Render multiproceso por tiles.
+
+    - La escena viaja a cada proceso una vez (initializer), no por tile.
+    - Los procesos escriben en un framebuffer en shared_memory, así que
+      no se serializa ningún pixel de regreso.
+    - Cada tile es una tarea: el pool los asigna dinámicamente al proceso
+      que quede libre, así los tiles caros (toros, piso reflectivo) no
+      frenan al resto.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from multiprocessing import shared_memory
+
+    workers = workers or os.cpu_count() or 1
+    tiles = make_tiles(rt.width, rt.height, tile_size)
+    rt._update_camera()
+
+    nbytes = rt.height * rt.width * 3 * np.dtype(np.float32).itemsize
+    shm = shared_memory.SharedMemory(create=True, size=nbytes)
+    try:
+        shared = np.ndarray((rt.height, rt.width, 3), dtype=np.float32, buffer=shm.buf)
+        shared[:] = 0.0
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(rt, shm.name, tile_mode)) as pool:
+            futures = [pool.submit(_render_tile, tile) for tile in tiles]
+            step = max(1, len(tiles) // 20)
+            for done, future in enumerate(as_completed(futures), 1):
+                future.result()  # propaga errores del trabajador
+                if done % step == 0:
+                    print(f"{int(100*done/len(tiles))}% ...")
+
+        rt.framebuffer[:] = shared
+        del shared
+    finally:
+        shm.close()
+        shm.unlink()
+
+    print("100% ... listo!")
@@ -0,0 +1,280 @@
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from Textures.compiled import KINDS
+from Textures.parallel import make_tiles
+
+# Perfil por etapas del render, opcional: RenderProfiler.attach(rt) reemplaza
+# métodos en la *instancia* (rt y sus figuras) por versiones que cuentan y
+# miden; detach() los borra y vuelve a quedar el método de la clase. Sin
+# attach no hay ni un if de más en el render.
+#
+# Etapas (tiempo propio, sin contar las etapas anidadas):
+# - camera: rayos primarios (_camera_dirs)
+# - intersect.<tipo>: hit más cercano de rayos primary / reflection / refraction
+# - shadow, ao: consultas any-hit de sombras y de AO
+# - shading: sombreado (_shade_hits; en escalar, cast_ray sin lo anidado)
+# - trace: armado del árbol de hits por lotes (_trace_rays sin lo anidado)
+# - build: BVH, escena compilada y tabla de materiales (o su consulta al caché)
+
+# Paradas del mapa de calor (negro -> violeta -> naranja -> amarillo claro)
+HEATMAP_STOPS = np.array([
+    (0.00, 0.00, 0.00, 0.02),
+    (0.35, 0.35, 0.05, 0.45),
+    (0.70, 0.90, 0.35, 0.10),
+    (1.00, 1.00, 0.95, 0.60),
+], dtype=np.float32)
+
+
+def _ray_kind(path):
+    """Tipo de rayo según el código de rebote de _trace_rays / cast_ray."""
+    if path == 0:
+        return "primary"
+    return "refraction" if path % 4 == 3 else "reflection"
+
+
+def _arg(args, kwargs, index, name, default):
+    return args[index] if len(args) > index else kwargs.get(name, default)
+
+
+def _count(dirs):
+    """Rayos en un argumento dirs: (N,3) o un solo vector (3,)."""
+    return len(dirs) if np.ndim(dirs) == 2 else 1
+
+
+class RenderProfiler:
+    """
+    Cuenta rayos por tipo y pruebas de intersección por figura, y mide el
+    tiempo de cada etapa y de cada tile.
+
+        prof = RenderProfiler()
+        prof.render(rt, mode="wavefront", tile_size=32)
+        print(prof.report())
+        save_bmp("cost.bmp", rt.width, rt.height, prof.heatmap_image(rt.width, rt.height))
+
+    No sirve con mode="parallel": los métodos reemplazados no viajan a los procesos.
+    """
+
+    def __init__(self):
+        self._patched = []
+        self.reset()
+
+    def reset(self):
+        self.stage_time = defaultdict(float)
+        self.stage_calls = defaultdict(int)
+        self.rays = defaultdict(int)
+        self.tests = defaultdict(int)
+        self.tiles = []          # (x0, y0, x1, y1, segundos)
+        self.total = 0.0
+        self.mode = None
+        self._stack = []         # [etapa, inicio, tiempo de etapas anidadas]
+        self._kinds = []         # tipo de rayo / "ao" del contexto actual
+        self._in_shape = False
+
+    # Tiempo por etapa
+    def _enter(self, stage):
+        self._stack.append([stage, time.perf_counter(), 0.0])
+
+    def _exit(self):
+        stage, start, nested = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        self.stage_time[stage] += elapsed - nested
+        self.stage_calls[stage] += 1
+        if self._stack:
+            self._stack[-1][2] += elapsed
+        return elapsed
+
+    def _patch(self, obj, name, make):
+        fn = getattr(obj, name, None)
+        if fn is None or name in vars(obj):
+            return
+        setattr(obj, name, make(fn))
+        self._patched.append((obj, name))
+
+    def _staged(self, stage, before=None, after=None):
+        """Envoltura que mide `stage` (str o función de args); before/after ajustan el contexto."""
+        def make(fn):
+            def wrapper(*args, **kwargs):
+                if before is not None:
+                    before(args, kwargs)
+                self._enter(stage(args, kwargs) if callable(stage) else stage)
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self._exit()
+                    if after is not None:
+                        after()
+            return wrapper
+        return make
+
+    # Instalación
+    def attach(self, rt):
+        """Instrumenta rt (y las figuras de su escena) hasta detach()."""
+        kinds = self._kinds
+
+        def ray_context(dirs_index, path_index):
+            def before(args, kwargs):
+                kind = _ray_kind(_arg(args, kwargs, path_index, "path", 0))
+                self.rays[kind] += _count(args[dirs_index])
+                kinds.append(kind)
+            return before
+
+        def occlusion(args, kwargs):
+            kind = "ao" if "ao" in kinds else "shadow"
+            self.rays[kind] += _count(args[1])
+            return kind
+
+        def intersect(args, kwargs):
+            return "intersect." + (kinds[-1] if kinds else "primary")
+
+        patch = lambda name, make: self._patch(rt, name, make)
+        patch("_trace_rays", self._staged("trace", ray_context(1, 6), kinds.pop))
+        patch("cast_ray", self._staged("shading", ray_context(1, 5), kinds.pop))
+        patch("_closest_hit", self._staged(intersect))
+        patch("_closest_hit_many", self._staged(intersect))
+        patch("occluded", self._staged(occlusion))
+        patch("occluded_many", self._staged(occlusion))
+        ao = self._staged("ao", lambda a, k: kinds.append("ao"), kinds.pop)
+        patch("_ambient_occlusion", ao)
+        patch("_ambient_occlusion_many", ao)
+        patch("_shade_hits", self._staged("shading"))
+        patch("_camera_dirs", self._staged("camera"))
+        patch("_get_bvh", self._staged("build"))
+        patch("_get_materials", self._staged("build"))
+        patch("_get_compiled", self._compiled_hook)
+        patch("render_tile", self._tile_hook)
+
+        seen = set()
+        for obj in rt.scene:
+            if id(obj) in seen:
+                continue
+            seen.add(id(obj))
+            for name in ("ray_intersect", "hit_distance", "ray_intersect_many", "hit_distance_many"):
+                self._patch(obj, name, self._shape_hook(type(obj).__name__))
+        return self
+
+    def detach(self):
+        """Quita toda la instrumentación (vuelven los métodos de la clase)."""
+        for obj, name in reversed(self._patched):
+            vars(obj).pop(name, None)
+        self._patched = []
+
+    def _shape_hook(self, name):
+        # sólo cuenta la llamada de afuera (hit_distance genérico llama a ray_intersect)
+        def make(fn):
+            def wrapper(origins, dirs, *args, **kwargs):
+                if self._in_shape:
+                    return fn(origins, dirs, *args, **kwargs)
+                self.tests[name] += _count(dirs)
+                self._in_shape = True
+                try:
+                    return fn(origins, dirs, *args, **kwargs)
+                finally:
+                    self._in_shape = False
+            return wrapper
+        return make
+
+    def _compiled_hook(self, fn):
+        # la escena compilada (use_bvh=False) prueba figuras por tipo en _part_distances
+        def part_hook(part):
+            def wrapper(group, params, origins, dirs):
+                c = len(next(iter(params.values())))
+                self.tests[KINDS[group.code][0].__name__] += len(dirs) * c
+                return part(group, params, origins, dirs)
+            return wrapper
+
+        def wrapper(*args, **kwargs):
+            self._enter("build")
+            try:
+                compiled = fn(*args, **kwargs)
+            finally:
+                self._exit()
+            if compiled is not None:
+                self._patch(compiled, "_part_distances", part_hook)
+            return compiled
+        return wrapper
+
+    def _tile_hook(self, fn):
+        def wrapper(x0, y0, x1, y1, *args, **kwargs):
+            self._enter("tile")
+            try:
+                return fn(x0, y0, x1, y1, *args, **kwargs)
+            finally:
+                self.tiles.append((x0, y0, x1, y1, self._exit()))
+        return wrapper
+
+    # Render perfilado
+    def render(self, rt, mode="wavefront", tile_size=32):
+        """
+        Renderiza rt con la instrumentación puesta. "wavefront" y "scalar" van
+        por tiles de tile_size x tile_size (para el mapa de calor); los demás
+        modos en proceso usan rt.render(mode).
+        """
+        if mode == "parallel":
+            raise ValueError("el perfil no funciona con mode='parallel' (usar 'wavefront')")
+        self.mode = mode
+        self.attach(rt)
+        start = time.perf_counter()
+        try:
+            if mode in ("wavefront", "scalar"):
+                rt._update_camera()
+                for x0, y0, x1, y1 in make_tiles(rt.width, rt.height, tile_size):
+                    rt.render_tile(x0, y0, x1, y1, mode=mode)
+            else:
+                rt.render(mode=mode)
+        finally:
+            self.total += time.perf_counter() - start
+            self.detach()
+        return self
+
+    # Resultados
+    def summary(self):
+        """Dict con tiempos por etapa, rayos por tipo y pruebas por figura (para JSON)."""
+        stages = {k: v for k, v in self.stage_time.items() if k != "tile"}
+        other = max(0.0, self.total - sum(stages.values()))
+        return {
+            "mode": self.mode,
+            "total_s": self.total,
+            "tiles": len(self.tiles),
+            "stages": {k: {"s": v, "calls": self.stage_calls[k]} for k, v in stages.items()},
+            "other_s": other,
+            "rays": dict(self.rays),
+            "tests": dict(self.tests),
+        }
+
+    def report(self):
+        """Resumen en texto: etapas ordenadas por tiempo, rayos y pruebas de intersección."""
+        s = self.summary()
+        total = s["total_s"] or 1e-12
+        lines = [f"Perfil de render: {s['total_s']:.3f} s ({s['mode']}, {s['tiles']} tiles)",
+                 f"  {'etapa':22} {'tiempo':>9} {'%':>6} {'llamadas':>10}"]
+        stages = sorted(s["stages"].items(), key=lambda kv: -kv[1]["s"])
+        for name, st in stages + [("otros", {"s": s["other_s"], "calls": 0})]:
+            lines.append(f"  {name:22} {st['s']:8.3f}s {100 * st['s'] / total:5.1f}% {st['calls'] or '':>10}")
+
+        lines.append(f"  {'rayos':22} {'cantidad':>9}")
+        for kind in ("primary", "reflection", "refraction", "shadow", "ao"):
+            if s["rays"].get(kind):
+                lines.append(f"  {kind:22} {s['rays'][kind]:9d}")
+
+        lines.append(f"  {'pruebas por figura':22} {'rayos':>9}")
+        for name, n in sorted(s["tests"].items(), key=lambda kv: -kv[1]):
+            lines.append(f"  {name:22} {n:9d}")
+        return "\n".join(lines)
+
+    def heatmap(self, width, height):
+        """Costo por pixel (H,W) en segundos: el tiempo de cada tile repartido entre sus píxeles."""
+        cost = np.zeros((height, width), dtype=np.float32)
+        for x0, y0, x1, y1, seconds in self.tiles:
+            cost[y0:y1, x0:x1] += seconds / max(1, (x1 - x0) * (y1 - y0))
+        return cost
+
+    def heatmap_image(self, width, height):
+        """Mapa de calor (H,W,3) en [0,1] para BMP_Writer.save: el tile más caro en amarillo."""
+        cost = self.heatmap(width, height)
+        v = cost / cost.max() if cost.max() > 0 else cost
+        stops = HEATMAP_STOPS
+        return np.stack([np.interp(v, stops[:, 0], stops[:, c]) for c in (1, 2, 3)],
+                        axis=-1).astype(np.float32)
@@ -0,0 +1,114 @@
+import os
+
+import numpy as np
+
+from Textures.gl import Raytracer
+from Textures.figures import Sphere, Plane, Disk, Triangle, Cube, Cylinder, Ellipsoid, Torus
+from Textures.lights import AmbientLight, DirectionalLight, PointLight
+from Textures.material import Material, MAT_DIFFUSE, MAT_REFLECTIVE, MAT_REFRACTIVE
+
+# Escena en archivo (.json o .toml), sin pygame: ver cli.py y scenes/room.toml
+#
+#   [camera]   eye, target, up, fov
+#   [render]   width, height, background, mode, workers, output y cualquier
+#              opción de Raytracer (samples_per_pixel, enable_ao, max_depth, ...)
+#   [materials.<nombre>]  color, kd, ks, shininess, mtype, ior, kr, kt
+#   [[objects]]  type = "Sphere" | "Plane" | ... y los parámetros de su clase;
+#                material = "<nombre>" o una tabla con los campos del material
+#   [[lights]]   type = "Ambient" | "Directional" | "Point" y sus parámetros
+
+SHAPES = {cls.__name__: cls for cls in (Sphere, Plane, Disk, Triangle, Cube, Cylinder, Ellipsoid, Torus)}
+LIGHTS = {"Ambient": AmbientLight, "Directional": DirectionalLight, "Point": PointLight}
+MTYPES = {"diffuse": MAT_DIFFUSE, "reflective": MAT_REFLECTIVE, "refractive": MAT_REFRACTIVE}
+
+# Claves de [render] que no son opciones del constructor de Raytracer
+RENDER_KEYS = ("width", "height", "background", "mode", "workers", "output")
+
+
+def read_scene(path):
+    """Lee el archivo de escena como dict (según la extensión: .json o .toml)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".json":
+        import json
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    if ext == ".toml":
+        import tomllib
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    raise ValueError(f"{path}: formato de escena desconocido {ext!r} (usar .json o .toml)")
+
+
+def _material(spec, materials, where):
+    if isinstance(spec, str):
+        if spec not in materials:
+            raise ValueError(f"{where}: material desconocido {spec!r}")
+        return materials[spec]
+    spec = dict(spec)
+    mtype = spec.get("mtype", MAT_DIFFUSE)
+    if isinstance(mtype, str):
+        if mtype not in MTYPES:
+            raise ValueError(f"{where}: mtype desconocido {mtype!r} (opciones: {', '.join(MTYPES)})")
+        spec["mtype"] = MTYPES[mtype]
+    try:
+        return Material(**spec)
+    except TypeError as e:
+        raise ValueError(f"{where}: {e}") from None
+
+
+def _build(kind, table, spec, where, **extra):
+    spec = dict(spec)
+    name = spec.pop("type", None)
+    if name not in table:
+        raise ValueError(f"{where}: tipo de {kind} desconocido {name!r} (opciones: {', '.join(table)})")
+    try:
+        return table[name](**spec, **extra)
+    except TypeError as e:
+        raise ValueError(f"{where}: {e}") from None
+
+
+def build_raytracer(data, **overrides):
+    """
+    Raytracer listo para renderizar a partir del dict de la escena.
+    overrides: reemplaza claves de [render] (p. ej. width=320, samples_per_pixel=4).
+    Retorna (rt, settings), con settings = mode, workers y output de [render].
+    """
+    render = dict(data.get("render", {}))
+    render.update({k: v for k, v in overrides.items() if v is not None})
+    settings = {k: render.pop(k, None) for k in RENDER_KEYS}
+
+    try:
+        rt = Raytracer(settings["width"] or 800, settings["height"] or 600, **render)
+    except TypeError as e:
+        raise ValueError(f"[render]: {e}") from None
+    if settings["background"] is not None:
+        rt.backgroundColor = np.array(settings["background"], dtype=np.float32)
+
+    camera = data.get("camera", {})
+    for name in ("eye", "target", "up"):
+        if name in camera:
+            setattr(rt, name, np.array(camera[name], dtype=np.float32))
+    if "fov" in camera:
+        rt.fov = float(camera["fov"])
+
+    materials = {name: _material(spec, {}, f"materials.{name}")
+                 for name, spec in data.get("materials", {}).items()}
+
+    objects = []
+    for i, spec in enumerate(data.get("objects", [])):
+        where = f"objects[{i}]"
+        spec = dict(spec)
+        material = _material(spec.pop("material", {}), materials, where)
+        objects.append(_build("figura", SHAPES, spec, where, material=material))
+    rt.scene = objects
+
+    rt.lights = [_build("luz", LIGHTS, spec, f"lights[{i}]")
+                 for i, spec in enumerate(data.get("lights", []))]
+
+    rt.update_camera()
+    return rt, settings
+
+
+def load_scene(path, **overrides):
+    """read_scene + build_raytracer."""
+    return build_raytracer(read_scene(path), **overrides)
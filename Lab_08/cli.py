@@ -0,0 +1,119 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+from BMP.BMP_Writer import save as save_bmp
+from Textures.cache import RenderCache
+from Textures.scene_file import load_scene
+
+# Render sin ventana (no importa pygame), para correr renders en lote:
+#
+#   python cli.py render scenes/room.toml
+#   python cli.py render scenes/*.toml --mode parallel --workers 8 --out-dir renders/farm
+#   python cli.py render scenes/room.toml -o renders/room.bmp --width 320 --height 240 --spp 4
+#   python cli.py render scenes/room.toml --profile    # + renders/room_cost.bmp
+
+MODES = ("wavefront", "scalar", "parallel", "progressive", "gbuffer")
+
+
+def render_file(path, output=None, out_dir=None, mode=None, workers=None, cache=None,
+                quiet=False, profile=False, **overrides):
+    """
+    Renderiza un archivo de escena y guarda el BMP; retorna la ruta de salida.
+    profile=True: renderiza con RenderProfiler, imprime el resumen y guarda
+    el mapa de costo por tile en <salida>_cost.bmp.
+    """
+    rt, settings = load_scene(path, **overrides)
+    mode = mode or settings["mode"] or "wavefront"
+    if mode not in MODES:
+        raise ValueError(f"{path}: modo de render desconocido {mode!r} (opciones: {', '.join(MODES)})")
+    workers = workers or settings["workers"]
+
+    if output is None:
+        name = os.path.splitext(os.path.basename(path))[0] + ".bmp"
+        output = settings["output"] or os.path.join("renders", name)
+        if out_dir is not None:
+            output = os.path.join(out_dir, os.path.basename(output))
+
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+
+    if profile:
+        from Textures.profiler import RenderProfiler
+        prof = RenderProfiler().render(rt, mode=mode)
+        print(prof.report())
+        cost = os.path.splitext(output)[0] + "_cost.bmp"
+        save_bmp(cost, rt.width, rt.height, prof.heatmap_image(rt.width, rt.height))
+        print(f" Mapa de costo en {cost}")
+        save_bmp(output, rt.width, rt.height, rt.framebuffer)
+        return output
+
+    log = contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext()
+    with log:
+        if cache is not None and cache.load(rt, mode):
+            print(" Render idéntico en caché")
+        elif mode == "parallel":
+            rt.render_parallel(workers=workers)
+            if cache is not None:
+                cache.store(rt, mode)
+        elif mode == "progressive":
+            for done, total in rt.render_progressive():
+                print(f"{int(100*done/total)}% ...")
+            if cache is not None:
+                cache.store(rt, mode)
+        else:
+            rt.render(mode=mode, cache=cache)
+
+    save_bmp(output, rt.width, rt.height, rt.framebuffer)
+    return output
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="cli.py", description="Raytracer Lab 08 sin ventana")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("render", help="renderiza uno o más archivos de escena (.json / .toml) a BMP")
+    p.add_argument("scenes", nargs="+", help="archivos de escena")
+    p.add_argument("-o", "--output", help="BMP de salida (sólo con una escena)")
+    p.add_argument("--out-dir", help="carpeta de salida (por defecto renders/ o [render].output)")
+    p.add_argument("--mode", choices=MODES, help="backend de render (por defecto [render].mode o wavefront)")
+    p.add_argument("--workers", type=int, help="procesos para --mode parallel (por defecto, todos los núcleos)")
+    p.add_argument("--width", type=int)
+    p.add_argument("--height", type=int)
+    p.add_argument("--spp", type=int, dest="samples_per_pixel", help="muestras por pixel")
+    p.add_argument("--seed", type=int, help="semilla del sampler")
+    p.add_argument("--cache", metavar="DIR", help="usar la caché de renders en DIR (ver Textures/cache.py)")
+    p.add_argument("--profile", action="store_true",
+                   help="perfil por etapas (sin caché ni parallel) y mapa de costo <salida>_cost.bmp")
+    p.add_argument("-q", "--quiet", action="store_true", help="sin progreso; sólo la ruta de cada BMP")
+
+    args = parser.parse_args(argv)
+    if args.output and len(args.scenes) > 1:
+        parser.error("-o/--output sólo con una escena; usar --out-dir")
+    if args.profile and (args.cache or args.mode == "parallel"):
+        parser.error("--profile no funciona con --cache ni con --mode parallel")
+
+    cache = RenderCache(args.cache) if args.cache else None
+    failed = 0
+    for path in args.scenes:
+        t0 = time.perf_counter()
+        try:
+            out = render_file(path, output=args.output, out_dir=args.out_dir, mode=args.mode,
+                              workers=args.workers, cache=cache, quiet=args.quiet,
+                              profile=args.profile,
+                              width=args.width, height=args.height,
+                              samples_per_pixel=args.samples_per_pixel, seed=args.seed)
+        except (OSError, ValueError) as e:
+            print(f"error: {e}", file=sys.stderr)
+            failed += 1
+            continue
+        print(out if args.quiet else f" Guardado en {out} ({time.perf_counter() - t0:.2f} s)")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
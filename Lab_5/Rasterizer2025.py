@@ -98,7 +98,7 @@ while isRunning:
             if event.key == K_ESCAPE:
                 isRunning = False
             elif event.key == K_s:
-                ImageSaver.save(screen, "bat.bmp")
+                ImageSaver.save(rend.framebuffer, "bat.bmp")
     clock.tick(60)
 
 pygame.quit()
@@ -1,3 +1,7 @@
+import math
+
+import numpy as np
+
 from vec import Vec3
 
 class Camera:
@@ -9,7 +13,6 @@ class Camera:
 
     def primary_ray(self, u, v):
         # Convertir FOV a radianes y calcular scale correctamente
-        import math
         fov_rad = math.radians(self.fov)
         scale = math.tan(fov_rad * 0.5)
         
@@ -19,4 +22,18 @@ class Camera:
         
         # Dirección del rayo (apuntando hacia -Z)
         direction = Vec3(x, y, -1).normalize()
-        return self.eye, direction
\ No newline at end of file
+        return self.eye, direction
+
+    def primary_rays(self, width, height):
+        """
+        Direcciones (alto, ancho, 3) normalizadas de los rayos primarios de
+        todos los píxeles, con u = x / width y v = y / height como primary_ray.
+        """
+        scale = math.tan(math.radians(self.fov) * 0.5)
+        x = (2 * (np.arange(width) / width) - 1) * self.aspect * scale
+        y = (2 * (np.arange(height) / height) - 1) * scale
+        d = np.empty((height, width, 3))
+        d[..., 0] = x[None, :]
+        d[..., 1] = y[:, None]
+        d[..., 2] = -1.0
+        return d / np.sqrt(np.sum(d * d, axis=-1, keepdims=True))
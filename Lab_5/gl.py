@@ -1,48 +1,73 @@
 from vec import Vec3
 from camera import Camera
-from shading import phong_shade
+from shading import phong_shade_many
+from sphere import hit_distances
 import numpy as np
 
 class Renderer:
-    def __init__(self, screen):
+    def __init__(self, screen=None, width=None, height=None):
+        # screen=None: sin ventana, sólo el framebuffer (hay que dar width y height)
         self.screen = screen
-        _, _, self.width, self.height = screen.get_rect()
+        if screen is not None:
+            _, _, self.width, self.height = screen.get_rect()
+        else:
+            self.width, self.height = int(width), int(height)
+        # Framebuffer (alto, ancho, 3) uint8; glPresent lo copia a la pantalla
+        self.framebuffer = np.zeros((self.height, self.width, 3), dtype=np.uint8)
         # Cámara más cerca y FOV más grande
         self.camera = Camera(center=Vec3(0, 0, -5), eye=Vec3(0, 0, -2), fov_deg=90, aspect=self.width/self.height)
         self.scene = []
         self.lights = []
         self.ambient = 0.4  # Más luz ambiente
 
-    def glRender(self):
-        for y in range(self.height):
-            # Coordenadas normalizadas (0 a 1)
-            v = y / self.height
-            for x in range(self.width):
-                u = x / self.width
-                
-                # Obtener rayo primario
-                O, D = self.camera.primary_ray(u, v)
-                
-                # Buscar intersección más cercana
-                nearest_t = float('inf')
-                hit_data = None
-                
-                for obj in self.scene:
-                    hit = obj.ray_intersect(O, D)
-                    if hit and hit[0] < nearest_t and hit[0] > 0:  # Asegurar t > 0
-                        nearest_t = hit[0]
-                        hit_data = hit
-                
-                # Renderizar pixel
-                if hit_data:
-                    t, P, N, mat = hit_data
-                    view_dir = -D.normalize()  # Dirección hacia la cámara
-                    color = phong_shade(P, N, view_dir, mat, self.lights, self.ambient)
-                    color = np.clip(color * 255, 0, 255).astype(int)
-                    self.screen.set_at((x, y), tuple(color))
-                else:
-                    # Fondo negro
-                    self.screen.set_at((x, y), (0, 0, 0))
-        
+    def glRender(self, batch_pixels=1 << 15):
+        """
+        Renderiza por lotes de filas: todos los rayos del lote contra todas
+        las esferas en una sola operación (píxeles x esferas), el hit más
+        cercano con argmin y Phong por lotes. Fondo negro.
+        """
+        O = np.asarray(self.camera.eye, dtype=float)
+        dirs = self.camera.primary_rays(self.width, self.height)
+
+        centers = np.array([obj.position for obj in self.scene], dtype=float).reshape(-1, 3)
+        radii = np.array([obj.radius for obj in self.scene], dtype=float)
+        colors = np.array([obj.material.color for obj in self.scene], dtype=float).reshape(-1, 3)
+        specular = np.array([obj.material.specular for obj in self.scene], dtype=float)
+        shininess = np.array([obj.material.shininess for obj in self.scene], dtype=float)
+
+        self.framebuffer[:] = 0  # Fondo negro
+        if len(self.scene) == 0:
+            self.glPresent()
+            return
+
+        rows = max(1, batch_pixels // self.width)
+        for y0 in range(0, self.height, rows):
+            y1 = min(self.height, y0 + rows)
+            D = dirs[y0:y1].reshape(-1, 3)
+
+            # Buscar intersección más cercana: matriz (píxeles, esferas)
+            T = hit_distances(O, D, centers, radii)
+            nearest = np.argmin(T, axis=1)
+            t = T[np.arange(len(D)), nearest]
+            hit = np.flatnonzero(t < np.inf)
+            if len(hit) == 0:
+                continue
+
+            # Renderizar píxeles con hit
+            idx = nearest[hit]
+            P = O + D[hit] * t[hit, None]
+            N = P - centers[idx]
+            color = phong_shade_many(P, N, -D[hit], colors[idx], specular[idx], shininess[idx],
+                                     self.lights, self.ambient)
+            block = self.framebuffer[y0:y1].reshape(-1, 3)
+            block[hit] = np.clip(color * 255, 0, 255).astype(int)
+
+        self.glPresent()
+
+    def glPresent(self):
+        """Muestra el framebuffer con un solo blit_array (nada si no hay pantalla)."""
+        if self.screen is None:
+            return
         import pygame
+        pygame.surfarray.blit_array(self.screen, self.framebuffer.swapaxes(0, 1))
         pygame.display.flip()
\ No newline at end of file
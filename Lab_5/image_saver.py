@@ -1,7 +1,30 @@
-import pygame
+import struct
+
+import numpy as np
 
 class ImageSaver:
     @staticmethod
-    def save(surface, filename="output.bmp"):
-        pygame.image.save(surface, filename)
-        print(f"Imagen guardada como {filename}")
\ No newline at end of file
+    def save(source, filename="output.bmp"):
+        """
+        Guarda un framebuffer (alto, ancho, 3) uint8 como BMP de 24 bits,
+        o una Surface de pygame con pygame.image.save.
+        """
+        if isinstance(source, np.ndarray):
+            ImageSaver.save_bmp(source, filename)
+        else:
+            import pygame
+            pygame.image.save(source, filename)
+        print(f"Imagen guardada como {filename}")
+
+    @staticmethod
+    def save_bmp(framebuffer, filename):
+        height, width = framebuffer.shape[:2]
+        row_padded = (width * 3 + 3) & ~3
+        # filas de abajo hacia arriba, BGR, con padding a múltiplo de 4 bytes
+        rows = np.zeros((height, row_padded), dtype=np.uint8)
+        rows[:, :width * 3] = framebuffer[::-1, :, ::-1].reshape(height, width * 3)
+        with open(filename, "wb") as f:
+            f.write(b"BM")
+            f.write(struct.pack("<IHHI", 54 + rows.size, 0, 0, 54))
+            f.write(struct.pack("<IiiHHIIiiII", 40, width, height, 1, 24, 0, rows.size, 2835, 2835, 0, 0))
+            f.write(rows.tobytes())
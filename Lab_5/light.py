@@ -35,6 +35,6 @@ class PointLight(Light):
         self.att_quadratic = float(att_quadratic)
 
     def attenuation(self, dist):
-        # 1 / (k_c + k_l d + k_q d^2)
+        # 1 / (k_c + k_l d + k_q d^2); dist puede ser un array
         den = self.att_constant + self.att_linear*dist + self.att_quadratic*(dist*dist)
-        return 1.0 / max(den, 1e-6)
+        return 1.0 / np.maximum(den, 1e-6)
@@ -75,3 +75,52 @@ def phong_shade(P, N, V, mat, lights, ambient_intensity, scene=None):
 
     # Clamp 0..1
     return np.clip(final, 0.0, 1.0)
+
+
+def phong_shade_many(P, N, V, color, specular, shininess, lights, ambient_intensity):
+    """
+    Versión por lotes de phong_shade (sin sombras, como glRender).
+    P, N, V: (M, 3); color: (M, 3); specular, shininess: (M,).
+    Retorna colores (M, 3) en [0, 1].
+    """
+    N = N / (np.linalg.norm(N, axis=1, keepdims=True) + 1e-8)
+    V = V / (np.linalg.norm(V, axis=1, keepdims=True) + 1e-8)
+    exponent = np.maximum(1, shininess)
+
+    # Ambient
+    final = color * ambient_intensity
+
+    for L in lights:
+        if getattr(L, "light_type", "Directional") == "Ambient":
+            final += color * L.energy()
+            continue
+
+        if getattr(L, "light_type", "Directional") == "Directional":
+            Ldir = -np.array(L.direction, dtype=float)
+            Ldir /= (np.linalg.norm(Ldir) + 1e-8)
+            Ldir = np.broadcast_to(Ldir, P.shape)
+            light_energy = L.energy()
+
+        elif getattr(L, "light_type", "Directional") == "Point":
+            to_light = np.array(L.position, dtype=float) - P
+            dist = np.linalg.norm(to_light, axis=1, keepdims=True)
+            lit = dist > _EPS
+            Ldir = to_light / np.where(lit, dist, 1.0)
+            light_energy = L.energy() * (L.attenuation(dist) * lit)
+
+        else:
+            continue
+
+        # Difusa (Lambert)
+        ndotl = np.sum(N * Ldir, axis=1)
+        diff = np.maximum(0.0, ndotl)[:, None]
+
+        # Especular (Phong): R = -L + 2(N·L)N
+        R = -Ldir + 2.0 * ndotl[:, None] * N
+        spec = (np.maximum(0.0, np.sum(R * V, axis=1)) ** exponent)[:, None]
+
+        # Acumula luz
+        final += (color * diff + specular[:, None] * spec) * light_energy
+
+    # Clamp 0..1
+    return np.clip(final, 0.0, 1.0)
@@ -1,4 +1,7 @@
 from math import sqrt
+
+import numpy as np
+
 from vec import Vec3
 
 class Sphere:
@@ -23,3 +26,20 @@ class Sphere:
         hit = origin + direction * t
         normal = (hit - self.position).normalize()
         return (t, hit, normal, self.material)
+
+
+def hit_distances(origin, dirs, centers, radii):
+    """
+    Distancias (N, S) de N rayos desde `origin` contra S esferas, en una
+    sola operación: la misma t que ray_intersect (t0, o t1 si t0 <= 0) e
+    inf donde el rayo no toca la esfera o queda detrás (t <= 0).
+    dirs (N, 3) normalizadas, centers (S, 3), radii (S,).
+    """
+    L = centers - np.asarray(origin, dtype=float)     # (S, 3)
+    tca = dirs @ L.T                                   # (N, S)
+    d2 = np.sum(L * L, axis=1) - tca * tca
+    r2 = radii * radii
+    thc = np.sqrt(np.maximum(r2 - d2, 0.0))
+    t0 = tca - thc
+    t = np.where(t0 > 0, t0, tca + thc)
+    return np.where((d2 <= r2) & (t > 0), t, np.inf)
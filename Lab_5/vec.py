@@ -1,11 +1,16 @@
 # Clase Vec3 para operaciones 3D
+#
+# Vector escalar liviano para armar la escena (posiciones, cámara): una tupla
+# (x, y, z) de floats, sin arrays de NumPy por operación. np.asarray(v) la
+# convierte directo. El render (gl.py) trabaja con arrays (N, 3) por lotes.
 
-import numpy as np
+import math
+
+class Vec3(tuple):
+    __slots__ = ()
 
-class Vec3(np.ndarray):
     def __new__(cls, x, y, z):
-        obj = np.asarray([x, y, z], dtype=float).view(cls)
-        return obj
+        return tuple.__new__(cls, (float(x), float(y), float(z)))
 
     @property
     def x(self): return self[0]
@@ -15,26 +20,31 @@ class Vec3(np.ndarray):
     def z(self): return self[2]
 
     def norm(self):
-        return np.linalg.norm(self)
+        return math.sqrt(self.dot(self))
 
     def normalize(self):
         n = self.norm()
-        return self if n == 0 else Vec3(*(self / n))
+        return self if n == 0 else Vec3(self[0] / n, self[1] / n, self[2] / n)
 
     def dot(self, other):
-        return float(np.dot(self, other))
+        return self[0] * other[0] + self[1] * other[1] + self[2] * other[2]
 
     def __sub__(self, other):
-        return Vec3(*(super().__sub__(other)))
+        return Vec3(self[0] - other[0], self[1] - other[1], self[2] - other[2])
 
     def __add__(self, other):
-        return Vec3(*(super().__add__(other)))
+        return Vec3(self[0] + other[0], self[1] + other[1], self[2] + other[2])
+
+    def __mul__(self, s):
+        return Vec3(self[0] * s, self[1] * s, self[2] * s)
+
+    __rmul__ = __mul__
 
-    def __mul__(self, other):
-        return Vec3(*(super().__mul__(other)))
+    def __truediv__(self, s):
+        return Vec3(self[0] / s, self[1] / s, self[2] / s)
 
-    def __rmul__(self, other):
-        return Vec3(*(super().__mul__(other)))
+    def __neg__(self):
+        return Vec3(-self[0], -self[1], -self[2])
 
     def clamp01(self):
-        return Vec3(*(np.clip(self, 0, 1)))
+        return Vec3(*(min(1.0, max(0.0, c)) for c in self))
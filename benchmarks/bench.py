@@ -0,0 +1,291 @@
+"""
+Benchmarks de los raytracers (sin ventana de pygame).
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench.py                      # todo, JSON a stdout
+    python benchmarks/bench.py -o runs/hoy.json     # guarda el JSON
+    python benchmarks/bench.py --quick              # sólo la resolución más chica
+    python benchmarks/bench.py --compare base.json  # marca regresiones vs otra corrida
+
+Lab_07 y Lab_08 tienen paquetes con el mismo nombre (Textures, BMP), así que
+cada lab se mide en su propio subproceso (--lab) con su carpeta como cwd.
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LABS = ("Lab_06", "Lab_07", "Lab_08")
+
+# resoluciones por defecto de los frames completos (Lab 06/07 son pixel por pixel)
+DEFAULT_SIZES = {
+    "Lab_06": [(80, 60), (160, 120)],
+    "Lab_07": [(32, 24), (64, 48)],
+    "Lab_08": [(80, 60), (160, 120), (320, 240)],
+}
+
+
+# Utilidades
+def timed(fn, repeat=1):
+    """Mejor tiempo (s) de `repeat` llamadas a fn(); los prints del render se descartan."""
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def result(lab, name, value, unit, **extra):
+    return dict(lab=lab, name=name, value=value, unit=unit, **extra)
+
+
+def parse_size(text):
+    w, h = text.lower().split("x")
+    return int(w), int(h)
+
+
+# Benchmarks por lab (corren dentro del subproceso, con cwd = carpeta del lab)
+def bench_primitives(n_rays, repeat):
+    """Rayos/s por primitiva (Lab 08): ray_intersect uno a uno y ray_intersect_many en lote."""
+    import numpy as np
+    from Textures.material import Material
+    from Textures.figures import Sphere, Cube, Cylinder, Torus, Ellipsoid, Triangle
+
+    mat = Material()
+    shapes = {
+        "Sphere": Sphere((0, 0, 0), 1.0, mat),
+        "Cube": Cube((-1, -1, -1), (1, 1, 1), mat),
+        "Cylinder": Cylinder((0, -1, 0), 0.8, 2.0, mat),
+        "Torus": Torus((0, 0, 0), 0.8, 0.3, mat),
+        "Ellipsoid": Ellipsoid((0, 0, 0), (1.0, 0.6, 0.8), mat),
+        "Triangle": Triangle((-1, -1, 0), (1, -1, 0), (0, 1, 0), mat),
+    }
+
+    # rayos desde una esfera de radio 4 hacia puntos cerca del origen (~50% aciertan)
+    rng = np.random.default_rng(1234)
+    origins = rng.normal(size=(n_rays, 3))
+    origins = 4.0 * origins / np.linalg.norm(origins, axis=1, keepdims=True)
+    targets = rng.uniform(-1.2, 1.2, size=(n_rays, 3))
+    dirs = targets - origins
+    dirs /= np.linalg.norm(dirs, axis=1, keepdims=True)
+    origins = origins.astype(np.float32)
+    dirs = dirs.astype(np.float32)
+
+    n_scalar = min(n_rays, 2000)
+    out = []
+    for name, shape in shapes.items():
+        def scalar():
+            for i in range(n_scalar):
+                shape.ray_intersect(origins[i], dirs[i])
+
+        def batch():
+            shape.ray_intersect_many(origins, dirs)
+
+        hits = int(shape.ray_intersect_many(origins, dirs)[2].sum())
+        t = timed(scalar, repeat)
+        out.append(result("Lab_08", f"primitive/{name}/scalar", n_scalar / t, "rays/s",
+                          seconds=t, rays=n_scalar, hit_rate=hits / n_rays))
+        t = timed(batch, repeat)
+        out.append(result("Lab_08", f"primitive/{name}/batch", n_rays / t, "rays/s",
+                          seconds=t, rays=n_rays, hit_rate=hits / n_rays))
+    return out
+
+
+def bench_lab08(sizes, repeat, n_rays):
+    import numpy as np
+    from BMP.BMP_Writer import save
+    import Raytracer_Lab08
+
+    out = bench_primitives(n_rays, repeat)
+
+    for w, h in sizes:
+        for mode in ("wavefront", "scalar"):
+            # el modo escalar sólo en la resolución más chica: es la referencia lenta
+            if mode == "scalar" and (w, h) != min(sizes):
+                continue
+            rt = Raytracer_Lab08.build_scene(w, h)
+            t = timed(lambda: rt.render(mode=mode), repeat)
+            out.append(result("Lab_08", f"frame/{mode}/{w}x{h}", t, "s",
+                              pixels_per_s=w * h / t))
+
+    fb = np.random.default_rng(0).random((600, 800, 3), dtype=np.float32)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.bmp")
+        out.append(result("Lab_08", "bmp/save/800x600",
+                          timed(lambda: save(path, 800, 600, fb), repeat), "s"))
+        out.append(result("Lab_08", "bmp/save_memmap/800x600",
+                          timed(lambda: save(path, 800, 600, fb, memmap=True), repeat), "s"))
+    return out
+
+
+def bench_lab07(sizes, repeat, n_rays):
+    import numpy as np
+    from BMP.BMP_Writer import save
+    import Raytracer_Lab07
+
+    out = []
+    for w, h in sizes:
+        rt = Raytracer_Lab07.build_scene(w, h)
+        t = timed(rt.render, repeat)
+        out.append(result("Lab_07", f"frame/{w}x{h}", t, "s", pixels_per_s=w * h / t))
+
+    fb = np.random.default_rng(0).random((600, 800, 3), dtype=np.float32)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.bmp")
+        out.append(result("Lab_07", "bmp/save/800x600",
+                          timed(lambda: save(path, 800, 600, fb), repeat), "s"))
+    return out
+
+
+def bench_lab06(sizes, repeat, n_rays):
+    import random
+    import pygame
+    from gl import Renderer
+    from BMP_Writer import GenerateBMP
+    from BMPTexture import BMPTexture
+    import Raytracer2025
+
+    out = []
+    pygame.display.init()
+    with tempfile.TemporaryDirectory() as tmp:
+        # el env map del lab no viene en el repo: usamos uno sintético de 512x256
+        env_path = os.path.join(tmp, "env.bmp")
+        rnd = random.Random(0)
+        env = [[(rnd.random(), rnd.random(), rnd.random()) for _ in range(512)]
+               for _ in range(256)]
+        t = timed(lambda: GenerateBMP(env_path, 512, 256, env), repeat)
+        out.append(result("Lab_06", "bmp/save/512x256", t, "s"))
+        t = timed(lambda: BMPTexture(env_path), repeat)
+        out.append(result("Lab_06", "bmp/load/512x256", t, "s"))
+
+        for w, h in sizes:
+            screen = pygame.display.set_mode((w, h))
+            rend = Renderer(screen)
+            Raytracer2025.build_scene(rend, env_map=env_path)
+            t = timed(rend.glRender, repeat)
+            out.append(result("Lab_06", f"frame/{w}x{h}", t, "s", pixels_per_s=w * h / t))
+    pygame.display.quit()
+    return out
+
+
+LAB_BENCHES = {"Lab_06": bench_lab06, "Lab_07": bench_lab07, "Lab_08": bench_lab08}
+
+
+# Orquestación
+def run_lab(lab, args):
+    """Corre un lab en un subproceso y retorna su lista de resultados."""
+    cmd = [sys.executable, os.path.abspath(__file__), "--lab", lab,
+           "--repeat", str(args.repeat), "--rays", str(args.rays)]
+    if args.sizes:
+        cmd += ["--sizes", *args.sizes]
+    if args.quick:
+        cmd.append("--quick")
+    # stdout del subproceso es sólo el JSON: sin ventana ni saludo de pygame
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    proc = subprocess.run(cmd, cwd=os.path.join(ROOT, lab), env=env,
+                          stdout=subprocess.PIPE, text=True)
+    if proc.returncode != 0:
+        return [result(lab, "error", proc.returncode, "exit code")]
+    return json.loads(proc.stdout)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, text=True,
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout.strip()
+    except OSError:
+        return None
+
+
+def compare(results, base_path, threshold):
+    """Lista de regresiones respecto a otra corrida (más lento por encima de `threshold`)."""
+    with open(base_path) as f:
+        base = {(r["lab"], r["name"]): r for r in json.load(f)["results"]}
+
+    regressions = []
+    for r in results:
+        old = base.get((r["lab"], r["name"]))
+        if old is None or old["unit"] != r["unit"] or not old["value"]:
+            continue
+        # "s" = menos es mejor; "rays/s" = más es mejor
+        ratio = r["value"] / old["value"] if r["unit"] == "s" else old["value"] / r["value"]
+        if ratio > 1.0 + threshold:
+            regressions.append(dict(lab=r["lab"], name=r["name"], unit=r["unit"],
+                                    before=old["value"], after=r["value"],
+                                    slowdown=round(ratio, 3)))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de los raytracers (JSON).")
+    parser.add_argument("--labs", nargs="+", choices=LABS, default=list(LABS))
+    parser.add_argument("--sizes", nargs="+", help="resoluciones WxH (por defecto, por lab)")
+    parser.add_argument("--quick", action="store_true", help="sólo la resolución más chica")
+    parser.add_argument("--repeat", type=int, default=1, help="mejor de N corridas")
+    parser.add_argument("--rays", type=int, default=20000, help="rayos por primitiva (lote)")
+    parser.add_argument("-o", "--output", help="archivo JSON de salida (por defecto stdout)")
+    parser.add_argument("--compare", help="JSON de una corrida anterior")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="tolerancia de regresión (0.15 = 15%% más lento)")
+    parser.add_argument("--lab", choices=LABS, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.lab:
+        # subproceso: ya estamos en la carpeta del lab
+        sys.path.insert(0, os.getcwd())
+        sizes = [parse_size(s) for s in args.sizes] if args.sizes else DEFAULT_SIZES[args.lab]
+        if args.quick:
+            sizes = [min(sizes)]
+        out = LAB_BENCHES[args.lab](sizes, args.repeat, args.rays)
+        json.dump(out, sys.stdout)
+        return 0
+
+    results = []
+    for lab in args.labs:
+        print(f"[bench] {lab} ...", file=sys.stderr)
+        results += run_lab(lab, args)
+
+    import numpy as np
+    report = {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+    status = 0
+    if args.compare:
+        report["regressions"] = compare(results, args.compare, args.threshold)
+        for r in report["regressions"]:
+            print(f"[bench] REGRESIÓN {r['lab']} {r['name']}: "
+                  f"{r['before']:.4g} -> {r['after']:.4g} {r['unit']}", file=sys.stderr)
+        status = 1 if report["regressions"] else 0
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
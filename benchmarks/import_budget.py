@@ -0,0 +1,93 @@
+"""
+Presupuesto de tiempo de import de los puntos de entrada sin ventana.
+
+Uso (desde la raíz del repo):
+    python benchmarks/import_budget.py              # tabla; código 1 si algo se pasa
+    python benchmarks/import_budget.py --runs 10    # mejor de 10 procesos por módulo
+
+Cada módulo se importa en un proceso nuevo con `python -X importtime`, con la
+carpeta del lab como cwd. Se mide el tiempo propio del import: el total menos
+lo que tarda numpy, que domina y depende de la máquina. Además falla si el
+import carga algún módulo prohibido (pygame en un render sin ventana,
+multiprocessing en uno de un solo proceso).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEADLESS_FORBIDDEN = ("pygame", "multiprocessing", "concurrent.futures")
+
+# (lab, módulo, presupuesto en ms sin contar numpy, módulos que no debe cargar)
+BUDGETS = [
+    ("Lab_08", "cli", 40.0, HEADLESS_FORBIDDEN),
+    ("Lab_08", "Raytracer_Lab08", 40.0, HEADLESS_FORBIDDEN),
+    ("Lab_08", "Textures.gl", 30.0, HEADLESS_FORBIDDEN),
+    ("Lab_07", "Raytracer_Lab07", 30.0, HEADLESS_FORBIDDEN),
+]
+
+# Imprime qué módulos prohibidos quedaron cargados (stdout); importtime va a stderr
+PROBE = "import sys, json; import {module}; print(json.dumps([m for m in {forbidden!r} if m in sys.modules]))"
+
+
+def parse_importtime(text):
+    """{módulo: tiempo acumulado en ms} de la salida de -X importtime (primera aparición)."""
+    times = {}
+    for line in text.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        times.setdefault(parts[2].strip(), int(parts[1]) / 1000.0)
+    return times
+
+
+def measure(lab, module, forbidden, runs):
+    """(ms propios, ms de numpy, módulos prohibidos cargados) del mejor de `runs` procesos."""
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+    best = None
+    for _ in range(max(1, runs)):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c",
+                               PROBE.format(module=module, forbidden=tuple(forbidden))],
+                              cwd=os.path.join(ROOT, lab), env=env, text=True,
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{lab}: import {module} falló:\n{proc.stderr[-2000:]}")
+        times = parse_importtime(proc.stderr)
+        numpy_ms = times.get("numpy", 0.0)
+        own = times[module] - numpy_ms
+        if best is None or own < best[0]:
+            best = (own, numpy_ms, json.loads(proc.stdout.strip().splitlines()[-1]))
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Presupuesto de tiempo de import (sin ventana).")
+    parser.add_argument("--runs", type=int, default=5, help="procesos por módulo (se toma el mejor)")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="multiplica los presupuestos (máquinas lentas)")
+    args = parser.parse_args(argv)
+
+    failed = 0
+    print(f"{'lab':8} {'módulo':18} {'propio':>9} {'numpy':>9} {'límite':>9}  estado")
+    for lab, module, budget, forbidden in BUDGETS:
+        own, numpy_ms, loaded = measure(lab, module, forbidden, args.runs)
+        limit = budget * args.scale
+        problems = []
+        if own > limit:
+            problems.append("se pasa del presupuesto")
+        if loaded:
+            problems.append("carga " + ", ".join(loaded))
+        failed += bool(problems)
+        status = "; ".join(problems) if problems else "ok"
+        print(f"{lab:8} {module:18} {own:7.1f}ms {numpy_ms:7.1f}ms {limit:7.1f}ms  {status}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())